@@ -2,9 +2,13 @@
 
 import logging
 import argparse
-from lexicalanalysis import CorpusIterator
-from xmlbuilder import parse_xml_file, save_xml, XmlAttributes, XmlElements
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from itertools import chain
+from lexicalanalysis import CorpusIterator
+from xmlbuilder import parse_xml_file, patch_xml_header, save_xml, XmlAttributes, XmlElements
+from common import has_suffix
 
 
 def load_component(file_name):
@@ -24,121 +28,429 @@ def load_component(file_name):
     return xml, component
 
 
-def fix_corresp_attribute(args):
-    """Replaces the value of `corresp` attribute with provided value.
-    """
-    logging.info("Replacing the value of corresp attributes.")
-    corpus_iterator = CorpusIterator(args.corpus_dir, args.root_file)
-    files = chain(corpus_iterator.iter_corpus_files(),
-                  corpus_iterator.iter_annotated_files())
-    for file_path in files:
-        file_name = str(file_path)
-        logging.info(
-            "Replacing the value of corresp attribute in file {}.".format(
-                file_name))
-        xml, component = load_component(file_name)
-        meeting = next(component.iterdescendants(tag=XmlElements.meeting))
-        meeting.set(XmlAttributes.corresp, args.value)
-        save_xml(xml, file_name)
+def replace_corresp_attribute(component, value):
+    """Replaces the value of `corresp` attribute of the `meeting` element.
 
+    Parameters
+    ----------
+    component: etree.Element, required
+        The root element of the file.
+    value: str, required
+        The new value of the attribute.
 
-def fix_top_level_ids(args):
-    """Fixes the top-level ids of the annotated files.
+    Returns
+    -------
+    is_changed: bool
+        True if the attribute had a different value; False otherwise.
     """
-    logging.info("Fixing top-level ids of annotated files.")
-    corpus_iterator = CorpusIterator(args.corpus_dir, args.root_file)
-    for file_path in corpus_iterator.iter_annotated_files():
-        file_name = str(file_path)
-        logging.info("Fixing top-level id for component {}.".format(file_name))
-        xml, component = load_component(file_name)
-        component_id = component.get(XmlAttributes.xml_id)
-        component.set(XmlAttributes.xml_id, "{}.ana".format(component_id))
-        save_xml(xml, file_name)
+    meeting = next(component.iterdescendants(tag=XmlElements.meeting))
+    if meeting.get(XmlAttributes.corresp) == value:
+        return False
+    meeting.set(XmlAttributes.corresp, value)
+    return True
 
-    file_name = str(corpus_iterator.annotated_corpus_root_file)
-    logging.info("Fixing top-level id for root file {}.".format(file_name))
-    xml, corpus = load_component(file_name)
-    corpus_id = corpus.get(XmlAttributes.xml_id)
-    corpus.set(XmlAttributes.xml_id, "{}.ana".format(corpus_id))
-    save_xml(xml, file_name)
 
+def fix_top_level_id(component):
+    """Adds the `.ana` suffix to the id of the root element.
 
-def add_title_tag_to_file(file_name, tag):
-    """Adds the specified tag to the title of the specified file.
+    Parameters
+    ----------
+    component: etree.Element, required
+        The root element of the file.
+
+    Returns
+    -------
+    is_changed: bool
+        True if the suffix was added; False if the id already had it.
+    """
+    component_id = component.get(XmlAttributes.xml_id)
+    if component_id.endswith('.ana'):
+        return False
+    component.set(XmlAttributes.xml_id, "{}.ana".format(component_id))
+    return True
+
+
+def add_title_tag(component, tag):
+    """Adds the specified tag to the main titles of the file.
 
     Parameters
     ----------
-    file_name: str, required
-        The path of the file to load.
+    component: etree.Element, required
+        The root element of the file.
     tag: str, required
-        The tag to add to the file.
+        The tag to add to the titles.
+
+    Returns
+    -------
+    is_changed: bool
+        True if the tag was added to at least one title; False otherwise.
     """
-    logging.info("Adding tag {} to file {}.".format(tag, file_name))
-    xml, component = load_component(file_name)
+    is_changed = False
     titleStm = next(component.iterdescendants(tag=XmlElements.titleStmt))
     for title in titleStm.iterdescendants(tag=XmlElements.title):
         if title.get(XmlAttributes.type_) != 'main':
             continue
         if tag not in title.text:
             title.text = "{} {}".format(title.text, tag)
-    save_xml(xml, file_name)
+            is_changed = True
+    return is_changed
+
 
+def is_empty_segment(seg):
+    """Checks if the segment has neither child elements nor text.
 
-def add_title_tags(args):
-    """Iterates over corpus files and adds tags to their titles.
+    Parameters
+    ----------
+    seg: etree.Element, required
+        The segment to check.
+
+    Returns
+    -------
+    is_empty: bool
+        True if the segment is empty; False otherwise.
     """
-    logging.info("Adding title tags to corpus files.")
-    corpus_iterator = CorpusIterator(args.corpus_dir, args.root_file)
-    # Add tag to unannotated files
-    add_title_tag_to_file(str(corpus_iterator.root_file), "[ParlaMint]")
-    for file_path in corpus_iterator.iter_corpus_files():
-        file_name = str(file_path)
-        add_title_tag_to_file(file_name, "[ParlaMint]")
-    # Add tag to annotated files
-    add_title_tag_to_file(str(corpus_iterator.annotated_corpus_root_file),
-                          "[ParlaMint.ana]")
-    for file_path in corpus_iterator.iter_annotated_files():
-        file_name = str(file_path)
-        add_title_tag_to_file(file_name, "[ParlaMint.ana]")
+    return (len(seg) == 0) and ((seg.text is None) or
+                                (len(seg.text.strip()) == 0))
 
 
-def remove_empty_segments_from_file(file_name):
-    """Removes the empty segments from the specified file.
+def update_tag_usage(component, deltas):
+    """Subtracts the number of removed elements from the values of `tagUsage` elements.
 
     Parameters
     ----------
-    file_name: str, required
-        The path of the file from which to remove empty segments.
+    component: etree.Element, required
+        The root element of the file.
+    deltas: dict of (str, int), required
+        The number of removed elements keyed by their local name.
+
+    Returns
+    -------
+    is_changed: bool
+        True if any `tagUsage` element was updated; False otherwise.
     """
-    xml, component = load_component(file_name)
+    is_changed = False
+    for tag_usage in component.iterdescendants(tag=XmlElements.tagUsage):
+        delta = deltas.get(tag_usage.get(XmlAttributes.gi), 0)
+        if delta == 0:
+            continue
+        num_occurences = int(tag_usage.get(XmlAttributes.occurs)) - delta
+        tag_usage.set(XmlAttributes.occurs, str(max(0, num_occurences)))
+        is_changed = True
+    return is_changed
+
+
+def remove_empty_segments_from_component(component):
+    """Removes the empty segments from the specified file and updates its `tagUsage` elements.
+
+    Parameters
+    ----------
+    component: etree.Element, required
+        The root element of the file.
 
+    Returns
+    -------
+    deltas: collections.Counter
+        The number of removed segments keyed by `seg`, the local name of their `tagUsage` element;
+        empty if no segment was removed.
+    """
     segments = [
         seg for seg in component.iterdescendants(tag=XmlElements.seg)
-        if len(seg) == 0
+        if is_empty_segment(seg)
     ]
-
-    if len(segments) == 0:
-        logging.info(
-            "File {} does not contain empty segments.".format(file_name))
-    return
-
-    logging.info("Removing empty segments from {}.".format(file_name))
+    logging.info("Found {} empty segments.".format(len(segments)))
+    deltas = Counter()
     for seg in segments:
+        # Empty segments have no child elements, so only the segment itself is removed.
+        deltas['seg'] += 1
         parent = seg.getparent()
         parent.remove(seg)
-    save_xml(xml, file_name)
+    update_tag_usage(component, deltas)
+    return deltas
 
 
-def remove_empty_segments(args):
-    """Removes empty segments from corpus component files.
+def plan_remove_empty_segments(args, corpus_iterator):
+    """Yields the files from which to remove empty segments and the correction to apply.
     """
-    logging.info("Removing empty segments from corpus.")
-    corpus_iterator = CorpusIterator(args.corpus_dir, args.root_file)
     for file_path in corpus_iterator.iter_annotated_files():
-        file_name = str(file_path)
-        remove_empty_segments_from_file(file_name)
-        file_name = corpus_iterator.get_component_file_name(file_path)
-        remove_empty_segments_from_file(str(file_name))
+        yield file_path, remove_empty_segments_from_component
+        file_path = corpus_iterator.get_component_file_name(file_path)
+        yield file_path, remove_empty_segments_from_component
+
+
+def plan_add_title_tags(args, corpus_iterator):
+    """Yields the files to which to add title tags and the correction to apply.
+    """
+    add_tag = partial(add_title_tag, tag="[ParlaMint]")
+    yield corpus_iterator.root_file, add_tag
+    for file_path in corpus_iterator.iter_corpus_files():
+        yield file_path, add_tag
+    add_tag = partial(add_title_tag, tag="[ParlaMint.ana]")
+    yield corpus_iterator.annotated_corpus_root_file, add_tag
+    for file_path in corpus_iterator.iter_annotated_files():
+        yield file_path, add_tag
+
+
+def plan_fix_top_level_ids(args, corpus_iterator):
+    """Yields the annotated files whose top-level ids need fixing and the correction to apply.
+    """
+    for file_path in corpus_iterator.iter_annotated_files():
+        yield file_path, fix_top_level_id
+    yield corpus_iterator.annotated_corpus_root_file, fix_top_level_id
+
+
+def plan_replace_corresp(args, corpus_iterator):
+    """Yields the files whose corresp attribute needs replacing and the correction to apply.
+    """
+    replace = partial(replace_corresp_attribute, value=args.value)
+    files = chain(corpus_iterator.iter_corpus_files(),
+                  corpus_iterator.iter_annotated_files())
+    for file_path in files:
+        yield file_path, replace
+
+
+CORRECTION_PLANNERS = {
+    'remove-empty-segments': plan_remove_empty_segments,
+    'add-tags': plan_add_title_tags,
+    'fix-tli': plan_fix_top_level_ids,
+    'replace-corresp': plan_replace_corresp
+}
+
+# The corrections that only change elements from the header of the files.
+HEADER_CORRECTIONS = set(
+    ['add-tags', 'fix-tli', 'replace-corresp', 'update-tag-usage'])
+
+
+def plan_corrections(args, corpus_iterator):
+    """Groups the corrections requested in `args` by the file they apply to.
+
+    Parameters
+    ----------
+    args: argparse.Namespace, required
+        The command-line arguments containing the list of corrections.
+    corpus_iterator: CorpusIterator, required
+        The iterator over corpus files.
+
+    Returns
+    -------
+    (component_files, root_files): tuple of dict
+        The lists of (correction name, correction) tuples keyed by the names of component files and root files.
+    """
+    root_files = set([
+        str(corpus_iterator.root_file),
+        str(corpus_iterator.annotated_corpus_root_file)
+    ])
+    component_files, corpus_root_files = {}, {}
+    for correction_name in dict.fromkeys(args.corrections):
+        planner = CORRECTION_PLANNERS[correction_name]
+        for file_path, correction in planner(args, corpus_iterator):
+            file_name = str(file_path)
+            plan = corpus_root_files if file_name in root_files else component_files
+            if file_name not in plan:
+                plan[file_name] = []
+            plan[file_name].append((correction_name, correction))
+    return component_files, corpus_root_files
+
+
+def apply_corrections_to_file(file_name, corrections):
+    """Loads the file once, applies the corrections in order and saves it if any of them changed it.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the file to correct.
+    corrections: list of (str, callable) tuples, required
+        The names of the corrections and the functions that apply them to the root element.
+
+    Returns
+    -------
+    changes: dict of (str, bool)
+        Whether each correction changed the file keyed by the name of the correction.
+    """
+    logging.info("Applying corrections {} to file {}.".format(
+        ', '.join(name for name, _ in corrections), file_name))
+    changes = {}
+    if all(name in HEADER_CORRECTIONS for name, _ in corrections):
+        # Only the header changes so the body is copied without being parsed.
+        patch_xml_header(
+            file_name,
+            partial(apply_header_corrections,
+                    corrections=corrections,
+                    changes=changes))
+        return changes
+    xml, component = load_component(file_name)
+    apply_header_corrections(component, corrections, changes)
+    if any(changes.values()):
+        save_xml(xml, file_name)
+    else:
+        logging.info("File {} is unchanged.".format(file_name))
+    return changes
+
+
+def apply_header_corrections(component, corrections, changes):
+    """Applies the corrections to the root element and records which of them changed it.
+
+    Parameters
+    ----------
+    component: etree.Element, required
+        The root element of the file; may contain only the header.
+    corrections: list of (str, callable) tuples, required
+        The names of the corrections and the functions that apply them to the root element.
+    changes: dict of (str, bool), required
+        The dict in which to record whether each correction changed the root element.
+
+    Returns
+    -------
+    is_changed: bool
+        True if at least one correction changed the root element; False otherwise.
+    """
+    for name, correction in corrections:
+        changes[name] = correction(component) or changes.get(name, False)
+    return any(changes.values())
+
+
+def try_apply_corrections_to_file(file_name, corrections):
+    """Applies the corrections to the file and captures the error if any.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the file to correct.
+    corrections: list of (str, callable) tuples, required
+        The names of the corrections and the functions that apply them to the root element.
+
+    Returns
+    -------
+    (file_name, changes, error): tuple of (str, dict, str)
+        The name of the file, whether each correction changed it,
+        and the description of the error or None if corrections were applied.
+    """
+    try:
+        changes = apply_corrections_to_file(file_name, corrections)
+        return file_name, changes, None
+    except Exception as e:
+        logging.exception("Could not apply corrections to file %s.",
+                          file_name)
+        changes = {name: False for name, _ in corrections}
+        return file_name, changes, repr(e)
+
+
+def iter_correction_results(files, workers=1):
+    """Applies the corrections to each file serially or in a pool of processes.
+
+    Parameters
+    ----------
+    files: dict of (str, list), required
+        The corrections to apply keyed by the names of the files.
+    workers: int, optional
+        The number of worker processes. Default is 1 which means no process pool.
+
+    Returns
+    -------
+    results: iterable of (file_name, changes, error) tuples
+        The outcome for each file.
+    """
+    if (workers <= 1) or (len(files) <= 1):
+        return [
+            try_apply_corrections_to_file(file_name, corrections)
+            for file_name, corrections in files.items()
+        ]
+    chunk_size = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(try_apply_corrections_to_file,
+                         files.keys(),
+                         files.values(),
+                         chunksize=chunk_size))
+
+
+def report_correction_results(corrections, results):
+    """Logs the number of changed, unchanged and failed files for each correction and the failures.
+
+    Parameters
+    ----------
+    corrections: list of str, required
+        The names of the applied corrections.
+    results: iterable of (file_name, changes, error) tuples, required
+        The outcome for each file.
+    """
+    counts = {name: Counter() for name in corrections}
+    failures = []
+    for file_name, changes, error in results:
+        if error is not None:
+            failures.append((file_name, error))
+        for name, is_changed in changes.items():
+            if error is not None:
+                counts[name]['failed'] += 1
+            elif is_changed:
+                counts[name]['changed'] += 1
+            else:
+                counts[name]['unchanged'] += 1
+    for name, count in counts.items():
+        logging.info("{}: {} changed, {} unchanged, {} failed.".format(
+            name, count['changed'], count['unchanged'], count['failed']))
+    if len(failures) > 0:
+        logging.error("Failed to correct {} files:".format(len(failures)))
+        for file_name, error in failures:
+            logging.error("{}: {}".format(file_name, error))
+
+
+def plan_tag_usage_updates(corpus_iterator, results, root_files):
+    """Sums the elements removed from component files and plans the update of `tagUsage` elements in the root files.
+
+    Parameters
+    ----------
+    corpus_iterator: CorpusIterator, required
+        The iterator over corpus files.
+    results: list of (file_name, changes, error) tuples, required
+        The outcome for each component file.
+    root_files: dict of (str, list), required
+        The corrections to apply to the root files keyed by the names of the files.
+
+    Returns
+    -------
+    is_planned: bool
+        True if elements were removed from any component file; False otherwise.
+    """
+    plain_deltas, annotated_deltas = Counter(), Counter()
+    for file_name, changes, error in results:
+        deltas = changes.get('remove-empty-segments')
+        if not deltas:
+            continue
+        if has_suffix(file_name, '.ana.xml'):
+            annotated_deltas.update(deltas)
+        else:
+            plain_deltas.update(deltas)
+    updates = [(corpus_iterator.root_file, plain_deltas),
+               (corpus_iterator.annotated_corpus_root_file, annotated_deltas)]
+    is_planned = False
+    for root_file, deltas in updates:
+        if len(deltas) == 0:
+            continue
+        logging.info("Removed elements {} from the files of {}.".format(
+            dict(deltas), root_file))
+        update = partial(update_tag_usage, deltas=deltas)
+        root_files.setdefault(str(root_file), []).append(
+            ('update-tag-usage', update))
+        is_planned = True
+    return is_planned
+
+
+def apply_corrections(args):
+    """Applies the requested corrections reading each file once and writing only the changed files.
+    """
+    logging.info("Applying corrections: {}.".format(', '.join(
+        args.corrections)))
+    corpus_iterator = CorpusIterator(args.corpus_dir, args.root_file)
+    component_files, root_files = plan_corrections(args, corpus_iterator)
+    logging.info("Correcting {} component files using {} worker(s).".format(
+        len(component_files), args.workers))
+    results = iter_correction_results(component_files, args.workers)
+    corrections = list(dict.fromkeys(args.corrections))
+    if plan_tag_usage_updates(corpus_iterator, results, root_files):
+        corrections.append('update-tag-usage')
+    # Root files aggregate the whole corpus so they are corrected once, at the end.
+    results = chain(results, iter_correction_results(root_files))
+    report_correction_results(corrections, results)
 
 
 def add_corpus_iterator_args(parser):
@@ -150,6 +462,18 @@ def add_corpus_iterator_args(parser):
         '--root-file',
         help="The name of the corpus root file. Default is ParlaMint-RO.xml",
         default="ParlaMint-RO.xml")
+    parser.add_argument(
+        '--workers',
+        help="The number of processes that correct files in parallel. Default is 1.",
+        type=int,
+        default=1)
+
+
+def add_corresp_value_arg(parser):
+    parser.add_argument(
+        '--value',
+        help="The value to replace with. Default is '#parla.lower'.",
+        default='#parla.lower')
 
 
 def parse_arguments():
@@ -166,30 +490,42 @@ def parse_arguments():
     remove_segments = subparsers.add_parser(
         'remove-empty-segments',
         help="Removes the empty segments from corpus component files.")
-    remove_segments.set_defaults(func=remove_empty_segments)
+    remove_segments.set_defaults(func=apply_corrections,
+                                 corrections=['remove-empty-segments'])
     add_corpus_iterator_args(remove_segments)
 
     add_tags = subparsers.add_parser(
         'add-tags',
         help=
         "Adds the [ParlaMint] and [ParlaMint.ana] tags to the corpus files.")
-    add_tags.set_defaults(func=add_title_tags)
+    add_tags.set_defaults(func=apply_corrections, corrections=['add-tags'])
     add_corpus_iterator_args(add_tags)
 
     fix_tli = subparsers.add_parser(
         'fix-tli', help="Fixes the top-level ids of the annotated files.")
-    fix_tli.set_defaults(func=fix_top_level_ids)
+    fix_tli.set_defaults(func=apply_corrections, corrections=['fix-tli'])
     add_corpus_iterator_args(fix_tli)
 
     parser = subparsers.add_parser(
         'replace-corresp',
         help="Replaces the value of corresp attribute of the meeting element.")
-    parser.set_defaults(func=fix_corresp_attribute)
+    parser.set_defaults(func=apply_corrections,
+                        corrections=['replace-corresp'])
     add_corpus_iterator_args(parser)
-    parser.add_argument(
-        '--value',
-        help="The value to replace with. Default is '#parla.lower'.",
-        default='#parla.lower')
+    add_corresp_value_arg(parser)
+
+    pipeline = subparsers.add_parser(
+        'pipeline',
+        help=
+        "Applies several corrections in the specified order reading and writing each file once."
+    )
+    pipeline.set_defaults(func=apply_corrections)
+    pipeline.add_argument('corrections',
+                          nargs='+',
+                          choices=list(CORRECTION_PLANNERS),
+                          help="The corrections to apply.")
+    add_corpus_iterator_args(pipeline)
+    add_corresp_value_arg(pipeline)
     return root_parser.parse_args()
 
 
@@ -3,6 +3,7 @@ from lexicalanalysis import AnnotatedFilesAggregator, CorpusComponentAnnotator,
 import logging
 import argparse
 from xmlbuilder import parse_xml_file, XmlAttributes, XmlElements
+from common import add_compression_arg
 from pathlib import Path
 
 
@@ -11,7 +12,8 @@ def main(args):
     udpipe = UDPipe()
     for component_file in iterator.iter_corpus_files(
             skip_annotated=args.resume):
-        annotator = CorpusComponentAnnotator(component_file, udpipe)
+        annotator = CorpusComponentAnnotator(component_file, udpipe,
+                                             args.compress)
         annotator.apply_annotation()
     aggregator = AnnotatedFilesAggregator(iterator)
     aggregator.aggregate_corpus_info()
@@ -40,6 +42,7 @@ def parse_arguments():
     parser.add_argument('--ud-taxonomy-id',
                         help="The XML id of the UD taxonomy.",
                         default='UD-SYN')
+    add_compression_arg(parser)
     parser.add_argument(
         '-l',
         '--log-level',
@@ -0,0 +1,135 @@
+"""Iteration over the input files stored in directories and in zip or tar archives."""
+import logging
+import tarfile
+import zipfile
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+# The suffixes of the supported archives; the longer suffixes are checked first.
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tbz2', '.txz',
+                    '.tar', '.zip')
+
+
+def get_archive_suffix(file_name):
+    """Gets the suffix of the archive from the file name.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+
+    Returns
+    -------
+    suffix: str
+        The suffix of the archive or None if the file is not an archive.
+    """
+    file_name = str(file_name).lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if file_name.endswith(suffix):
+            return suffix
+    return None
+
+
+class ArchiveMember:
+    """Represents an input file stored in an archive.
+
+    The name of the member is built by replacing the archive with a directory,
+    e.g. member `ro28_01.htm` of `corpus/2020.zip` is named `corpus/2020/ro28_01.htm`,
+    so the paths of the members follow the same conventions as the files on disk.
+    """
+
+    def __init__(self, name, opener):
+        """Creates a new instance of ArchiveMember.
+
+        Parameters
+        ----------
+        name: str, required
+            The path of the member as if the archive was unpacked.
+        opener: callable, required
+            The function that returns the binary file object of the member contents.
+        """
+        self.name = name
+        self.opener = opener
+
+    def open(self):
+        """Opens the member for reading.
+
+        Returns
+        -------
+        file: file object
+            The binary file object of the member contents.
+        """
+        return self.opener()
+
+    def __str__(self):
+        return self.name
+
+
+def iter_input_files(directory, accept):
+    """Recursively iterates over the accepted files of the directory and of the archives within it.
+
+    The members of tar archives are read sequentially, so a member must be read
+    before advancing to the next one.
+
+    Parameters
+    ----------
+    directory: str, required
+        The directory to iterate.
+    accept: callable, required
+        The function that receives the name of a file and returns True if the file should be returned.
+
+    Returns
+    -------
+    input_file: generator of pathlib.Path or ArchiveMember
+        The generator that returns the path of each file on disk and the members of the archives.
+    """
+    root_path = Path(directory)
+    for file_path in root_path.glob('**/*.*'):
+        if not file_path.is_file():
+            continue
+        suffix = get_archive_suffix(file_path)
+        if suffix is not None:
+            yield from iter_archive_members(file_path, accept, suffix)
+        elif accept(file_path.name):
+            yield file_path
+
+
+def iter_archive_members(archive_path, accept, suffix=None):
+    """Iterates over the accepted members of a zip or tar archive.
+
+    Parameters
+    ----------
+    archive_path: pathlib.Path, required
+        The path of the archive.
+    accept: callable, required
+        The function that receives the name of a member and returns True if the member should be returned.
+    suffix: str, optional
+        The suffix of the archive. Default is None which means it is inferred from the file name.
+
+    Returns
+    -------
+    member: generator of ArchiveMember
+        The generator that returns the accepted members in the order in which they are stored.
+    """
+    if suffix is None:
+        suffix = get_archive_suffix(archive_path)
+    archive_name = str(archive_path)
+    directory = archive_name[:len(archive_name) - len(suffix)]
+    logging.info("Reading input files from archive [{}].".format(archive_name))
+    if suffix == '.zip':
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not accept(
+                        PurePosixPath(info.filename).name):
+                    continue
+                name = '{}/{}'.format(directory,
+                                      PurePosixPath(info.filename))
+                yield ArchiveMember(name, partial(archive.open, info))
+        return
+    # Reading the tar archive as a stream avoids seeking back in compressed archives.
+    with tarfile.open(archive_path, mode='r|*') as archive:
+        for info in archive:
+            if not info.isfile() or not accept(PurePosixPath(info.name).name):
+                continue
+            name = '{}/{}'.format(directory, PurePosixPath(info.name))
+            yield ArchiveMember(name, partial(archive.extractfile, info))
@@ -0,0 +1,246 @@
+"""Compares the time spent formatting the dates of the session and root files with and without the cached date formatting."""
+from argparse import ArgumentParser
+import logging
+import time
+from datetime import date, timedelta
+from lxml import etree
+import xmlbuilder
+from xmlbuilder import build_session_dates, parse_date, XmlIdBuilder
+
+TEI_NAMESPACE = 'http://www.tei-c.org/ns/1.0'
+
+
+def count_session_date_elements(session_template):
+    """Counts the date elements of the setting and bibl sections, which the session builder fills in.
+
+    Parameters
+    ----------
+    session_template: str, required
+        The path of the session template.
+
+    Returns
+    -------
+    num_dates: int
+        The number of date elements.
+    """
+    root = etree.parse(session_template).getroot()
+    return sum(1 for element in root.iter('{{{}}}date'.format(TEI_NAMESPACE))
+               if etree.QName(element.getparent()).localname in ('setting',
+                                                                 'bibl'))
+
+
+def load_terms(corpus_template):
+    """Loads the start and end dates of the legislative terms from the corpus root template.
+
+    Parameters
+    ----------
+    corpus_template: str, required
+        The path of the corpus root template.
+
+    Returns
+    -------
+    terms: list of (date, date)
+        The start and end dates of the terms; the end date of the current term is None.
+    """
+    root = etree.parse(corpus_template).getroot()
+    terms = []
+    for event in root.iter('{{{}}}event'.format(TEI_NAMESPACE)):
+        end_date = event.get('to')
+        terms.append((parse_date(event.get('from')),
+                      parse_date(end_date) if end_date is not None else None))
+    return terms
+
+
+def format_session_dates_per_call(session_date, num_date_elements):
+    """Formats the session date the way the session builder did before the dates were built once per session.
+
+    Parameters
+    ----------
+    session_date: datetime.date, required
+        The date of the session.
+    num_date_elements: int, required
+        The number of date elements of the setting and bibl sections.
+    """
+    format_date = xmlbuilder.format_date.__wrapped__
+    for _ in range(num_date_elements):
+        format_date(session_date, "yyyy-MM-dd")
+        format_date(session_date, "dd.MM.yyyy")
+    format_date(session_date, "yyyyMMdd")
+    format_date(session_date, "yyyyMMdd")
+    format_date(session_date, "d MMMM yyyy", locale="ro")
+    format_date(session_date, "MMMM d yyyy", locale="en")
+    format_date(session_date, "d MMMM yyyy")
+    format_date(session_date, "yyyy-MM-dd")
+
+
+def format_session_dates_once(session_date, num_date_elements):
+    """Formats the session date the way the session builder does, i.e. once per form.
+
+    Parameters
+    ----------
+    session_date: datetime.date, required
+        The date of the session.
+    num_date_elements: int, required
+        The number of date elements of the setting and bibl sections; they reuse the same strings.
+    """
+    build_session_dates(session_date)
+    XmlIdBuilder('ParlaMint-RO', session_date).session_id
+
+
+def format_affiliation_dates(format_date, terms, num_deputies):
+    """Formats the start and end dates of the affiliations of the deputies of each term.
+
+    Parameters
+    ----------
+    format_date: callable, required
+        The function formatting a date.
+    terms: list of (date, date), required
+        The start and end dates of the terms.
+    num_deputies: int, required
+        The number of deputies of each term.
+    """
+    for start_date, end_date in terms:
+        for _ in range(num_deputies):
+            format_date(start_date, "yyyy-MM-dd")
+            if end_date is not None:
+                format_date(end_date, "yyyy-MM-dd")
+
+
+def measure(func, repeat):
+    """Runs the function with an empty date cache and measures the time.
+
+    Parameters
+    ----------
+    func: callable, required
+        The function to run.
+    repeat: int, required
+        The number of runs; the fastest one is reported.
+
+    Returns
+    -------
+    seconds: float
+        The duration of the fastest run.
+    """
+    best = None
+    for _ in range(repeat):
+        xmlbuilder.format_date.cache_clear()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        if (best is None) or (seconds < best):
+            best = seconds
+    return best
+
+
+def count_babel_calls(func):
+    """Runs the function with an empty date cache and counts the calls to `babel.dates.format_date`.
+
+    Parameters
+    ----------
+    func: callable, required
+        The function to run.
+
+    Returns
+    -------
+    num_calls: int
+        The number of calls to Babel.
+    """
+    import babel.dates
+    babel_format_date = babel.dates.format_date
+    num_calls = 0
+
+    def counting_format_date(*args, **kwargs):
+        nonlocal num_calls
+        num_calls += 1
+        return babel_format_date(*args, **kwargs)
+
+    xmlbuilder.format_date.cache_clear()
+    babel.dates.format_date = counting_format_date
+    try:
+        func()
+    finally:
+        babel.dates.format_date = babel_format_date
+    return num_calls
+
+
+def run(args):
+    num_date_elements = count_session_date_elements(args.session_template)
+    session_dates = [
+        date(2020, 1, 6) + timedelta(days=day)
+        for day in range(args.num_sessions)
+    ]
+    logging.info(
+        "Formatting the dates of {} sessions with {} date elements each.".format(
+            len(session_dates), num_date_elements))
+    for name, format_session in [('Per call', format_session_dates_per_call),
+                                 ('Once per session',
+                                  format_session_dates_once)]:
+
+        def format_sessions():
+            for session_date in session_dates:
+                format_session(session_date, num_date_elements)
+
+        num_calls = count_babel_calls(format_sessions)
+        seconds = measure(format_sessions, args.repeat)
+        logging.info(
+            "{}: {} Babel calls per session, {:.1f} us per session.".format(
+                name, num_calls // len(session_dates),
+                1000000 * seconds / len(session_dates)))
+
+    terms = load_terms(args.corpus_template)
+    num_dates = sum(1 if end_date is None else 2
+                    for _, end_date in terms) * args.num_deputies
+    logging.info("Formatting {} affiliation dates of {} terms.".format(
+        num_dates, len(terms)))
+    for name, format_date in [('Uncached', xmlbuilder.format_date.__wrapped__),
+                              ('Cached', xmlbuilder.format_date)]:
+
+        def format_affiliations():
+            format_affiliation_dates(format_date, terms, args.num_deputies)
+
+        seconds = measure(format_affiliations, args.repeat)
+        logging.info("{}: {:.1f} ms, {:.2f} us per date.".format(
+            name, 1000 * seconds, 1000000 * seconds / num_dates))
+    logging.info("That's all folks!")
+
+
+def parse_arguments():
+    parser = ArgumentParser(
+        description='Benchmark the formatting of the dates of the corpus files.')
+    parser.add_argument(
+        '--session-template',
+        help="The file containing the XML template of a session.",
+        default='data/templates/session-template.xml')
+    parser.add_argument(
+        '--corpus-template',
+        help="The file containing the XML template of the corpus root.",
+        default='data/templates/corpus-root-template.xml')
+    parser.add_argument(
+        '--num-sessions',
+        help="The number of sessions whose dates are formatted. Default is 1000.",
+        type=int,
+        default=1000)
+    parser.add_argument(
+        '--num-deputies',
+        help="The number of deputies affiliated to each term. Default is 330.",
+        type=int,
+        default=330)
+    parser.add_argument(
+        '--repeat',
+        help="The number of runs of each benchmark; the fastest one is reported. Default is 5.",
+        type=int,
+        default=5)
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help="The level of details to print when running.",
+        choices=['debug', 'info', 'warning', 'error', 'critical'],
+        default='info')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=getattr(logging, args.log_level.upper()))
+    run(args)
@@ -0,0 +1,203 @@
+"""Compares the time spent parsing saved mandate pages by the per-field and the single-pass parsing of `MandateInfoParser`."""
+from argparse import ArgumentParser
+import json
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+from common import get_element_text, Resources
+from crawling import HttpCache, MandateInfoParser, XPathStrings
+
+
+class MemoryFetcher:
+    """Serves the pages loaded in memory so that the timings do not include disk reads."""
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get(self, url):
+        return self.pages[url]
+
+
+class PerFieldMandateInfoParser(MandateInfoParser):
+    """Parses the mandate pages the way the crawler did before `parse_page`.
+
+    The date regex and the month map are built for each page, the XPath expressions
+    are compiled on each call, and the affiliation section is found by walking every section.
+    The date formatting of `MandateInfoParser` is kept because the old one failed on dates with a month.
+    """
+    def __init__(self, url, start_year, end_year=None, fetcher=None):
+        super().__init__(url, start_year, end_year, fetcher)
+        self.date_regex = re.compile(r'([a-z]{3})\.\s+([0-9]{4})',
+                                     re.IGNORECASE)
+        self.month_map = {
+            'ian': 1,
+            'feb': 2,
+            'mar': 3,
+            'apr': 4,
+            'mai': 5,
+            'iun': 6,
+            'iul': 7,
+            'aug': 8,
+            'sep': 9,
+            'oct': 10,
+            'noi': 11,
+            'dec': 12
+        }
+
+    def parse_page(self):
+        deputy_id = self.parse_deputy_id()
+        first_name, last_name = self.parse_names()
+        profile_picture = self.parse_profile_picture()
+        affiliations = self.parse_affiliations()
+        return (deputy_id, first_name, last_name, profile_picture,
+                affiliations)
+
+    def parse_names(self):
+        name_element = self.html_root.xpath(XPathStrings.DeputyName)
+        if len(name_element) == 0:
+            return None, None
+        first_name_parts, last_name_parts = [], []
+        text = self.formatter.normalize(get_element_text(name_element[0]))
+        for part in text.split():
+            if part.isupper():
+                last_name_parts.append(part)
+            else:
+                first_name_parts.append(part)
+        return ' '.join(first_name_parts), ' '.join(last_name_parts)
+
+    def parse_profile_picture(self):
+        anchor_element = self.html_root.xpath(XPathStrings.ProfilePic)
+        if (len(anchor_element) == 0) or (anchor_element[0].get('href') is None):
+            return None
+        return urljoin(self.url, anchor_element[0].get('href'))
+
+    def _find_affiliations_section(self):
+        for elem in self.html_root.xpath(XPathStrings.InfoSections):
+            for heading in elem.iterdescendants(tag='h3'):
+                text = get_element_text(heading)
+                text = self.formatter.normalize(text)
+                if Resources.PoliticalParty in text or Resources.PoliticalGroup in text:
+                    return elem
+        return None
+
+
+def load_pages(cache_dir):
+    """Loads the mandate pages saved by the crawler in its cache directory.
+
+    Parameters
+    ----------
+    cache_dir: str, required
+        The directory passed as `--cache-dir` to `crawl-deputy-data.py`.
+
+    Returns
+    -------
+    pages: dict of (str, bytes)
+        The content of each mandate page by its URL.
+    """
+    cache = HttpCache(cache_dir)
+    pages = {}
+    for metadata_file in sorted(Path(cache_dir).glob('*/*.json')):
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            url = json.load(f)['url']
+        if 'idm=' not in url:
+            continue
+        cached = cache.load(url)
+        if cached is not None:
+            pages[url] = cached.content
+    return pages
+
+
+def time_parser(parser_class, pages, start_year, repeat):
+    """Parses all the pages with the specified parser and measures the time.
+
+    Parameters
+    ----------
+    parser_class: type, required
+        The class of the parser.
+    pages: dict of (str, bytes), required
+        The content of each page by its URL.
+    start_year: int, required
+        The start year of the mandates.
+    repeat: int, required
+        The number of runs; the fastest one is reported.
+
+    Returns
+    -------
+    (seconds, results): tuple of (float, list of tuple)
+        The duration of the fastest run and the information parsed from each page.
+    """
+    fetcher = MemoryFetcher(pages)
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [
+            tuple(
+                parser_class(url, start_year, fetcher=fetcher).parse_page())
+            for url in pages
+        ]
+        seconds = time.perf_counter() - start
+        if (best is None) or (seconds < best):
+            best = seconds
+    return best, results
+
+
+def run(args):
+    pages = load_pages(args.cache_dir)
+    if len(pages) == 0:
+        logging.error("No mandate pages found in {}.".format(args.cache_dir))
+        sys.exit(1)
+    logging.info("Parsing {} mandate pages {} times.".format(
+        len(pages), args.repeat))
+    # The parsers log an info message for each affiliation.
+    logging.getLogger().setLevel(max(logging.WARNING, args.log_level_value))
+    old_seconds, old_results = time_parser(PerFieldMandateInfoParser, pages,
+                                           args.start_year, args.repeat)
+    new_seconds, new_results = time_parser(MandateInfoParser, pages,
+                                           args.start_year, args.repeat)
+    logging.getLogger().setLevel(args.log_level_value)
+    if old_results != new_results:
+        logging.error("The parsers returned different results.")
+        sys.exit(1)
+    for name, seconds in [('Per-field parsing', old_seconds),
+                          ('Single-pass parsing', new_seconds)]:
+        logging.info("{}: {:.3f} s, {:.2f} ms per page.".format(
+            name, seconds, 1000 * seconds / len(pages)))
+    logging.info("Speedup: {:.2f}x.".format(old_seconds / new_seconds))
+    logging.info("That's all folks!")
+
+
+def parse_arguments():
+    parser = ArgumentParser(
+        description='Benchmark the parsing of saved mandate pages.')
+    parser.add_argument(
+        '--cache-dir',
+        help="The cache directory of the crawler containing the mandate pages.",
+        required=True)
+    parser.add_argument(
+        '--start-year',
+        help="The start year of the mandates. Default is 2016.",
+        type=int,
+        default=2016)
+    parser.add_argument(
+        '--repeat',
+        help="The number of runs of each parser; the fastest one is reported. Default is 5.",
+        type=int,
+        default=5)
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help="The level of details to print when running.",
+        choices=['debug', 'info', 'warning', 'error', 'critical'],
+        default='info')
+    args = parser.parse_args()
+    args.log_level_value = getattr(logging, args.log_level.upper())
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=args.log_level_value)
+    run(args)
@@ -0,0 +1,140 @@
+"""Compares the time spent normalizing the text of session transcriptions by the previous and the current `StringFormatter`."""
+from argparse import ArgumentParser
+import logging
+import sys
+import time
+from pathlib import PurePosixPath
+from archives import iter_input_files
+from common import get_element_text, StringFormatter
+from common import DIACRITICS_TRANSLATIONS, ENTITY_REPLACEMENTS
+from parsing import SessionParser
+
+
+def normalize_per_pattern(value):
+    """Normalizes the string the way `StringFormatter.normalize` did before the patterns were fused into one regex.
+
+    Parameters
+    ----------
+    value: str, required
+        The string to normalize.
+
+    Returns
+    -------
+    normalized: str
+        The normalized string.
+    """
+    result = value.strip().translate(DIACRITICS_TRANSLATIONS)
+    for old, new in ENTITY_REPLACEMENTS.items():
+        result = result.replace(old, new)
+    return result
+
+
+def load_lines(directory):
+    """Loads the text of the paragraphs and of the table rows from the transcriptions in the directory.
+
+    Parameters
+    ----------
+    directory: str, required
+        The directory containing the HTML transcriptions, as given to `parse-sessions.py`.
+
+    Returns
+    -------
+    lines: list of list of str
+        The texts of each transcription.
+    """
+    lines = []
+    for input_file in iter_input_files(
+            directory,
+            lambda file_name: 'htm' in PurePosixPath(file_name).suffix.lower()):
+        html_root = SessionParser(input_file).html_root
+        lines.append(
+            [get_element_text(element) for element in html_root.iter('p', 'tr')])
+    return lines
+
+
+def measure(normalize_file, lines, repeat):
+    """Normalizes the lines of all the transcriptions and measures the time.
+
+    Parameters
+    ----------
+    normalize_file: callable, required
+        The function that receives the lines of a transcription and returns them normalized.
+    lines: list of list of str, required
+        The texts of each transcription.
+    repeat: int, required
+        The number of runs; the fastest one is reported.
+
+    Returns
+    -------
+    (seconds, results): tuple of (float, list of list of str)
+        The duration of the fastest run and the normalized lines.
+    """
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [normalize_file(file_lines) for file_lines in lines]
+        seconds = time.perf_counter() - start
+        if (best is None) or (seconds < best):
+            best = seconds
+    return best, results
+
+
+def run(args):
+    lines = load_lines(args.input_directory)
+    num_lines = sum(len(file_lines) for file_lines in lines)
+    if num_lines == 0:
+        logging.error("No transcriptions found in {}.".format(
+            args.input_directory))
+        sys.exit(1)
+    num_chars = sum(len(line) for file_lines in lines for line in file_lines)
+    logging.info(
+        "Normalizing {} lines ({} characters) from {} transcriptions {} times."
+        .format(num_lines, num_chars, len(lines), args.repeat))
+    formatter = StringFormatter()
+    variants = [
+        ('normalize (per pattern)',
+         lambda file_lines: [normalize_per_pattern(line) for line in file_lines]),
+        ('normalize (fused regex)',
+         lambda file_lines: [formatter.normalize(line) for line in file_lines]),
+        ('normalize_many', formatter.normalize_many),
+    ]
+    expected = None
+    for name, normalize_file in variants:
+        seconds, results = measure(normalize_file, lines, args.repeat)
+        if expected is None:
+            expected = results
+        elif results != expected:
+            logging.error("{} returned different results.".format(name))
+            sys.exit(1)
+        logging.info("{}: {:.1f} ms, {:.2f} us per line.".format(
+            name, 1000 * seconds, 1000000 * seconds / num_lines))
+    logging.info("That's all folks!")
+
+
+def parse_arguments():
+    parser = ArgumentParser(
+        description='Benchmark the normalization of the transcription text.')
+    parser.add_argument(
+        '-i',
+        '--input-directory',
+        help="The directory containing the HTML transcriptions.",
+        required=True)
+    parser.add_argument(
+        '--repeat',
+        help="The number of runs of each normalization; the fastest one is reported. Default is 5.",
+        type=int,
+        default=5)
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help="The level of details to print when running.",
+        choices=['debug', 'info', 'warning', 'error', 'critical'],
+        default='info')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=getattr(logging, args.log_level.upper()))
+    run(args)
@@ -1,9 +1,10 @@
 from common import Resources
 from xmlbuilder import RootXmlBuilder
+from speakerregistry import SpeakerRegistry
 import logging
 import argparse
-import pandas as pd
-import numpy as np
+import json
+import csv
 
 
 def build_id_char_replacement_map(replacements):
@@ -11,25 +12,95 @@ def build_id_char_replacement_map(replacements):
     return replacement_map
 
 
+def load_deputy_info(file_name):
+    import numpy as np
+    import pandas as pd
+    logging.info("Reading deputy info from {}.".format(file_name))
+    deputy_info = pd.read_csv(file_name)
+    deputy_info = deputy_info.replace(np.nan, '', regex=True)
+    return deputy_info
+
+
+def save_name_resolution_report(resolutions, file_name):
+    import pandas as pd
+    logging.info("Saving {} resolved and merged speaker ids to {}.".format(
+        len(resolutions), file_name))
+    report = pd.DataFrame(
+        resolutions,
+        columns=['speaker_id', 'name_key', 'score', 'method', 'person_id'])
+    report.to_csv(file_name, index=False)
+
+
+def load_organizations(file_name):
+    """Loads the distinct organization names in the order in which they appear in the file.
+
+    The file is read without pandas so that building the root from the speaker registry does not import it.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the CSV file containing the `organization` column.
+
+    Returns
+    -------
+    organizations: list of str
+        The distinct non-empty organization names.
+    """
+    logging.info("Reading organizations from {}.".format(file_name))
+    with open(file_name, 'rt', encoding='utf-8-sig', newline='') as f:
+        names = (row['organization'] for row in csv.DictReader(f))
+        return list(dict.fromkeys(name for name in names if name))
+
+
+def save_person_merge_log(merge_log, file_name):
+    logging.info("Saving the log of merged persons to {}.".format(file_name))
+    with open(file_name, 'wt', encoding='utf-8') as f:
+        json.dump(merge_log, f, ensure_ascii=False, indent=2)
+
+
 def run(args):
     logging.info("Building root file for the corpus.")
-    logging.info("Reading deputy info from {}.".format(args.deputy_info_file))
-    deputy_info = pd.read_csv(args.deputy_info_file)
-    deputy_info = deputy_info.replace(np.nan, '', regex=True)
-    logging.info("Reading organizations from {}.".format(
-        args.organizations_file))
-    organizations = pd.read_csv(args.organizations_file)
-    organizations = list(organizations.organization.unique())
+    registry = None
+    if args.registry_file is not None:
+        logging.info("Using speaker registry from {}.".format(
+            args.registry_file))
+        registry = SpeakerRegistry(args.registry_file)
+    deputy_info = None
+    if (registry is None) or args.refresh_registry or (
+            not registry.has_deputies()):
+        deputy_info = load_deputy_info(args.deputy_info_file)
+    organizations = load_organizations(args.organizations_file)
     logging.info("Building id chars replacement map")
     id_char_replacements = build_id_char_replacement_map(
         args.id_char_replacements)
+    resolution_threshold = None
+    if args.resolve_unknown_speakers:
+        resolution_threshold = args.resolution_threshold
     builder = RootXmlBuilder(args.template_file,
                              deputy_info,
                              organizations,
-                             id_char_replacements=id_char_replacements)
-    builder.build_corpus_root(args.corpus_dir,
-                              file_name=args.file_name,
-                              apply_postprocessing=args.apply_postprocessing)
+                             id_char_replacements=id_char_replacements,
+                             registry=registry,
+                             name_resolution_threshold=resolution_threshold)
+    if args.update:
+        builder.update_corpus_root(
+            args.corpus_dir,
+            file_name=args.file_name,
+            apply_postprocessing=args.apply_postprocessing,
+            deduplicate_persons=args.deduplicate_persons)
+    else:
+        builder.build_corpus_root(
+            args.corpus_dir,
+            file_name=args.file_name,
+            apply_postprocessing=args.apply_postprocessing,
+            deduplicate_persons=args.deduplicate_persons)
+    if args.deduplicate_persons:
+        save_person_merge_log(builder.person_merge_log, args.merge_log_file)
+    if args.resolve_unknown_speakers:
+        save_name_resolution_report(builder.name_resolution_report,
+                                    args.resolution_report_file)
+    if registry is not None:
+        registry.close()
     logging.info("That's all folks!")
 
 
@@ -65,6 +136,48 @@ def parse_arguments():
         "When supplied specifies that no postprocessing (i.e. correction of ids) should be applied. Default is False",
         dest='apply_postprocessing',
         action='store_false')
+    parser.add_argument(
+        '--no-deduplication',
+        help=
+        "When supplied specifies that duplicate entries of the persons list should not be merged. Default is False",
+        dest='deduplicate_persons',
+        action='store_false')
+    parser.add_argument(
+        '--merge-log-file',
+        help=
+        "The JSON file where to save the log of merged persons. Default is ./person-merges.json",
+        default='./person-merges.json')
+    parser.add_argument(
+        '--registry-file',
+        help=
+        "The SQLite file of the speaker registry. When supplied, deputy info is read from the registry if available.",
+        default=None)
+    parser.add_argument(
+        '--refresh-registry',
+        help=
+        "When supplied, reloads the deputy info into the speaker registry from the deputy info file.",
+        action='store_true')
+    parser.add_argument(
+        '--resolve-unknown-speakers',
+        help=
+        "When supplied, speakers that are not found in deputy info are matched to known deputies by similarity of their names, and speakers of the same deputy are merged into one person.",
+        action='store_true')
+    parser.add_argument(
+        '--resolution-threshold',
+        help=
+        "The minimum similarity score for matching unknown speakers to known deputies. Default is 0.85.",
+        type=float,
+        default=0.85)
+    parser.add_argument(
+        '--resolution-report-file',
+        help=
+        "The CSV file where to save the unknown speakers matched to known deputies and the speakers merged into the person of their deputy.",
+        default='./speaker-resolutions.csv')
+    parser.add_argument(
+        '--update',
+        help=
+        "When supplied, adds only the corpus files that are not yet included in the existing root file instead of rebuilding it.",
+        action='store_true')
     parser.add_argument(
         '-l',
         '--log-level',
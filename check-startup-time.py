@@ -0,0 +1,145 @@
+"""Checks the startup time of the command line scripts using the import time report of Python."""
+from argparse import ArgumentParser
+import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# The packages which take long to import and must be imported only by the code that uses them.
+HEAVY_PACKAGES = [
+    'nltk', 'babel', 'dateutil', 'conllu', 'requests', 'pandas', 'numpy'
+]
+
+ENTRY_POINTS = [
+    'parse-sessions.py', 'build-corpus-root.py', 'apply-corrections.py',
+    'apply-linguistic-annotation.py'
+]
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def parse_import_times(report):
+    """Parses the report printed by `python -X importtime`.
+
+    Parameters
+    ----------
+    report: str, required
+        The text printed to the standard error.
+
+    Returns
+    -------
+    (total_us, modules): tuple of (int, dict of (str, int))
+        The cumulative time of the top-level imports in microseconds,
+        and the cumulative time of each imported module.
+    """
+    total_us = 0
+    modules = {}
+    for line in report.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_us = int(match.group(2))
+        modules[match.group(4)] = cumulative_us
+        if len(match.group(3)) == 0:
+            total_us += cumulative_us
+    return total_us, modules
+
+
+def measure_startup(script, repeat):
+    """Runs the script with `--help` and measures the time spent on imports.
+
+    Parameters
+    ----------
+    script: pathlib.Path, required
+        The path of the script.
+    repeat: int, required
+        The number of runs; the fastest run is reported.
+
+    Returns
+    -------
+    (total_us, modules): tuple of (int, dict of (str, int))
+        The import time of the fastest run in microseconds and the modules it imported.
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime',
+             str(script), '--help'],
+            cwd=script.parent,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True)
+        if result.returncode != 0:
+            raise RuntimeError("Script {} failed: {}".format(
+                script, result.stderr.splitlines()[-1:]))
+        total_us, modules = parse_import_times(result.stderr)
+        if (best is None) or (total_us < best[0]):
+            best = (total_us, modules)
+    return best
+
+
+def run(args):
+    scripts_dir = Path(__file__).resolve().parent
+    failures = 0
+    for script_name in args.scripts:
+        total_us, modules = measure_startup(Path(scripts_dir, script_name),
+                                            args.repeat)
+        heavy = [
+            package for package in HEAVY_PACKAGES if package in modules
+        ]
+        total_ms = total_us / 1000
+        logging.info("{}: imports take {:.1f} ms.".format(
+            script_name, total_ms))
+        for name, cumulative_us in sorted(modules.items(),
+                                          key=lambda item: -item[1])[:5]:
+            logging.debug("    {}: {:.1f} ms".format(name,
+                                                     cumulative_us / 1000))
+        if len(heavy) > 0:
+            logging.error("{} imports {} at startup.".format(
+                script_name, ', '.join(heavy)))
+            failures += 1
+        if total_ms > args.max_import_time:
+            logging.error(
+                "{} imports take {:.1f} ms which is more than {} ms.".format(
+                    script_name, total_ms, args.max_import_time))
+            failures += 1
+    if failures > 0:
+        logging.error("Startup check failed with {} error(s).".format(failures))
+        sys.exit(1)
+    logging.info("That's all folks!")
+
+
+def parse_arguments():
+    parser = ArgumentParser(
+        description='Check the startup time of the command line scripts.')
+    parser.add_argument(
+        'scripts',
+        help="The scripts to check. Default is all the processing scripts.",
+        nargs='*',
+        default=ENTRY_POINTS)
+    parser.add_argument(
+        '--max-import-time',
+        help=
+        "The maximum time in milliseconds the imports of a script may take. Default is 150.",
+        type=float,
+        default=150)
+    parser.add_argument(
+        '--repeat',
+        help="The number of runs of each script; the fastest one is reported. Default is 5.",
+        type=int,
+        default=5)
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help="The level of details to print when running.",
+        choices=['debug', 'info', 'warning', 'error', 'critical'],
+        default='info')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=getattr(logging, args.log_level.upper()))
+    run(args)
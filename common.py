@@ -1,4 +1,12 @@
 import re
+import gzip
+import lzma
+from collections import namedtuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 NAME_REPLACEMENT_PATTERNS = [r'\s*-\s*', r'\s+']
 
@@ -40,6 +48,10 @@ def get_element_text(element):
     return text
 
 
+DeputyInfo = namedtuple("DeputyInfo",
+                        ['first_name', 'last_name', 'gender', 'image_url'])
+
+
 class OrganizationType:
     """Represents types of organizations to which deputies are affiliated.
     """
@@ -98,6 +110,45 @@ class Resources:
     President = "președinte"
 
 
+DIACRITICS_TRANSLATIONS = str.maketrans({
+    'þ': 'ț',
+    'º': 'ș',
+    'Þ': 'Ț',
+    'ã': 'ă',
+    'ª': 'Ș',
+    '\226': '\u2013',
+    'Ş': 'Ș',
+    'ş': 'ș',
+    'Ţ': 'Ț',
+    'ţ': 'ț'
+})
+
+ENTITY_REPLACEMENTS = {
+    '&Shorn;': 'Ș',
+    '&shorn;': 'ș',
+    '&Thorn;': 'Ț',
+    '&thorn;': 'ț',
+    '&Icirc;': 'Î',
+    '&icirc;': 'î',
+    '&atilde;': 'ă',
+    '&acirc;': 'â'
+}
+
+# Matches both the characters to translate and the entities to replace in a single pass.
+# Entities are ASCII only, so they never overlap with the characters to translate.
+NORMALIZATION_REGEX = re.compile('[{}]|{}'.format(
+    ''.join(chr(code) for code in DIACRITICS_TRANSLATIONS),
+    '|'.join(re.escape(entity) for entity in ENTITY_REPLACEMENTS)))
+
+NORMALIZATION_MAP = dict(
+    (chr(code), value) for code, value in DIACRITICS_TRANSLATIONS.items())
+NORMALIZATION_MAP.update(ENTITY_REPLACEMENTS)
+
+
+def _replace_match(match):
+    return NORMALIZATION_MAP[match.group(0)]
+
+
 class StringFormatter:
     """Formats the strings parsed from the session transcription.
     """
@@ -105,29 +156,8 @@ class StringFormatter:
     def __init__(self):
         """Creates a new instance of StringFormatter.
         """
-        self.translations = str.maketrans({
-            'þ': 'ț',
-            'º': 'ș',
-            'Þ': 'Ț',
-            'ã': 'ă',
-            'ª': 'Ș',
-            '\226': '\u2013',
-            'Ş': 'Ș',
-            'ş': 'ș',
-            'Ţ': 'Ț',
-            'ţ': 'ț'
-        })
-
-        self.replacements = {
-            '&Shorn;': 'Ș',
-            '&shorn;': 'ș',
-            '&Thorn;': 'Ț',
-            '&thorn;': 'ț',
-            '&Icirc;': 'Î',
-            '&icirc;': 'î',
-            '&atilde;': 'ă',
-            '&acirc;': 'â'
-        }
+        self.translations = DIACRITICS_TRANSLATIONS
+        self.replacements = ENTITY_REPLACEMENTS
 
     def to_single_line(self, value):
         """Removes line feed/carriage returns from given string.
@@ -148,7 +178,190 @@ class StringFormatter:
         value: str, required
             The string to normalize.
         """
-        result = value.strip().translate(self.translations)
-        for old, new in self.replacements.items():
-            result = result.replace(old, new)
-        return result
+        return NORMALIZATION_REGEX.sub(_replace_match, value.strip())
+
+    def normalize_many(self, values):
+        """Normalizes a list of strings translating diacritics and replacing entities in all of them at once.
+
+        Parameters
+        ----------
+        values: list of str, required
+            The strings to normalize.
+
+        Returns
+        -------
+        normalized: list of str
+            The normalized strings in the same order.
+        """
+        stripped = [value.strip() for value in values]
+        joined = '\0'.join(stripped)
+        if (len(stripped) < 2) or (joined.count('\0') != len(stripped) - 1):
+            # The separator occurs in the values, so they cannot be batched.
+            return [self.normalize(value) for value in stripped]
+        joined = NORMALIZATION_REGEX.sub(_replace_match, joined)
+        return joined.split('\0')
+
+
+# The suffixes of the compressed files for each supported codec.
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+
+# The compression levels trading ratio for throughput; the corpus stages are I/O bound
+# so the default levels of the command line tools are used.
+GZIP_LEVEL = 6
+XZ_PRESET = 6
+ZSTD_LEVEL = 3
+
+
+def get_available_compressions():
+    """Returns the names of the codecs that can be used to compress files.
+
+    Returns
+    -------
+    compressions: list of str
+        The names of the codecs; `zstd` is available only if the `zstandard` package is installed.
+    """
+    return [
+        name for name in COMPRESSION_SUFFIXES
+        if (name != 'zstd') or (zstandard is not None)
+    ]
+
+
+def get_compression(file_name):
+    """Infers the codec of the file from its suffix.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+
+    Returns
+    -------
+    compression: str
+        The name of the codec or None if the file is not compressed.
+    """
+    file_name = str(file_name)
+    for name, suffix in COMPRESSION_SUFFIXES.items():
+        if file_name.endswith(suffix):
+            return name
+    return None
+
+
+def strip_compression_suffix(file_name):
+    """Removes the suffix of the codec from the file name.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+
+    Returns
+    -------
+    file_name: str
+        The name of the file without the compression suffix.
+    """
+    file_name = str(file_name)
+    compression = get_compression(file_name)
+    if compression is None:
+        return file_name
+    return file_name[:-len(COMPRESSION_SUFFIXES[compression])]
+
+
+def add_compression_suffix(file_name, compression):
+    """Appends the suffix of the codec to the file name.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+    compression: str, required
+        The name of the codec or None for uncompressed files.
+
+    Returns
+    -------
+    file_name: str
+        The name of the file with the compression suffix.
+    """
+    file_name = str(file_name)
+    if compression is None:
+        return file_name
+    return file_name + COMPRESSION_SUFFIXES[compression]
+
+
+def has_suffix(file_name, suffix):
+    """Checks if the file name ends with the suffix, ignoring the compression suffix.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+    suffix: str, required
+        The suffix to check, e.g. `.ana.xml`.
+
+    Returns
+    -------
+    has_suffix: bool
+        True if the file name ends with the suffix; False otherwise.
+    """
+    return strip_compression_suffix(file_name).endswith(suffix)
+
+
+def open_compressed(file_name, mode='rb', compression='infer', encoding=None):
+    """Opens the file compressing or decompressing its contents transparently.
+
+    Parameters
+    ----------
+    file_name: str or pathlib.Path, required
+        The name of the file.
+    mode: str, optional
+        The mode in which to open the file. Default is `rb`.
+    compression: str, optional
+        The name of the codec or None for uncompressed files.
+        Default is `infer` which means that the codec is inferred from the suffix of the file name.
+    encoding: str, optional
+        The encoding of the file when opened in text mode. Default is None.
+
+    Returns
+    -------
+    file: file object
+        The file object reading or writing the uncompressed contents.
+    """
+    if compression == 'infer':
+        compression = get_compression(file_name)
+    if compression is None:
+        return open(file_name, mode, encoding=encoding)
+    if compression == 'gzip':
+        return gzip.open(file_name,
+                         mode,
+                         compresslevel=GZIP_LEVEL,
+                         encoding=encoding)
+    if compression == 'xz':
+        preset = XZ_PRESET if 'r' not in mode else None
+        return lzma.open(file_name, mode, preset=preset, encoding=encoding)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError(
+                "Cannot open [{}]: zstd requires the zstandard package.".
+                format(file_name))
+        return zstandard.open(
+            file_name,
+            mode,
+            cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL),
+            encoding=encoding)
+    raise ValueError("Unknown compression {}.".format(compression))
+
+
+def add_compression_arg(parser):
+    """Adds the argument specifying the codec of the output files to the parser.
+
+    Parameters
+    ----------
+    parser: argparse.ArgumentParser, required
+        The parser to which to add the argument.
+    """
+    parser.add_argument(
+        '--compress',
+        help="The codec used to compress the output files. " +
+        "Default is None which means the files are not compressed. " +
+        "The zstd codec requires the zstandard package.",
+        choices=get_available_compressions(),
+        default=None)
@@ -0,0 +1,248 @@
+"""Listing of the corpus files from the corpus directory and its year directories."""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import namedtuple
+from pathlib import Path
+from common import has_suffix
+
+CorpusListing = namedtuple(
+    'CorpusListing', ['component_files', 'annotated_files', 'conllu_files'])
+
+# The version of the cache format; caches with a different version are ignored.
+CACHE_VERSION = 2
+
+FILE_KINDS = ('component', 'annotated', 'conllu')
+
+# Directories modified more recently than this may still be changing within the
+# resolution of their timestamp, so their listing is not trusted on the next scan.
+RACY_INTERVAL_NS = 2 * 10**9
+
+# The names of the directories created by `parse-sessions.py --group-by-year`.
+YEAR_DIRECTORY_REGEX = re.compile(r'[0-9]{4}')
+
+
+def get_default_cache_file(corpus_dir):
+    """Builds the path of the file caching the listing of the corpus directory.
+
+    The cache is kept outside of the corpus so that saving it does not modify the corpus directory.
+
+    Parameters
+    ----------
+    corpus_dir: str or pathlib.Path, required
+        The path of the corpus directory.
+
+    Returns
+    -------
+    cache_file: pathlib.Path
+        The path of the cache file in the user cache directory.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(Path.home(), '.cache'))
+    key = hashlib.sha1(
+        os.path.abspath(corpus_dir).encode('utf-8')).hexdigest()
+    return Path(cache_home, 'parlamint-ro', 'corpus-{}.json'.format(key))
+
+
+def classify_file(file_name):
+    """Gets the kind of the corpus file from its name.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The name of the file; it may have a compression suffix.
+
+    Returns
+    -------
+    kind: str
+        One of `annotated`, `component` or `conllu`, or None if the file is not a corpus file.
+    """
+    if has_suffix(file_name, '.ana.xml'):
+        return 'annotated'
+    if has_suffix(file_name, '.xml'):
+        return 'component'
+    if has_suffix(file_name, '.conllu'):
+        return 'conllu'
+    return None
+
+
+class CorpusScanner:
+    """Lists the corpus files from the corpus directory and from its year directories.
+
+    Only the directories directly under the corpus directory whose name is a year are scanned;
+    other directories and symbolic links to directories are ignored.
+
+    The listing of each directory is cached together with the modification time of the directory,
+    both in memory and on disk, so only the directories in which files were added, removed or renamed
+    are read again.
+    """
+
+    def __init__(self, corpus_dir, use_cache=True, cache_file=None):
+        """Creates a new instance of CorpusScanner.
+
+        Parameters
+        ----------
+        corpus_dir: str or pathlib.Path, required
+            The path of the corpus directory.
+        use_cache: bool, optional
+            Specifies whether to load and save the cached listing. Default is True.
+        cache_file: str or pathlib.Path, optional
+            The path of the cache file. Default is None which means a file in the user cache directory.
+        """
+        self.corpus_dir = Path(corpus_dir)
+        self.use_cache = use_cache
+        self.cache_file = Path(cache_file) if cache_file is not None else \
+            get_default_cache_file(corpus_dir)
+        self.directories = None
+
+    def scan(self):
+        """Lists the corpus files; only the directories modified since the previous scan are read from disk.
+
+        Returns
+        -------
+        listing: CorpusListing
+            The paths of the component, annotated and CoNLL-U files, sorted by path.
+            The root files are listed among the component and annotated files.
+        """
+        cached = self.directories
+        if cached is None:
+            cached = self._load_cache() if self.use_cache else {}
+        directories = {}
+        num_read = self._scan_directory('.', cached, directories)
+        for name in directories['.']['dirs']:
+            num_read += self._scan_directory(name, cached, directories)
+        files = {kind: [] for kind in FILE_KINDS}
+        for relative_path in sorted(directories):
+            directory = Path(self.corpus_dir, relative_path)
+            for kind, names in directories[relative_path]['files'].items():
+                files[kind].extend(directory / name for name in names)
+        self.directories = directories
+        logging.info(
+            "Found {} component, {} annotated and {} CoNLL-U files in {} directories ({} read from disk)."
+            .format(len(files['component']), len(files['annotated']),
+                    len(files['conllu']), len(directories), num_read))
+        if self.use_cache and (num_read > 0
+                               or len(cached) != len(directories)):
+            self._save_cache(directories)
+        return CorpusListing(component_files=files['component'],
+                             annotated_files=files['annotated'],
+                             conllu_files=files['conllu'])
+
+    def _scan_directory(self, relative_path, cached, directories):
+        """Lists the corpus files of a directory, reusing the cached listing if the directory was not modified.
+
+        Parameters
+        ----------
+        relative_path: str, required
+            The path of the directory relative to the corpus directory.
+        cached: dict, required
+            The cached listings keyed by the relative paths of the directories.
+        directories: dict, required
+            The listings of the scanned directories; it is updated in place.
+
+        Returns
+        -------
+        num_read: int
+            1 if the directory was read from disk; 0 otherwise.
+        """
+        path = os.path.join(self.corpus_dir, relative_path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = cached.get(relative_path)
+        num_read = 0
+        if (entry is None) or (entry['mtime_ns'] != mtime_ns):
+            entry = self._read_directory(path,
+                                         mtime_ns,
+                                         list_year_dirs=relative_path == '.')
+            num_read = 1
+        directories[relative_path] = entry
+        return num_read
+
+    def _read_directory(self, path, mtime_ns, list_year_dirs):
+        """Reads the corpus files and the year directories of a directory using a single `os.scandir` call.
+
+        Parameters
+        ----------
+        path: str, required
+            The path of the directory.
+        mtime_ns: int, required
+            The modification time of the directory.
+        list_year_dirs: bool, required
+            Specifies whether to list the year directories; only the corpus directory contains them.
+
+        Returns
+        -------
+        entry: dict
+            The modification time of the directory, the names of the corpus files grouped by kind
+            and the names of the year directories.
+        """
+        files = {kind: [] for kind in FILE_KINDS}
+        dirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    is_year = YEAR_DIRECTORY_REGEX.fullmatch(entry.name)
+                    if list_year_dirs and (is_year is not None):
+                        dirs.append(entry.name)
+                    continue
+                kind = classify_file(entry.name)
+                if kind is not None:
+                    files[kind].append(entry.name)
+        if time.time_ns() - mtime_ns < RACY_INTERVAL_NS:
+            # The directory may change again without changing its timestamp.
+            mtime_ns = None
+        return {
+            'mtime_ns': mtime_ns,
+            'files': {kind: sorted(names)
+                      for kind, names in files.items()},
+            'dirs': sorted(dirs)
+        }
+
+    def _load_cache(self):
+        """Loads the cached listings of the directories.
+
+        Returns
+        -------
+        cached: dict
+            The cached listings keyed by the relative paths of the directories; empty if there is no valid cache.
+        """
+        try:
+            with open(self.cache_file, 'rt', encoding='utf-8') as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            logging.warning("Could not load corpus listing from {}: {}".format(
+                self.cache_file, ex))
+            return {}
+        if (cache.get('version') != CACHE_VERSION) or (cache.get(
+                'corpus_dir') != os.path.abspath(self.corpus_dir)):
+            return {}
+        return cache['directories']
+
+    def _save_cache(self, directories):
+        """Saves the listings of the directories to the cache file.
+
+        Parameters
+        ----------
+        directories: dict, required
+            The listings keyed by the relative paths of the directories.
+        """
+        cache = {
+            'version': CACHE_VERSION,
+            'corpus_dir': os.path.abspath(self.corpus_dir),
+            'directories': directories
+        }
+        temp_file = "{}.tmp".format(self.cache_file)
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, 'wt', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(temp_file, self.cache_file)
+        except OSError as ex:
+            logging.warning("Could not save corpus listing to {}: {}".format(
+                self.cache_file, ex))
@@ -1,25 +1,16 @@
 from argparse import ArgumentParser
-import requests
 import logging
 import re
-import time
-import random
 from lxml import etree, html
 import pandas as pd
 from common import get_element_text
 from common import OrganizationType
-from urllib.parse import parse_qs, urljoin, urlparse
-from collections import namedtuple
+from urllib.parse import urljoin, urlparse
 from datetime import date
-from common import Resources, StringFormatter
-
-
-class XPathStrings:
-    DeputiesTableBody = "//div[@class='grup-parlamentar-list grupuri-parlamentare-list']/table/tbody"
-    DeputyInfoDiv = "//div[@id='oldDiv']"
-    ProfilePic = "//div[@class='profile-pic-dep']/a"
-    InfoSections = "//div[@class='boxDep clearfix']"
-    DeputyName = "//div[@class='boxTitle']/h1"
+from common import Resources
+from crawling import CompiledXPaths, MandateInfoParser, RecordWriter
+from crawling import add_fetcher_args, build_fetcher
+from crawling import iter_concurrently, load_crawled_urls
 
 
 class MandateType:
@@ -27,278 +18,16 @@ class MandateType:
     Senator = 'senator'
 
 
-Affiliation = namedtuple('Affiliation',
-                         ['organization', 'start_date', 'end_date'])
-
-
-class MandateInfoParser:
-    """Parses the information from a page describing a deputy mandate.
-    """
-    def __init__(self, url, start_year, end_year=None):
-        """Creates a new instance of MandateInfoParser.
-
-        Parameters
-        ----------
-        url : str, required
-            The url of the term/mandate page.
-        start_year: int, required
-            The start year of the term/mandate.
-        end_year: int, optional
-            The end year of the term/mandate. Default is None which means that the term is ongoing.
-        """
-        self.url = url
-        self.start_year = start_year
-        self.end_year = end_year
-        self.date_regex = re.compile(r'([a-z]{3})\.\s+([0-9]{4})',
-                                     re.IGNORECASE)
-        self.month_map = {
-            'ian': 1,
-            'feb': 2,
-            'mar': 3,
-            'apr': 4,
-            'mai': 5,
-            'iun': 6,
-            'iul': 7,
-            'aug': 8,
-            'sep': 9,
-            'oct': 10,
-            'noi': 11,
-            'dec': 12
-        }
-        self.formatter = StringFormatter()
-        self.html_root = self._load_page(self.url)
-
-    def parse_deputy_id(self):
-        """Parses the id of the deputy in the underlying database.
-
-        Returns
-        -------
-        deputy_id: int
-            The id of the deputy.
-        """
-        if self.url is None:
-            logging.error("Url not set.")
-        url_parts = urlparse(self.url)
-        query_string = parse_qs(url_parts.query)
-        return int(query_string['idm'][0])
-
-    def parse_affiliations(self):
-        """Parses the affiliation for the current term.
-
-        Returns
-        -------
-        affiliations: iterable of Affiliation
-            The collection of affiliations for the current term.
-        """
-        logging.info("Parsing affiliations for page '{}'.".format(self.url))
-        affiliation_section = self._find_affiliations_section()
-        if affiliation_section is None:
-            logging.error(
-                "Could not find affiliations section for page '{}'.".format(
-                    self.url))
-            return []
-
-        title = self._get_affiliation_title(affiliation_section)
-        logging.info(
-            "Title of the affiliations section for page '{}' is: '{}'.".format(
-                self.url, title))
-        info_table = next(affiliation_section.iterdescendants(tag='table'))
-        affiliations = []
-        for row in info_table:
-            text = self.formatter.normalize(get_element_text(row))
-            affiliations.append(self._parse_affiliation(text))
-
-        return affiliations
-
-    def parse_names(self):
-        """Parses the first and last names of the deputy.
-
-        Returns
-        -------
-        (first_name, last_name): tuple of str
-            The tuple containing first and last names of the deputy.
-        """
-        name_element = self.html_root.xpath(XPathStrings.DeputyName)
-        if name_element is None:
-            logging.error(
-                "Could not find the element containing deputy name in page '{}'."
-                .format(self.url))
-            return None, None
-        name_element = name_element[0]
-        first_name_parts, last_name_parts = [], []
-        text = get_element_text(name_element)
-        text = self.formatter.normalize(text)
-        for part in text.split():
-            if part.isupper():
-                last_name_parts.append(part)
-            else:
-                first_name_parts.append(part)
-        return ' '.join(first_name_parts), ' '.join(last_name_parts)
-
-    def parse_profile_picture(self):
-        """Retrieves the URL of the profile picture.
-
-        Returns
-        -------
-        img_url: str
-            The URL of the profile pictrure if found; otherwise None.
-        """
-        anchor_element = self.html_root.xpath(XPathStrings.ProfilePic)
-        if anchor_element is None:
-            logging.warning(
-                "Could not parse the profile picture for page '{}'.".format(
-                    self.url))
-            return None
-        anchor_element = anchor_element[0]
-        return anchor_element.get('href')
-
-    def _find_affiliations_section(self):
-        """Iterates the HTML tree to find the section containing the affiliation info.
-
-        Returns
-        -------
-        affiliation_section: etree.Element
-            The HTML element containing affiliation info or None.
-        """
-        for elem in self.html_root.xpath(XPathStrings.InfoSections):
-            for heading in elem.iterdescendants(tag='h3'):
-                text = get_element_text(heading)
-                text = self.formatter.normalize(text)
-                if Resources.PoliticalParty in text or Resources.PoliticalGroup in text:
-                    return elem
-
-        logging.error(
-            "Could not find the affiliation section for page '{}'.".format(
-                self.url))
-        return None
-
-    def _parse_affiliation(self, text):
-        """Parses the organization name and dates for an affiliation period.
-
-        Parameters
-        ----------
-        text : str, required
-            The text from which to parse the affiliation info.
-
-        Returns
-        -------
-        affiliation : Affiliation
-            The named tuple containing affiliation info.
-        """
-        organization, dates = [], []
-        for p in text.split('-'):
-            p = p.strip()
-            # Search for a string in the format `mmm. yyyy'
-            # If found then the current segment is a date
-            # Otherwise it is part of the organization name
-            if self.date_regex.search(p):
-                dates.append(p)
-            else:
-                organization.append(p)
-
-        organization_name = '-'.join(organization)
-        start_date, end_date = self._parse_affiliation_dates(dates)
-        affiliation = Affiliation(organization=organization_name,
-                                  start_date=start_date,
-                                  end_date=end_date)
-        return affiliation
-
-    def _parse_affiliation_dates(self, date_strings):
-        """Returns the start and end date from the provided parameters.
-
-        Parameters
-        ----------
-        date_strings: iterable of str
-
-        Returns
-        -------
-        (start_date, end_date): tuple of str
-            The start and end dates of the affiliation in the format yyyy[-mm], i.e. the month part is optional.
-            End date may be None meaning that the mandate is ongoing.
-        """
-        start_date = str(self.start_year)
-        end_date = None
-        if self.end_year is not None:
-            end_date = str(self.end_year)
-        for date_str in date_strings:
-            if Resources.AffiliationStartDateMark in date_str:
-                start_date = self._parse_date(date_str)
-            else:
-                end_date = self._parse_date(date_str)
-
-        return start_date, end_date
-
-    def _parse_date(self, date_str):
-        """Parses the date from the provided string.
-
-        Parameters
-        ----------
-        date_str: str
-            The string containing a start/end date of the affiliation.
-
-        Returns
-        -------
-        dt: str
-            The date parsed from the provided string or None.
-        """
-        logging.info(
-            "Parsing affiliation date from string '{}'.".format(date_str))
-        match = self.date_regex.search(date_str)
-        if match is None:
-            logging.info("Date regex did not match the provided string.")
-            return None
-
-        month = match.group(1).lower().strip('.')
-        year = int(match.group(2))
-        logging.info(
-            "The following date parts were found: month={}, year={}.".format(
-                month, year))
-        return '-'.join([year, self.month_map[month]])
-
-    def _get_affiliation_title(self, affiliation):
-        """Returns the title of affiliation section.
-
-        Parameters
-        ----------
-        affiliation :  etree.ElementTreee
-            The HTML element containing the affiliation info.
-
-        Returns
-        -------
-        title : str
-            The title of the affiliation section or None.
-        """
-        h3 = next(affiliation.iterdescendants(tag='h3'))
-        if h3 is None:
-            logging.error(
-                "Could not parse the title of the affiliations section for page '{}'."
-                .format(self.url))
-            return None
-        title = get_element_text(h3)
-        return title.replace(':', '').strip()
-
-    def _load_page(self, url):
-        """Retrieves and parses the html of the page into a html element.
-
-        Parameters
-        ----------
-        url : str, required
-            The URL of the page to load.
-
-        Returns
-        -------
-        html_root : etree.Element
-            The root element of the page.
-        """
-        response = requests.get(url)
-        html_root = html.fromstring(response.content)
-        return html_root
+DEPUTY_INFO_COLUMNS = [
+    'deputy_id', 'first_name', 'last_name', 'profile_picture', 'organization',
+    'acronym', 'start_date', 'end_date', 'url'
+]
 
 
 class DeputyAffiliationCrawler:
     """Iterates over the list of deputy mandate records and scrapps deputy info from pages.
     """
-    def __init__(self, base_url, data_frame, max_sleep_interval=5):
+    def __init__(self, base_url, data_frame, fetcher, max_workers=4):
         """Creates a new instance of DeputyAffiliationScrapper.
 
         Parameters
@@ -307,55 +36,68 @@ class DeputyAffiliationCrawler:
             The base URL from which to create URLs for mandate pages.
         data_frame : pandas.DataFrame, required
             The data frame containing the links to each mandate page.
-        max_sleep_interval: int, optional
-            The maximum interval to sleep between the requests.
+        fetcher: HttpFetcher, required
+            The fetcher which retrieves the pages and limits the rate of requests.
+        max_workers: int, optional
+            The maximum number of pages retrieved concurrently. Default is 4.
         """
         self.base_url = base_url
         self.data_frame = data_frame
+        self.fetcher = fetcher
+        self.max_workers = max_workers
         self.org_name_regex = re.compile(r"(([A-Z]+\s+)-)(.+)", re.MULTILINE)
-        self.max_sleep_interval = max_sleep_interval
-        self.deputy_records = {}
 
-    @property
-    def deputy_info(self):
-        """Returns a pandas.DataFrame containing the deputy records.
-        """
-        return pd.DataFrame.from_dict(self.deputy_records)
-
-    def fetch_data(self, save_records=None):
+    def fetch_data(self, record_writer, crawled_urls=None):
         """Crawls the deputy and organization info from the links in the data frame.
 
         Parameters
         ----------
-        save_records: callback, optional
-            A callback method which receives a data frame of the records as the parameter and should write it to disk.
+        record_writer: RecordWriter, required
+            The writer which appends the records to the output file.
+        crawled_urls: set of str, optional
+            The URLs of the pages that were already crawled and should be skipped.
+            Default is None which means all pages are crawled.
         """
         logging.info("Start crawling deputy and organizations info.")
-        should_save = False
-        for row in self.data_frame.itertuples():
-            sleep_interval = random.randint(1, self.max_sleep_interval)
-            logging.info(
-                "Sleeping for {} seconds before sending the request.".format(
-                    sleep_interval))
-            time.sleep(sleep_interval)
-            url = urljoin(self.base_url, row.period_link)
-            try:
-                self._fetch_records(url, row.period)
-            except Exception as ex:
-                logging.error(
-                    "Could not parse mandate info from page {}.".format(url))
-                logging.error(ex)
-                self._add_record(-1, None, None, None, None, None, None, None,
-                                 url)
-                should_save = True
-            should_save = should_save or (row.Index % 10 == 0)
-            if should_save and (save_records is not None):
-                logging.info("Saving records.")
-                save_records(self.deputy_info)
-                should_save = False
+        rows = self.data_frame.itertuples()
+        if crawled_urls is not None:
+            rows = [
+                row for row in rows
+                if urljoin(self.base_url, row.period_link) not in crawled_urls
+            ]
+            logging.info("Skipping {} crawled pages.".format(
+                len(self.data_frame) - len(rows)))
+        results = iter_concurrently(self._try_fetch_records, rows,
+                                    self.max_workers)
+        for records in results:
+            for record in records:
+                record_writer.write(record)
 
         logging.info("Crawling finished.")
 
+    def _try_fetch_records(self, row):
+        """Loads the deputy info records of a row from the data frame and captures the errors.
+
+        Parameters
+        ----------
+        row: namedtuple, required
+            The row of the data frame containing the link to the mandate page.
+
+        Returns
+        -------
+        records: list of tuple
+            The records loaded from the page of the row.
+            If the page could not be parsed the list contains a single failure record with deputy id -1.
+        """
+        url = urljoin(self.base_url, row.period_link)
+        try:
+            return self._fetch_records(url, row.period)
+        except Exception as ex:
+            logging.error(
+                "Could not parse mandate info from page {}.".format(url))
+            logging.error(ex)
+            return [(-1, None, None, None, None, None, None, None, url)]
+
     def _fetch_records(self, url, period):
         """Loads the deputy info records from the specified url and period.
 
@@ -365,69 +107,32 @@ class DeputyAffiliationCrawler:
             The URL of the page from which to retrieve records.
         period: str, required
             The period string containing start and end year of a mandate.
+
+        Returns
+        -------
+        records: list of tuple
+            The values of the records in the order of `DEPUTY_INFO_COLUMNS`.
         """
         start_year, end_year = self._parse_mandate_period(period)
         if (end_year is not None) and (end_year < 2000):
             logging.info("Skipping period before 2000.")
-            return
+            return []
 
         logging.info(
             "Parsing mandate info from URL {} with start year={}, end year={}."
             .format(url, start_year, end_year))
-        parser = MandateInfoParser(url, start_year, end_year)
-        deputy_id = parser.parse_deputy_id()
-        first_name, last_name = parser.parse_names()
-        profile_pic = parser.parse_profile_picture()
-        for affiliation_period in parser.parse_affiliations():
+        parser = MandateInfoParser(url, start_year, end_year, self.fetcher)
+        info = parser.parse_page()
+        records = []
+        for affiliation_period in info.affiliations:
             org_name, acronym = self._split_organization_name(
                 affiliation_period.organization)
-            self._add_record(deputy_id, first_name, last_name, profile_pic,
-                             org_name, acronym, affiliation_period.start_date,
-                             affiliation_period.end_date, url)
-
-    def _add_record(self, deputy_id, first_name, last_name, profile_picture,
-                    organization, acronym, start_date, end_date, url):
-        """Adds a records to the records collection.
-
-        Parameters:
-        deputy_id: int, required
-            The id of the deputy.
-        first_name: str, required
-            The first name of the deputy.
-        last_name: str, required
-            The last name of the deputy.
-        profile_picture: str, required
-            The URL of the profile picture.
-        organization: str, required
-            The name of the organization to which deputy is affiliated.
-        acronym: str, required
-            The acronym of the organization.
-        start_date: str, required
-            The (partial) date of when the affiliation started.
-        end_date: str, required
-            The (partial) end date of when the affiliation ended. None means deputy is still affiliated.
-        url: str, required
-            The URL of the page from where the record was parsed.
-        """
-        if len(self.deputy_records) == 0:
-            self.deputy_records['deputy_id'] = []
-            self.deputy_records['first_name'] = []
-            self.deputy_records['last_name'] = []
-            self.deputy_records['profile_picture'] = []
-            self.deputy_records['organization'] = []
-            self.deputy_records['acronym'] = []
-            self.deputy_records['start_date'] = []
-            self.deputy_records['end_date'] = []
-            self.deputy_records['url'] = []
-        self.deputy_records['deputy_id'].append(deputy_id)
-        self.deputy_records['first_name'].append(first_name)
-        self.deputy_records['last_name'].append(last_name)
-        self.deputy_records['profile_picture'].append(profile_picture)
-        self.deputy_records['organization'].append(organization)
-        self.deputy_records['acronym'].append(acronym)
-        self.deputy_records['start_date'].append(start_date)
-        self.deputy_records['end_date'].append(end_date)
-        self.deputy_records['url'].append(url)
+            records.append(
+                (info.deputy_id, info.first_name, info.last_name,
+                 info.profile_picture, org_name, acronym,
+                 affiliation_period.start_date, affiliation_period.end_date,
+                 url))
+        return records
 
     def _split_organization_name(self, organization_name):
         """Splits the organization name into a tuple containing the name and the acronym.
@@ -542,9 +247,14 @@ def get_base_url(url):
 
 
 def run(args):
-    start_page = requests.get(args.start_url)
-    page = html.fromstring(start_page.content)
-    tbl = page.xpath(XPathStrings.DeputiesTableBody)
+    with build_fetcher(args) as fetcher:
+        crawl(args, fetcher)
+    logging.info("That's all folks!")
+
+
+def crawl(args, fetcher):
+    page = html.fromstring(fetcher.get(args.start_url))
+    tbl = CompiledXPaths.DeputiesTableBody(page)
 
     if len(tbl) != 1:
         logging.error("Could not parse deputies table.")
@@ -557,13 +267,15 @@ def run(args):
     df.to_csv(args.deputy_list_file)
 
     base_url = get_base_url(args.start_url)
-    crawler = DeputyAffiliationCrawler(base_url, df)
-    crawler.fetch_data(lambda rec: rec.to_csv(args.deputy_info_file))
-    logging.info("Saving data to disk.")
-    deputy_info_df = crawler.deputy_info
-    deputy_info_df.to_csv(args.deputy_info_file)
+    crawler = DeputyAffiliationCrawler(base_url, df, fetcher,
+                                       args.max_workers)
+    crawled_urls = None
+    if args.resume:
+        crawled_urls = load_crawled_urls(args.deputy_info_file, 'deputy_id')
+    with RecordWriter(args.deputy_info_file, DEPUTY_INFO_COLUMNS,
+                      args.resume) as writer:
+        crawler.fetch_data(writer, crawled_urls)
     logging.info("Deputy info saved to {}.".format(args.deputy_info_file))
-    logging.info("That's all folks!")
 
 
 def parse_arguments():
@@ -580,6 +292,11 @@ def parse_arguments():
         '--deputy-info-file',
         help="The path of the CSV file where to save deputy info.",
         default='./deputy-info.csv')
+    parser.add_argument(
+        '--resume',
+        help="Append to the deputy info file and skip the pages already present in it.",
+        action='store_true')
+    add_fetcher_args(parser)
     parser.add_argument(
         '-l',
         '--log-level',
@@ -1,16 +1,33 @@
+from argparse import ArgumentParser
+import logging
 import pandas as pd
-import requests
 from urllib.parse import urljoin
-from lxml import etree, html
-from common import Resources, StringFormatter
-from common import get_element_text
+from crawling import MandateInfoParser, RecordWriter
+from crawling import add_fetcher_args, build_fetcher
+from crawling import iter_concurrently, load_crawled_urls
 
+NAMES_COLUMNS = ['first_name', 'last_name', 'gender', 'image_url', 'url']
 
-def load_deputy_list(file_name='./deputy-list.csv'):
+MALE_SPECIFIC = ['HORIA', 'MIRCEA', 'ATTILA']
+FEMALE_SPECIFIC = ['CARMEN']
+
+
+def load_deputy_list(file_name):
+    """Loads the list of deputies removing the duplicate names.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the CSV file containing the deputy list.
+
+    Returns
+    -------
+    deputy_list: pandas.DataFrame
+        The deputy list with one row for each name.
+    """
     df = pd.read_csv(file_name)
     df = df.drop_duplicates(subset=['name'])
-
-    print(df)
+    logging.info("Loaded {} deputies from {}.".format(len(df), file_name))
     return df
 
 
@@ -21,10 +38,6 @@ def split_name(name_parts):
             yield subpart.strip().upper()
 
 
-MALE_SPECIFIC = ['HORIA', 'MIRCEA', 'ATTILA']
-FEMALE_SPECIFIC = ['CARMEN']
-
-
 def get_gender(name_parts):
     for part in split_name(name_parts):
         if part in FEMALE_SPECIFIC:
@@ -36,67 +49,138 @@ def get_gender(name_parts):
     return 'M'
 
 
-def parse_names(html_root):
-    formatter = StringFormatter()
-
-    name_element = html_root.xpath(DEPUTY_NAME_XPATH)
-    name_element = name_element[0]
-    first_name_parts, last_name_parts = [], []
-    text = get_element_text(name_element)
-    text = formatter.normalize(text)
-    for part in text.split():
-        if part.isupper():
-            last_name_parts.append(part)
-        else:
-            first_name_parts.append(part)
-    return ' '.join(first_name_parts), ' '.join(last_name_parts), get_gender(
-        first_name_parts)
-
-
-def parse_profile_picture(html_root, base_url):
-    img = html_root.xpath(PROFILE_PICTURE_XPATH)
-    if (img is None) or (len(img) == 0):
-        return None
-    for i in img:
-        src = i.get('src')
-        if src is not None:
-            return urljoin(base_url, src)
-
-    return None
-
-
-def save_records(records, file_name='deputy-names-and-gender.csv'):
-    data = pd.DataFrame.from_dict(records)
-    data.to_csv(file_name)
-
-
-BASE_URL = 'http://www.cdep.ro'
-DEPUTY_NAME_XPATH = "//div[@class='boxTitle']/h1"
-PROFILE_PICTURE_XPATH = "//div[@class='profile-pic-dep']/*/img"
-df = load_deputy_list()
-records = {'first_name': [], 'last_name': [], 'gender': [], 'image_url': []}
-failed_urls = {'url': []}
-count = 0
-for row in df.itertuples():
-    url = urljoin(BASE_URL, row.period_link)
-    print("Request [{}/{}]. Loading data from URL {}.".format(
-        count, len(df), url))
-    try:
-        response = requests.get(url)
-        html_root = html.fromstring(response.content)
-        first_name, last_name, gender = parse_names(html_root)
-        records['first_name'].append(first_name)
-        records['last_name'].append(last_name)
-        records['gender'].append(gender)
-        records['image_url'].append(parse_profile_picture(html_root, BASE_URL))
-        count = count + 1
-        if count % 10 == 0:
-            save_records(records)
-    except Exception:
-        print("Could not parse data from {}.".format(url))
-        failed_urls['url'].append(url)
-        save_records(failed_urls, 'failed-urls.csv')
-
-data = pd.DataFrame.from_dict(records)
-data.to_csv("deputy-names-and-gender.csv")
-print("Done.")
+class DeputyNamesCrawler:
+    """Iterates over the list of deputies and scraps their names, gender and profile picture.
+    """
+
+    def __init__(self, base_url, data_frame, fetcher, max_workers=4):
+        """Creates a new instance of DeputyNamesCrawler.
+
+        Parameters
+        ----------
+        base_url : str, required
+            The base URL from which to create URLs for mandate pages.
+        data_frame : pandas.DataFrame, required
+            The data frame containing the links to each mandate page.
+        fetcher: HttpFetcher, required
+            The fetcher which retrieves the pages and limits the rate of requests.
+        max_workers: int, optional
+            The maximum number of pages retrieved concurrently. Default is 4.
+        """
+        self.base_url = base_url
+        self.data_frame = data_frame
+        self.fetcher = fetcher
+        self.max_workers = max_workers
+
+    def fetch_data(self, record_writer, failure_writer, crawled_urls=None):
+        """Crawls the names and gender of deputies from the links in the data frame.
+
+        Parameters
+        ----------
+        record_writer: RecordWriter, required
+            The writer which appends the records to the output file.
+        failure_writer: RecordWriter, required
+            The writer which appends the URLs of the pages that could not be parsed.
+        crawled_urls: set of str, optional
+            The URLs of the pages that were already crawled and should be skipped.
+            Default is None which means all pages are crawled.
+        """
+        logging.info("Start crawling deputy names and gender.")
+        urls = [
+            urljoin(self.base_url, row.period_link)
+            for row in self.data_frame.itertuples()
+        ]
+        if crawled_urls is not None:
+            urls = [url for url in urls if url not in crawled_urls]
+            logging.info("Skipping {} crawled pages.".format(
+                len(self.data_frame) - len(urls)))
+        results = iter_concurrently(self._try_fetch_record, urls,
+                                    self.max_workers)
+        for url, record in results:
+            if record is None:
+                failure_writer.write([url])
+            else:
+                record_writer.write(record)
+        logging.info("Crawling finished.")
+
+    def _try_fetch_record(self, url):
+        """Loads the record of the deputy from the specified URL and captures the errors.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the mandate page.
+
+        Returns
+        -------
+        (url, record): tuple of (str, list)
+            The URL of the page and the values of the record in the order of `NAMES_COLUMNS`,
+            or None if the page could not be parsed.
+        """
+        try:
+            parser = MandateInfoParser(url, None, fetcher=self.fetcher)
+            first_name, last_name = parser.parse_names()
+            gender = get_gender(first_name.split())
+            image_url = parser.parse_profile_picture()
+            return url, [first_name, last_name, gender, image_url, url]
+        except Exception as ex:
+            logging.error("Could not parse data from {}.".format(url))
+            logging.error(ex)
+            return url, None
+
+
+def run(args):
+    df = load_deputy_list(args.deputy_list_file)
+    crawled_urls = None
+    if args.resume:
+        crawled_urls = load_crawled_urls(args.output_file)
+    with build_fetcher(args) as fetcher, \
+            RecordWriter(args.output_file, NAMES_COLUMNS,
+                         args.resume) as record_writer, \
+            RecordWriter(args.failed_urls_file, ['url'],
+                         args.resume) as failure_writer:
+        crawler = DeputyNamesCrawler(args.base_url, df, fetcher,
+                                     args.max_workers)
+        crawler.fetch_data(record_writer, failure_writer, crawled_urls)
+    logging.info("Deputy names and gender saved to {}.".format(
+        args.output_file))
+    logging.info("That's all folks!")
+
+
+def parse_arguments():
+    parser = ArgumentParser(description='Crawl deputy names and gender')
+    parser.add_argument(
+        '--deputy-list-file',
+        help="The path of the CSV file containing the deputy list.",
+        default="./deputy-list.csv")
+    parser.add_argument(
+        '--output-file',
+        help="The path of the CSV file where to save the names and gender.",
+        default="./deputy-names-and-gender.csv")
+    parser.add_argument(
+        '--failed-urls-file',
+        help="The path of the CSV file where to save the URLs that could not be parsed.",
+        default="./failed-urls.csv")
+    parser.add_argument(
+        '--base-url',
+        help="The base URL of the mandate pages. Default is http://www.cdep.ro",
+        default="http://www.cdep.ro")
+    parser.add_argument(
+        '--resume',
+        help="Append to the output file and skip the pages already present in it.",
+        action='store_true')
+    add_fetcher_args(parser)
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help="The level of details to print when running.",
+        choices=['debug', 'info', 'warning', 'error', 'critical'],
+        default='info')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=getattr(logging, args.log_level.upper()))
+    run(args)
@@ -0,0 +1,927 @@
+"""Polite, concurrent retrieval and parsing of the pages describing deputy mandates."""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urljoin, urlparse
+import requests
+from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from common import get_element_text
+from common import Resources, StringFormatter
+
+# The status codes of the responses which are retried.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket which limits the rate of requests.
+    """
+
+    def __init__(self,
+                 rate,
+                 capacity=1,
+                 clock=time.monotonic,
+                 sleep=time.sleep):
+        """Creates a new instance of TokenBucket.
+
+        Parameters
+        ----------
+        rate: float, required
+            The number of tokens added to the bucket each second.
+        capacity: int, optional
+            The maximum number of tokens in the bucket, i.e. the size of a burst.
+            Default is 1.
+        clock: callable, optional
+            The function returning the current time in seconds. Default is `time.monotonic`.
+        sleep: callable, optional
+            The function waiting for the specified number of seconds. Default is `time.sleep`.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.last_refill = self.clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Waits until a token is available and takes it from the bucket.
+        """
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens = self.tokens - 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            self.sleep(wait_time)
+
+
+CachedResponse = namedtuple('CachedResponse', ['content', 'metadata'])
+
+
+class HttpCache:
+    """Stores the content of retrieved pages on disk together with the headers used to revalidate them.
+
+    Each page is stored in two files named after the SHA-256 hash of its URL:
+    a `.body` file with the content and a `.json` file with the metadata.
+    """
+
+    def __init__(self, cache_dir):
+        """Creates a new instance of HttpCache.
+
+        Parameters
+        ----------
+        cache_dir: str, required
+            The directory where to store the pages. It will be created if it does not exist.
+        """
+        self.cache_dir = str(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, url):
+        """Loads the page with the specified URL from cache.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the page.
+
+        Returns
+        -------
+        response: CachedResponse
+            The content and metadata of the page if found; None otherwise.
+        """
+        body_file, metadata_file = self._get_file_names(url)
+        if not (os.path.exists(body_file) and os.path.exists(metadata_file)):
+            return None
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        with open(body_file, 'rb') as f:
+            content = f.read()
+        return CachedResponse(content, metadata)
+
+    def save(self, url, content, headers):
+        """Saves the page into cache.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the page.
+        content: bytes, required
+            The content of the page.
+        headers: dict, required
+            The headers of the response.
+        """
+        body_file, metadata_file = self._get_file_names(url)
+        metadata = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+            'fetched_at': time.time()
+        }
+        # The metadata is written last so that a page without metadata is treated as missing.
+        self._write_file(body_file, content)
+        self._write_file(metadata_file,
+                         json.dumps(metadata, indent=2).encode('utf-8'))
+
+    def build_validators(self, cached):
+        """Builds the headers of a conditional request from the metadata of the cached page.
+
+        Parameters
+        ----------
+        cached: CachedResponse, required
+            The cached page; may be None.
+
+        Returns
+        -------
+        headers: dict
+            The `If-None-Match` and `If-Modified-Since` headers if the server provided validators.
+        """
+        headers = {}
+        if cached is None:
+            return headers
+        if cached.metadata.get('etag') is not None:
+            headers['If-None-Match'] = cached.metadata['etag']
+        if cached.metadata.get('last_modified') is not None:
+            headers['If-Modified-Since'] = cached.metadata['last_modified']
+        return headers
+
+    def _get_file_names(self, url):
+        """Returns the names of the content and metadata files of the page.
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base_name = os.path.join(self.cache_dir, key[:2], key)
+        return base_name + '.body', base_name + '.json'
+
+    def _write_file(self, file_name, content):
+        """Writes the content to a temporary file and moves it over the specified file.
+        """
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        temp_file = "{}.{}.tmp".format(file_name, threading.get_ident())
+        with open(temp_file, 'wb') as f:
+            f.write(content)
+        os.replace(temp_file, file_name)
+
+
+class HttpFetcher:
+    """Retrieves web pages over a pooled session, limiting the rate of requests for each host.
+    """
+
+    def __init__(self,
+                 requests_per_second=1.0,
+                 max_connections=4,
+                 timeout=30,
+                 max_retries=3,
+                 cache=None,
+                 offline=False,
+                 backoff_factor=1,
+                 max_backoff=60):
+        """Creates a new instance of HttpFetcher.
+
+        Parameters
+        ----------
+        requests_per_second: float, optional
+            The maximum number of requests sent to a host each second. Default is 1.
+        max_connections: int, optional
+            The number of connections kept open for each host. Default is 4.
+        timeout: float, optional
+            The number of seconds to wait for the server to respond. Default is 30.
+        max_retries: int, optional
+            The number of times to retry a request that failed
+            because of a connection error or a server error. Default is 3.
+        cache: HttpCache, optional
+            The cache of retrieved pages. Default is None which means pages are not cached.
+        offline: bool, optional
+            Specifies whether to serve the pages only from cache without sending any request.
+            Default is False.
+        backoff_factor: float, optional
+            The number of seconds to wait before the first retry; the wait doubles with each retry.
+            Default is 1.
+        max_backoff: float, optional
+            The maximum number of seconds to wait before a retry,
+            including the wait requested by the `Retry-After` header. Default is 60.
+        """
+        if offline and (cache is None):
+            raise ValueError("Offline mode requires a cache.")
+        self.cache = cache
+        self.offline = offline
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.buckets = {}
+        self.lock = threading.Lock()
+        # The retries are sent by `_send_request` so that each of them waits for the rate limit.
+        adapter = HTTPAdapter(pool_connections=max_connections,
+                              pool_maxsize=max_connections,
+                              max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the connections of the session."""
+        self.session.close()
+
+    def get(self, url):
+        """Retrieves the content of the page at the specified URL.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the page.
+
+        Returns
+        -------
+        content: bytes
+            The content of the page.
+        """
+        cached = self.cache.load(url) if self.cache is not None else None
+        if self.offline:
+            if cached is None:
+                raise ValueError("Page {} is not in cache.".format(url))
+            return cached.content
+        headers = {}
+        if self.cache is not None:
+            headers = self.cache.build_validators(cached)
+        response = self._send_request(url, headers)
+        if (response.status_code == 304) and (cached is not None):
+            logging.debug("Page {} was not modified.".format(url))
+            return cached.content
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.save(url, response.content, response.headers)
+        return response.content
+
+    def _send_request(self, url, headers):
+        """Sends the request, retrying it after connection errors and server errors.
+
+        Each attempt takes a token from the bucket of the host, so the retries are rate limited too.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the page.
+        headers: dict, required
+            The headers of the request.
+
+        Returns
+        -------
+        response: requests.Response
+            The response of the last attempt.
+        """
+        bucket = self._get_bucket(url)
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self._get_retry_delay(attempt, response))
+            bucket.acquire()
+            logging.debug("Retrieving page {}.".format(url))
+            response = None
+            try:
+                response = self.session.get(url,
+                                            headers=headers,
+                                            timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as ex:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning("Retrying page {} after error: {}".format(
+                    url, ex))
+                continue
+            if response.status_code not in RETRY_STATUS_CODES:
+                break
+            logging.warning("Retrying page {} after status {}.".format(
+                url, response.status_code))
+        return response
+
+    def _get_retry_delay(self, attempt, response):
+        """Computes the number of seconds to wait before retrying a request.
+
+        Parameters
+        ----------
+        attempt: int, required
+            The number of the retry, starting from 1.
+        response: requests.Response, required
+            The response of the previous attempt; None if the request failed with an error.
+
+        Returns
+        -------
+        delay: float
+            The delay requested by the `Retry-After` header if present; otherwise the exponential backoff.
+            The delay is at most `max_backoff` seconds.
+        """
+        delay = self.backoff_factor * (2**(attempt - 1))
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = float(retry_after)
+        return min(delay, self.max_backoff)
+
+    def _get_bucket(self, url):
+        """Returns the token bucket of the host from the provided URL.
+
+        Parameters
+        ----------
+        url: str, required
+            The URL of the request.
+
+        Returns
+        -------
+        bucket: TokenBucket
+            The token bucket which limits the requests to the host.
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.requests_per_second)
+            return self.buckets[host]
+
+
+class RecordWriter:
+    """Appends records to a CSV file and periodically forces them to disk.
+    """
+
+    def __init__(self, file_name, columns, append=False, sync_interval=10):
+        """Creates a new instance of RecordWriter.
+
+        Parameters
+        ----------
+        file_name: str, required
+            The path of the CSV file.
+        columns: list of str, required
+            The names of the columns.
+        append: bool, optional
+            Specifies whether to append the records to an existing file or to overwrite it.
+            Default is False.
+        sync_interval: int, optional
+            The number of records after which the file is synced to disk. Default is 10.
+        """
+        self.file_name = str(file_name)
+        self.columns = columns
+        self.sync_interval = sync_interval
+        self.num_unsynced = 0
+        is_new = (not append) or (not os.path.exists(self.file_name)) or (
+            os.path.getsize(self.file_name) == 0)
+        self.file = open(self.file_name,
+                         'w' if not append else 'a',
+                         encoding='utf-8',
+                         newline='')
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record):
+        """Appends the record to the file.
+
+        Parameters
+        ----------
+        record: sequence, required
+            The values of the record in the order of the columns.
+        """
+        self.writer.writerow(record)
+        self.num_unsynced = self.num_unsynced + 1
+        if self.num_unsynced >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Flushes the written records and forces them to disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.num_unsynced = 0
+
+    def close(self):
+        """Syncs and closes the file."""
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+
+
+def load_crawled_urls(file_name, failure_column=None, failure_value='-1'):
+    """Loads the URLs of the pages whose records are present in a CSV file.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the CSV file containing the `url` column.
+    failure_column: str, optional
+        The column that marks the records of pages which could not be parsed.
+        Default is None which means there are no such records.
+    failure_value: str, optional
+        The value of `failure_column` which marks the failures. Default is '-1'.
+
+    Returns
+    -------
+    urls: set of str
+        The URLs of the pages that were crawled successfully.
+    """
+    urls = set()
+    if not os.path.exists(file_name):
+        return urls
+    with open(file_name, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            if (failure_column is not None) and (row.get(failure_column)
+                                                 == failure_value):
+                continue
+            urls.add(row['url'])
+    logging.info("Found {} crawled URLs in {}.".format(len(urls), file_name))
+    return urls
+
+
+def iter_concurrently(func, items, max_workers=4):
+    """Applies the function to each item using a pool of threads.
+
+    Parameters
+    ----------
+    func: callable, required
+        The function to apply.
+    items: iterable, required
+        The items to which to apply the function.
+    max_workers: int, optional
+        The number of threads. Default is 4.
+
+    Returns
+    -------
+    results: generator
+        The generator of the results in the order of the items.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for result in executor.map(func, items):
+            yield result
+
+
+def is_div_with_class(element, class_name):
+    """Checks whether the element is a `div` with exactly the specified value of the `class` attribute, as `div[@class='...']` does.
+
+    Parameters
+    ----------
+    element: etree.Element, required
+        The element to check; may be None.
+    class_name: str, required
+        The value of the `class` attribute.
+
+    Returns
+    -------
+    is_div_with_class: bool
+        True if the element is a `div` with the specified class; False otherwise.
+    """
+    return (element is not None) and (element.tag == 'div') and (
+        element.get('class') == class_name)
+
+
+class XPathStrings:
+    DeputiesTableBody = "//div[@class='grup-parlamentar-list grupuri-parlamentare-list']/table/tbody"
+    DeputyInfoDiv = "//div[@id='oldDiv']"
+    ProfilePic = "//div[@class='profile-pic-dep']/a"
+    InfoSections = "//div[@class='boxDep clearfix']"
+    DeputyName = "//div[@class='boxTitle']/h1"
+    InfoSectionHeadings = "//div[@class='boxDep clearfix']//h3"
+    InfoSectionOfHeading = "ancestor::div[@class='boxDep clearfix'][1]"
+
+
+class CompiledXPaths:
+    """The expressions from `XPathStrings` compiled once, at import time.
+
+    The elements of mandate pages are found by `MandateInfoParser` in a single pass instead.
+    """
+    DeputiesTableBody = etree.XPath(XPathStrings.DeputiesTableBody)
+
+
+Affiliation = namedtuple('Affiliation',
+                         ['organization', 'start_date', 'end_date'])
+
+MandateInfo = namedtuple('MandateInfo', [
+    'deputy_id', 'first_name', 'last_name', 'profile_picture', 'affiliations'
+])
+
+# The elements of a mandate page matched by `XPathStrings.DeputyName`, `XPathStrings.ProfilePic`
+# and the affiliations section found by its heading.
+MandatePageElements = namedtuple(
+    'MandatePageElements', ['name', 'profile_picture', 'affiliations_section'])
+
+AFFILIATION_DATE_REGEX = re.compile(r'([a-z]{3})\.\s+([0-9]{4})',
+                                    re.IGNORECASE)
+
+MONTH_MAP = {
+    'ian': 1,
+    'feb': 2,
+    'mar': 3,
+    'apr': 4,
+    'mai': 5,
+    'iun': 6,
+    'iul': 7,
+    'aug': 8,
+    'sep': 9,
+    'oct': 10,
+    'noi': 11,
+    'dec': 12
+}
+
+
+class MandateInfoParser:
+    """Parses the information from a page describing a deputy mandate.
+    """
+    def __init__(self, url, start_year, end_year=None, fetcher=None):
+        """Creates a new instance of MandateInfoParser.
+
+        Parameters
+        ----------
+        url : str, required
+            The url of the term/mandate page.
+        start_year: int, required
+            The start year of the term/mandate; may be None if the affiliations are not parsed.
+        end_year: int, optional
+            The end year of the term/mandate. Default is None which means that the term is ongoing.
+        fetcher: HttpFetcher, optional
+            The fetcher used to retrieve the page. Default is None which means the page is retrieved with a plain request.
+        """
+        self.url = url
+        self.fetcher = fetcher
+        self.start_year = start_year
+        self.end_year = end_year
+        self.date_regex = AFFILIATION_DATE_REGEX
+        self.month_map = MONTH_MAP
+        self.formatter = StringFormatter()
+        self.html_root = self._load_page(self.url)
+        self.page_elements = None
+
+    def parse_page(self):
+        """Parses the id, names, profile picture and affiliations of the deputy.
+
+        The elements containing the information are found in one pass over the page.
+
+        Returns
+        -------
+        mandate_info: MandateInfo
+            The named tuple containing the information from the page.
+        """
+        first_name, last_name = self.parse_names()
+        return MandateInfo(deputy_id=self.parse_deputy_id(),
+                           first_name=first_name,
+                           last_name=last_name,
+                           profile_picture=self.parse_profile_picture(),
+                           affiliations=self.parse_affiliations())
+
+    def parse_deputy_id(self):
+        """Parses the id of the deputy in the underlying database.
+
+        Returns
+        -------
+        deputy_id: int
+            The id of the deputy.
+        """
+        if self.url is None:
+            logging.error("Url not set.")
+        url_parts = urlparse(self.url)
+        query_string = parse_qs(url_parts.query)
+        return int(query_string['idm'][0])
+
+    def parse_affiliations(self):
+        """Parses the affiliation for the current term.
+
+        Returns
+        -------
+        affiliations: iterable of Affiliation
+            The collection of affiliations for the current term.
+        """
+        logging.info("Parsing affiliations for page '{}'.".format(self.url))
+        affiliation_section = self._get_page_elements().affiliations_section
+        if affiliation_section is None:
+            logging.error(
+                "Could not find affiliations section for page '{}'.".format(
+                    self.url))
+            return []
+
+        title = self._get_affiliation_title(affiliation_section)
+        logging.info(
+            "Title of the affiliations section for page '{}' is: '{}'.".format(
+                self.url, title))
+        info_table = next(affiliation_section.iterdescendants(tag='table'))
+        rows = self.formatter.normalize_many(
+            [get_element_text(row) for row in info_table])
+        affiliations = [self._parse_affiliation(text) for text in rows]
+
+        return affiliations
+
+    def parse_names(self):
+        """Parses the first and last names of the deputy.
+
+        Returns
+        -------
+        (first_name, last_name): tuple of str
+            The tuple containing first and last names of the deputy.
+        """
+        name_element = self._get_page_elements().name
+        if name_element is None:
+            logging.error(
+                "Could not find the element containing deputy name in page '{}'."
+                .format(self.url))
+            return None, None
+        first_name_parts, last_name_parts = [], []
+        text = get_element_text(name_element)
+        text = self.formatter.normalize(text)
+        for part in text.split():
+            if part.isupper():
+                last_name_parts.append(part)
+            else:
+                first_name_parts.append(part)
+        return ' '.join(first_name_parts), ' '.join(last_name_parts)
+
+    def parse_profile_picture(self):
+        """Retrieves the URL of the profile picture.
+
+        Returns
+        -------
+        img_url: str
+            The absolute URL of the profile pictrure if found; otherwise None.
+        """
+        anchor_element = self._get_page_elements().profile_picture
+        if (anchor_element is None) or (anchor_element.get('href') is None):
+            logging.warning(
+                "Could not parse the profile picture for page '{}'.".format(
+                    self.url))
+            return None
+        return urljoin(self.url, anchor_element.get('href'))
+
+    def _get_page_elements(self):
+        """Returns the elements containing the deputy name, the profile picture and the affiliations.
+
+        The elements are found on the first call, in one pass over the page.
+
+        Returns
+        -------
+        page_elements: MandatePageElements
+            The named tuple containing the first element of each kind; None for the elements that were not found.
+        """
+        if self.page_elements is None:
+            self.page_elements = self._find_page_elements()
+        return self.page_elements
+
+    def _find_page_elements(self):
+        """Finds the elements containing the deputy name, the profile picture and the affiliations in one pass over the page.
+
+        Returns
+        -------
+        page_elements: MandatePageElements
+            The named tuple containing the first element of each kind in document order.
+        """
+        found = {}
+        for element in self.html_root.iter('h1', 'a', 'h3'):
+            if element.tag == 'h1':
+                field = 'name' if is_div_with_class(element.getparent(),
+                                                    'boxTitle') else None
+            elif element.tag == 'a':
+                field = 'profile_picture' if is_div_with_class(
+                    element.getparent(), 'profile-pic-dep') else None
+            elif 'affiliations_section' not in found:
+                field = 'affiliations_section'
+                element = self._get_affiliations_section_of_heading(element)
+            else:
+                field = None
+            if (field is None) or (element is None) or (field in found):
+                continue
+            found[field] = element
+            if len(found) == len(MandatePageElements._fields):
+                break
+        if 'affiliations_section' not in found:
+            logging.error(
+                "Could not find the affiliation section for page '{}'.".format(
+                    self.url))
+        return MandatePageElements(
+            *[found.get(field) for field in MandatePageElements._fields])
+
+    def _get_affiliations_section_of_heading(self, heading):
+        """Returns the info section of the heading if the heading introduces the affiliations of the deputy.
+
+        Parameters
+        ----------
+        heading: etree.Element, required
+            The `h3` element.
+
+        Returns
+        -------
+        affiliation_section: etree.Element
+            The closest `div` ancestor of the heading with the class of info sections if the heading text
+            names a party or a political group; otherwise None.
+        """
+        section = next((div for div in heading.iterancestors('div')
+                        if is_div_with_class(div, 'boxDep clearfix')), None)
+        if section is None:
+            return None
+        text = self.formatter.normalize(get_element_text(heading))
+        if Resources.PoliticalParty in text or Resources.PoliticalGroup in text:
+            return section
+        return None
+
+    def _parse_affiliation(self, text):
+        """Parses the organization name and dates for an affiliation period.
+
+        Parameters
+        ----------
+        text : str, required
+            The text from which to parse the affiliation info.
+
+        Returns
+        -------
+        affiliation : Affiliation
+            The named tuple containing affiliation info.
+        """
+        organization, dates = [], []
+        for p in text.split('-'):
+            p = p.strip()
+            # Search for a string in the format `mmm. yyyy'
+            # If found then the current segment is a date
+            # Otherwise it is part of the organization name
+            if self.date_regex.search(p):
+                dates.append(p)
+            else:
+                organization.append(p)
+
+        organization_name = '-'.join(organization)
+        start_date, end_date = self._parse_affiliation_dates(dates)
+        affiliation = Affiliation(organization=organization_name,
+                                  start_date=start_date,
+                                  end_date=end_date)
+        return affiliation
+
+    def _parse_affiliation_dates(self, date_strings):
+        """Returns the start and end date from the provided parameters.
+
+        Parameters
+        ----------
+        date_strings: iterable of str
+
+        Returns
+        -------
+        (start_date, end_date): tuple of str
+            The start and end dates of the affiliation in the format yyyy[-mm], i.e. the month part is optional.
+            End date may be None meaning that the mandate is ongoing.
+        """
+        start_date = str(self.start_year)
+        end_date = None
+        if self.end_year is not None:
+            end_date = str(self.end_year)
+        for date_str in date_strings:
+            if Resources.AffiliationStartDateMark in date_str:
+                start_date = self._parse_date(date_str)
+            else:
+                end_date = self._parse_date(date_str)
+
+        return start_date, end_date
+
+    def _parse_date(self, date_str):
+        """Parses the date from the provided string.
+
+        Parameters
+        ----------
+        date_str: str
+            The string containing a start/end date of the affiliation.
+
+        Returns
+        -------
+        dt: str
+            The date parsed from the provided string or None.
+        """
+        logging.info(
+            "Parsing affiliation date from string '{}'.".format(date_str))
+        match = self.date_regex.search(date_str)
+        if match is None:
+            logging.info("Date regex did not match the provided string.")
+            return None
+
+        month = match.group(1).lower().strip('.')
+        year = int(match.group(2))
+        logging.info(
+            "The following date parts were found: month={}, year={}.".format(
+                month, year))
+        return "{}-{:02d}".format(year, self.month_map[month])
+
+    def _get_affiliation_title(self, affiliation):
+        """Returns the title of affiliation section.
+
+        Parameters
+        ----------
+        affiliation :  etree.ElementTreee
+            The HTML element containing the affiliation info.
+
+        Returns
+        -------
+        title : str
+            The title of the affiliation section or None.
+        """
+        h3 = next(affiliation.iterdescendants(tag='h3'))
+        if h3 is None:
+            logging.error(
+                "Could not parse the title of the affiliations section for page '{}'."
+                .format(self.url))
+            return None
+        title = get_element_text(h3)
+        return title.replace(':', '').strip()
+
+    def _load_page(self, url):
+        """Retrieves and parses the html of the page into a html element.
+
+        Parameters
+        ----------
+        url : str, required
+            The URL of the page to load.
+
+        Returns
+        -------
+        html_root : etree.Element
+            The root element of the page.
+        """
+        if self.fetcher is not None:
+            content = self.fetcher.get(url)
+        else:
+            content = requests.get(url).content
+        html_root = html.fromstring(content)
+        return html_root
+
+
+def build_fetcher(args):
+    """Builds the fetcher of web pages from the command line arguments.
+
+    Parameters
+    ----------
+    args: argparse.Namespace, required
+        The command line arguments.
+
+    Returns
+    -------
+    fetcher: HttpFetcher
+        The fetcher of web pages.
+    """
+    cache = HttpCache(args.cache_dir) if args.cache_dir is not None else None
+    return HttpFetcher(args.requests_per_second,
+                       args.max_workers,
+                       args.timeout,
+                       args.max_retries,
+                       cache,
+                       args.offline,
+                       max_backoff=args.max_backoff)
+
+
+def add_fetcher_args(parser):
+    parser.add_argument(
+        '--max-workers',
+        help="The maximum number of pages retrieved concurrently. Default is 4.",
+        type=int,
+        default=4)
+    parser.add_argument(
+        '--requests-per-second',
+        help="The maximum number of requests sent to a host each second. Default is 1.",
+        type=float,
+        default=1.0)
+    parser.add_argument(
+        '--timeout',
+        help="The number of seconds to wait for a server response. Default is 30.",
+        type=float,
+        default=30)
+    parser.add_argument(
+        '--max-retries',
+        help="The number of times to retry a failed request. Default is 3.",
+        type=int,
+        default=3)
+    parser.add_argument(
+        '--max-backoff',
+        help="The maximum number of seconds to wait before retrying a request, even if the server asks for longer. Default is 60.",
+        type=float,
+        default=60)
+    parser.add_argument(
+        '--cache-dir',
+        help="The directory where to cache the retrieved pages. Default is None which means no caching.",
+        default=None)
+    parser.add_argument(
+        '--offline',
+        help="Serve the pages only from the cache specified by --cache-dir without sending any request.",
+        action='store_true')
@@ -1,26 +1,32 @@
-from conllu import parse as parse_conllu
-import requests
 from pathlib import Path
 from xmlbuilder import parse_xml_file, save_xml, XmlAttributes, XmlElements, add_component_file_to_corpus_root
+from common import COMPRESSION_SUFFIXES, add_compression_suffix, get_compression
+from common import open_compressed, strip_compression_suffix
+from corpusscanner import CorpusScanner
 import logging
 from lxml import etree
 
 
 class CorpusIterator:
-    def __init__(self, corpus_dir, root_file):
+    def __init__(self, corpus_dir, root_file, use_cache=True):
         """Creates a new instance of CorpusIterator.
 
+        The corpus files are listed from the corpus directory and its subdirectories, e.g. the year directories.
+
         Parameters
         ----------
         corpus_dir : str, required
             The path to the corpus directory.
         root_file : str, required
             The name of the root file in corpus.
+        use_cache: bool, optional
+            Specifies whether to cache the listing of the corpus directory between runs. Default is True.
         """
         self.corpus_dir = Path(corpus_dir)
         self.corpus_root_file = Path(self.corpus_dir, root_file)
         self.annotated_corpus_root_file = Path(
             self.corpus_dir, "{}.ana.xml".format(self.corpus_root_file.stem))
+        self.scanner = CorpusScanner(self.corpus_dir, use_cache=use_cache)
 
     @property
     def root_file(self):
@@ -58,18 +64,18 @@ class CorpusIterator:
         file_generator: generator of pathlib.Path
             The generator that iterates corpus files one by one.
         """
+        listing = self.scanner.scan()
         annotated_files = set()
         if skip_annotated:
             annotated_files = set([
-                self._get_file_name_without_extensions(f)
-                for f in self.iter_annotated_files()
+                self._get_file_key(f) for f in listing.annotated_files
+                if f != self.annotated_root_file
             ])
 
-        for file_path in self.corpus_dir.glob("*.xml"):
+        for file_path in listing.component_files:
             if file_path == self.root_file:
                 continue
-            if ('.ana' not in file_path.suffixes) and (file_path.stem
-                                                       not in annotated_files):
+            if self._get_file_key(file_path) not in annotated_files:
                 yield file_path
 
     def iter_annotated_files(self):
@@ -80,7 +86,7 @@ class CorpusIterator:
         file_generator: generator of pathlib.Path
             The generator that iterates annotated corpus files one by one.
         """
-        for file_path in self.corpus_dir.glob("*.ana.xml"):
+        for file_path in self.scanner.scan().annotated_files:
             if file_path == self.annotated_root_file:
                 continue
             yield file_path
@@ -88,6 +94,9 @@ class CorpusIterator:
     def get_component_file_name(self, file_path):
         """Gets the name of the component file associated with the provided file.
 
+        The component file is looked up with the compression of the provided file first
+        and then with the other compressions.
+
         Parameters
         ----------
         file_path: pathlib.Path, required
@@ -99,9 +108,32 @@ class CorpusIterator:
             The component file path.
         """
         stem = self._get_file_name_without_extensions(file_path)
-        component_file = Path(file_path).with_stem(stem)
-        component_file = component_file.with_suffix(".xml")
-        return component_file
+        component_file = Path(Path(file_path).parent, "{}.xml".format(stem))
+        compression = get_compression(file_path)
+        candidates = [add_compression_suffix(component_file, compression)]
+        candidates.extend(
+            add_compression_suffix(component_file, name)
+            for name in [None, *COMPRESSION_SUFFIXES] if name != compression)
+        for candidate in candidates:
+            if Path(candidate).exists():
+                return Path(candidate)
+        return Path(candidates[0])
+
+    def _get_file_key(self, file_path):
+        """Gets the key which is shared by a component file and its annotated file.
+
+        Parameters
+        ----------
+        file_path: pathlib.Path, required
+            The path of the file.
+
+        Returns
+        -------
+        key: pathlib.Path
+            The path of the file without extensions.
+        """
+        return Path(file_path.parent,
+                    self._get_file_name_without_extensions(file_path))
 
     def _get_file_name_without_extensions(self, file_path):
         """Gets the file name by replacing all extensions with empty strings.
@@ -172,6 +204,9 @@ class UDPipe:
         document: list of conllu.models.TokenList
             The processed text in CoNLL-U format.
         """
+        # Imported here because only the annotation needs them; the corrections use the corpus iterator only.
+        import requests
+        from conllu import parse as parse_conllu
         payload = dict(self.parameters)
         payload['data'] = text
         response = requests.post(self.url, data=payload)
@@ -321,7 +356,7 @@ class LinkGroupBuilder:
 class CorpusComponentAnnotator:
     """Applies linguistic annotation to a corpus component file.
     """
-    def __init__(self, component_file, udpipe):
+    def __init__(self, component_file, udpipe, compression=None):
         """Creates a new instance of CorpusComponentAnnotator for the specified file.
 
         Parameters
@@ -330,10 +365,13 @@ class CorpusComponentAnnotator:
             The path of the component file.
         udpipe: UDPipe, required
             The wrapper instance of UDPipe to process files.
+        compression: str, optional
+            The codec used to compress the output files. Default is None which means no compression.
         """
         self.file_name = str(component_file)
         self.component_file = component_file
         self.udpipe = udpipe
+        self.compression = compression
         annotated_file, conllu_file = self._build_output_file_names(
             self.component_file)
         self.annotated_file = annotated_file
@@ -513,7 +551,7 @@ class CorpusComponentAnnotator:
         """
         file_name = str(self.conllu_file)
         logging.info("Saving CoNLL-U document to {}.".format(file_name))
-        with open(file_name, 'wt', encoding='utf-8') as f:
+        with open_compressed(file_name, 'wt', encoding='utf-8') as f:
             for s in self.conllu_doc:
                 f.write(s)
 
@@ -531,9 +569,15 @@ class CorpusComponentAnnotator:
             The names of output files.
         """
         parent = file_path.parent
-        stem = file_path.stem
-        annotated_file = Path(parent, '{}.ana.xml'.format(stem))
-        conllu_file = Path(parent, '{}.conllu'.format(stem))
+        stem = Path(strip_compression_suffix(file_path)).stem
+        annotated_file = Path(
+            parent,
+            add_compression_suffix('{}.ana.xml'.format(stem),
+                                   self.compression))
+        conllu_file = Path(
+            parent,
+            add_compression_suffix('{}.conllu'.format(stem),
+                                   self.compression))
         return annotated_file, conllu_file
 
 
@@ -560,5 +604,7 @@ class AnnotatedFilesAggregator:
         for component_file in self.corpus_iterator.iter_annotated_files():
             component = parse_xml_file(str(component_file)).getroot()
             counter.update_tag_usage(self.corpus_root, component)
-            add_component_file_to_corpus_root(component_file, self.corpus_root)
+            add_component_file_to_corpus_root(
+                component_file, self.corpus_root,
+                self.corpus_iterator.corpus_dir)
         save_xml(self.xml, self.root_file)
@@ -0,0 +1,201 @@
+"""Resolution of unknown speaker ids to the names of known deputies."""
+import logging
+import re
+import unicodedata
+from collections import namedtuple
+
+NameResolution = namedtuple(
+    'NameResolution',
+    ['speaker_id', 'name_key', 'score', 'method', 'person_id'],
+    defaults=[None])
+
+NON_ALPHANUMERIC = re.compile(r'[\W_]+')
+
+
+def fold_name(name):
+    """Converts the name to lowercase, removes the diacritics and replaces punctuation with spaces.
+
+    Parameters
+    ----------
+    name: str, required
+        The name or speaker id to fold.
+
+    Returns
+    -------
+    folded: str
+        The folded name with tokens separated by single spaces.
+    """
+    decomposed = unicodedata.normalize('NFKD', name.lower())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(NON_ALPHANUMERIC.sub(' ', stripped).split())
+
+
+def sort_tokens(folded_name):
+    """Sorts the tokens of a folded name to make it insensitive to the order of names.
+
+    Parameters
+    ----------
+    folded_name: str, required
+        The folded name.
+
+    Returns
+    -------
+    sorted_name: str
+        The tokens of the name in alphabetical order separated by single spaces.
+    """
+    return ' '.join(sorted(folded_name.split()))
+
+
+def build_trigrams(value):
+    """Builds the set of character trigrams of the provided value.
+
+    Parameters
+    ----------
+    value: str, required
+        The value for which to build trigrams.
+
+    Returns
+    -------
+    trigrams: set of str
+        The character trigrams of the value padded with spaces.
+    """
+    padded = '  {} '.format(value)
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class NameResolutionIndex:
+    """Precomputed index used to resolve unknown speaker ids to the keys of a name map.
+    """
+
+    def __init__(self, name_map, threshold=0.85):
+        """Creates a new instance of NameResolutionIndex.
+
+        Parameters
+        ----------
+        name_map: dict of (str, DeputyInfo), required
+            The name map whose keys are the known speaker ids.
+        threshold: float, optional
+            The minimum similarity score for a fuzzy match to be accepted.
+            Default is 0.85.
+        """
+        self.threshold = threshold
+        self.folded_keys = {}
+        self.unordered_keys = {}
+        self.candidates = []
+        self.trigram_index = {}
+        self.cache = {}
+        for name_key, deputy_info in name_map.items():
+            folded = fold_name(name_key)
+            self._add_key(self.folded_keys, folded, name_key, deputy_info)
+            self._add_key(self.unordered_keys, sort_tokens(folded), name_key,
+                          deputy_info)
+        for sorted_name, entry in self.unordered_keys.items():
+            if entry is None:
+                continue
+            trigrams = build_trigrams(sorted_name)
+            candidate_index = len(self.candidates)
+            self.candidates.append((entry[0], entry[1], len(trigrams)))
+            for trigram in trigrams:
+                if trigram not in self.trigram_index:
+                    self.trigram_index[trigram] = []
+                self.trigram_index[trigram].append(candidate_index)
+        logging.info(
+            "Built name resolution index with {} candidates and {} trigrams.".
+            format(len(self.candidates), len(self.trigram_index)))
+
+    def resolve(self, speaker_id):
+        """Resolves the speaker id to the key of a known deputy.
+
+        Parameters
+        ----------
+        speaker_id: str, required
+            The id of the unknown speaker.
+
+        Returns
+        -------
+        resolution: NameResolution
+            The resolved key, the similarity score and the method used to resolve it
+            if a match was found; None otherwise.
+        """
+        if speaker_id not in self.cache:
+            self.cache[speaker_id] = self._resolve(speaker_id)
+        return self.cache[speaker_id]
+
+    def _resolve(self, speaker_id):
+        """Looks up the speaker id into the folded, unordered and trigram indexes, in this order.
+        """
+        folded = fold_name(speaker_id)
+        entry = self.folded_keys.get(folded)
+        if entry is not None:
+            return NameResolution(speaker_id, entry[0], 1.0, 'folded')
+        sorted_name = sort_tokens(folded)
+        entry = self.unordered_keys.get(sorted_name)
+        if entry is not None:
+            return NameResolution(speaker_id, entry[0], 1.0, 'unordered')
+        if len(sorted_name.split()) < 2:
+            # Single names are too ambiguous for fuzzy matching.
+            return None
+        return self._find_similar(speaker_id, sorted_name)
+
+    def _find_similar(self, speaker_id, sorted_name):
+        """Finds the candidate with most trigrams in common with the provided name.
+
+        Parameters
+        ----------
+        speaker_id: str, required
+            The id of the unknown speaker.
+        sorted_name: str, required
+            The folded name of the speaker with its tokens sorted.
+
+        Returns
+        -------
+        resolution: NameResolution
+            The best match if its score is above the threshold and it is not ambiguous; None otherwise.
+        """
+        trigrams = build_trigrams(sorted_name)
+        shared = {}
+        for trigram in trigrams:
+            for candidate_index in self.trigram_index.get(trigram, ()):
+                shared[candidate_index] = shared.get(candidate_index, 0) + 1
+
+        best_score, best_match, is_ambiguous = 0.0, None, False
+        for candidate_index, num_shared in shared.items():
+            name_key, deputy_info, num_trigrams = self.candidates[
+                candidate_index]
+            score = 2.0 * num_shared / (len(trigrams) + num_trigrams)
+            if score > best_score:
+                best_score, best_match, is_ambiguous = score, (
+                    name_key, deputy_info), False
+            elif (score == best_score) and (deputy_info != best_match[1]):
+                is_ambiguous = True
+
+        if (best_match is None) or (best_score < self.threshold):
+            return None
+        if is_ambiguous:
+            logging.warning(
+                "Speaker id {} matches more than one deputy.".format(
+                    speaker_id))
+            return None
+        return NameResolution(speaker_id, best_match[0], round(best_score, 4),
+                              'trigram')
+
+    def _add_key(self, index, key, name_key, deputy_info):
+        """Adds the key to the index and marks it as ambiguous if it points to different deputies.
+
+        Parameters
+        ----------
+        index: dict, required
+            The index to which to add the key.
+        key: str, required
+            The key to add.
+        name_key: str, required
+            The key from the name map.
+        deputy_info: DeputyInfo, required
+            The deputy info from the name map.
+        """
+        if key not in index:
+            index[key] = (name_key, deputy_info)
+            return
+        entry = index[key]
+        if (entry is not None) and (entry[1] != deputy_info):
+            index[key] = None
@@ -1,12 +1,31 @@
 """Parse sessions of Lower House."""
 import logging
 from argparse import ArgumentParser
-from pathlib import Path
+from pathlib import PurePosixPath
+from archives import iter_input_files
 from xmlbuilder import SessionXmlBuilder
+from speakerregistry import SpeakerRegistry
+from common import add_compression_arg
+
+
+def is_transcript(file_name):
+    """Checks if the file is an HTML transcription.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The name of the file.
+
+    Returns
+    -------
+    is_transcript: bool
+        True if the file is an HTML file; False otherwise.
+    """
+    return 'htm' in PurePosixPath(file_name).suffix.lower()
 
 
 def iter_files(directory):
-    """Recursively iterates over files of the specified type in a given directory.
+    """Recursively iterates over the HTML transcriptions in a given directory and in the zip or tar archives within it.
 
     Parameters
     ----------
@@ -15,28 +34,35 @@ def iter_files(directory):
 
     Returns
     -------
-    file_path: generator of pathlib.Path
-        The generator that returns the path of each file.
+    input_file: generator of pathlib.Path or archives.ArchiveMember
+        The generator that returns the path of each file or the member of an archive.
     """
-    root_path = Path(directory)
-    for file_path in root_path.glob('**/*.*'):
-        if 'htm' in file_path.suffix.lower():
-            yield file_path
+    yield from iter_input_files(directory, is_transcript)
 
 
 def run(args):
     """Entrypoint for parsing Lower House sessions."""
     total, processed, failed = 0, 0, 0
-    for f in iter_files(args.input_directory):
-        input_file = str(f)
+    registry = None
+    if args.registry_file is not None:
+        registry = SpeakerRegistry(args.registry_file)
+    for input_file in iter_files(args.input_directory):
         total = total + 1
         logging.info("Building session XML from [{}].".format(input_file))
-        builder = SessionXmlBuilder(input_file, args.session_template_xml,
-                                    args.output_directory)
+        builder = SessionXmlBuilder(input_file,
+                                    args.session_template_xml,
+                                    args.output_directory,
+                                    speaker_registry=registry,
+                                    stream_input=args.stream_input,
+                                    compression=args.compress)
         try:
-            builder.build_session_xml()
-            builder.write_to_file(group_by_year=args.group_by_year,
-                                  use_xmllint=not args.no_xmllint)
+            if args.stream_output:
+                builder.stream_to_file(group_by_year=args.group_by_year,
+                                       use_xmllint=not args.no_xmllint)
+            else:
+                builder.build_session_xml()
+                builder.write_to_file(group_by_year=args.group_by_year,
+                                      use_xmllint=not args.no_xmllint)
             processed = processed + 1
         except Exception as e:
             failed = failed + 1
@@ -44,6 +70,8 @@ def run(args):
                 "Failed to build XML transcription for file [{}].".format(
                     input_file))
             logging.exception("Exception thrown when building transcription: %r", e)
+    if registry is not None:
+        registry.close()
     logging.info("Processed: {}/{} files.".format(processed, total))
     logging.info("Failed: {}/{} files.".format(failed, total))
     logging.info("That's all folks!")
@@ -74,6 +102,19 @@ def parse_arguments():
     parser.add_argument('--no-xmllint',
                         help='Do not call xmllint to format output files.',
                         action='store_true')
+    parser.add_argument(
+        '--stream-output',
+        help="Write the utterances to the output files as they are parsed instead of building the whole XML in memory.",
+        action='store_true')
+    parser.add_argument(
+        '--stream-input',
+        help="Read the body of each transcription as it is parsed instead of loading the whole HTML file in memory.",
+        action='store_true')
+    parser.add_argument(
+        '--registry-file',
+        help="The SQLite file of the speaker registry used to assign speaker ids.",
+        default=None)
+    add_compression_arg(parser)
     parser.add_argument(
         '-l',
         '--log-level',
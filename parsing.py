@@ -10,6 +10,24 @@ from collections import deque
 from common import get_element_text
 
 
+def open_html_file(html_file):
+    """Opens the HTML file of a session transcription for reading.
+
+    Parameters
+    ----------
+    html_file: str, pathlib.Path or archives.ArchiveMember
+        The file on disk or the member of an archive.
+
+    Returns
+    -------
+    file: file object
+        The binary file object of the file contents.
+    """
+    if isinstance(html_file, (str, Path)):
+        return open(html_file, 'rb')
+    return html_file.open()
+
+
 def parse_organization_name(organization_name, separator='-'):
     """Split the organization name into an acronym and the full name.
 
@@ -36,8 +54,114 @@ def parse_organization_name(organization_name, separator='-'):
     return '-'.join(name).strip(), '-'.join(acronym).strip()
 
 
+# The number of paragraphs at the end of a transcript which are searched for the end time.
+END_TIME_WINDOW = 5
+
+# The last words of the end mark are ASCII so they are not changed by normalization;
+# checking them on the raw text avoids normalizing every paragraph.
+END_TIME_FILTER = ' '.join(Resources.SessionEndMark.split()[-2:])
+
+# The formatter shared by all segments; it has no state.
+SEGMENT_FORMATTER = StringFormatter()
+
+SPEAKER_REGEX = re.compile(r'(domnul|doamna)\s+[^:]+:',
+                           re.IGNORECASE | re.MULTILINE)
+# Matches the tokens removed from a speaker header and the start of a parenthesis.
+SPEAKER_TOKEN_REGEX = re.compile(r'domnul|doamna|[(:]', re.IGNORECASE)
+
+
+def remove_speaker_titles(text):
+    """Removes the titles, colons and parenthesized text ending with a colon from a speaker header.
+
+    A parenthesis is removed together with the text that follows it
+    up to and including the last colon on the same line.
+    The text is scanned once so the running time is linear in its length.
+
+    Parameters
+    ----------
+    text: str, required
+        The text of the speaker header.
+
+    Returns
+    -------
+    text: str
+        The text without titles and colons.
+    """
+    parts = []
+    position, search_start = 0, 0
+    line_end, last_colon = -1, -1
+    while True:
+        match = SPEAKER_TOKEN_REGEX.search(text, search_start)
+        if match is None:
+            break
+        start, end = match.start(), match.end()
+        if text[start] == '(':
+            if start > line_end:
+                line_end = text.find('\n', start)
+                if line_end == -1:
+                    line_end = len(text)
+                last_colon = text.rfind(':', start, line_end)
+            # The parenthesis must be followed by at least one character before the colon.
+            if last_colon < start + 2:
+                search_start = start + 1
+                continue
+            end = last_colon + 1
+        parts.append(text[position:start])
+        position, search_start = end, end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def remove_stage_directions(text):
+    """Removes the stage directions, i.e. the whitespace followed by text in parentheses.
+
+    The text of a stage direction which is not closed extends to the end of the text.
+    The text is scanned once so the running time is linear in its length.
+
+    Parameters
+    ----------
+    text: str, required
+        The text from which to remove stage directions.
+
+    Returns
+    -------
+    text: str
+        The text without stage directions.
+    """
+    parts = []
+    position, search_start = 0, 0
+    length = len(text)
+    while True:
+        start = text.find('(', search_start)
+        if start == -1:
+            break
+        search_start = start + 1
+        if (start == 0) or (not text[start - 1].isspace()):
+            continue
+        if (start + 1 == length) or (text[start + 1] == ')'):
+            continue
+        end = text.find(')', start + 2)
+        if end == -1:
+            end = length
+        while (end < length) and (text[end] == ')'):
+            end = end + 1
+        parts.append(text[position:start - 1])
+        position, search_start = end, end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+# Marks the values of a segment that were not computed yet.
+_NOT_COMPUTED = object()
+
+
 class Segment:
-    """Represents a segment of a  session."""
+    """Represents a segment of a  session.
+
+    The classification of the segment and its texts are computed on first access and cached.
+    """
+    __slots__ = ('paragraph', 'children', 'full_text', '_is_speaker',
+                 '_has_note', '_speaker', '_text', '_note_text')
 
     def __init__(self, paragraph):
         """Create a new instance of Segment class.
@@ -50,39 +174,27 @@ class Segment:
         self.paragraph = paragraph
         self.children = list(self.paragraph)
         self.full_text = get_element_text(self.paragraph)
+        self._is_speaker = _NOT_COMPUTED
+        self._has_note = _NOT_COMPUTED
+        self._speaker = _NOT_COMPUTED
+        self._text = _NOT_COMPUTED
+        self._note_text = _NOT_COMPUTED
 
     @property
     def is_speaker(self):
         """Return true if the segment is a speaker segment."""
-        match = re.match(r'(domnul|doamna)\s+[^:]+:', self.full_text,
-                         re.IGNORECASE | re.MULTILINE)
-        if match is None:
-            return False
-
-        # When the chairman is doing the name call in a session
-        # this can trigger a false positive for is_speaker
-        if self._is_name_call_segment():
-            return False
-
-        formatter = StringFormatter()
-        speaker = self._get_spearker().strip()
-        speaker = formatter.normalize(speaker)
-        speaker = formatter.to_single_line(speaker)
-        speaker = speaker.replace('-', '').replace(':', '')
-        name_parts = speaker.split()
-        for p in name_parts:
-            if not p[0].isupper():
-                return False
-        return True
+        if self._is_speaker is _NOT_COMPUTED:
+            self._is_speaker = self._classify_speaker()
+        return self._is_speaker
 
     @property
     def has_note(self):
         """Return true if the current segment contains a note."""
-        for child in self.paragraph:
-            if child.tag == 'i':
-                if len(get_element_text(child)) > 0:
-                    return True
-        return False
+        if self._has_note is _NOT_COMPUTED:
+            self._has_note = any(
+                len(get_element_text(child)) > 0 for child in self.children
+                if child.tag == 'i')
+        return self._has_note
 
     def get_speaker(self):
         """Return the speaker name if the current segment is a speaker.
@@ -104,9 +216,9 @@ class Segment:
         text: str
             The text of the segment.
         """
-        text = get_element_text(self.paragraph)
-        return re.sub(r'\s\([^)]+\)*', '', text, 0,
-                      re.MULTILINE | re.IGNORECASE)
+        if self._text is _NOT_COMPUTED:
+            self._text = remove_stage_directions(self.full_text)
+        return self._text
 
     def get_note_text(self):
         """Return the editorial note text.
@@ -116,7 +228,34 @@ class Segment:
         text: str
             The text of the note.
         """
-        for child in self.paragraph:
+        if self._note_text is _NOT_COMPUTED:
+            self._note_text = self._find_note_text()
+        return self._note_text
+
+    def _classify_speaker(self):
+        """Checks if the segment starts with the name of a speaker."""
+        match = SPEAKER_REGEX.match(self.full_text)
+        if match is None:
+            return False
+
+        # When the chairman is doing the name call in a session
+        # this can trigger a false positive for is_speaker
+        if self._is_name_call_segment():
+            return False
+
+        speaker = self._get_spearker().strip()
+        speaker = SEGMENT_FORMATTER.normalize(speaker)
+        speaker = SEGMENT_FORMATTER.to_single_line(speaker)
+        speaker = speaker.replace('-', '').replace(':', '')
+        name_parts = speaker.split()
+        for p in name_parts:
+            if not p[0].isupper():
+                return False
+        return True
+
+    def _find_note_text(self):
+        """Returns the text of the first `i` element or None if there is no such element."""
+        for child in self.children:
             if child.tag == 'i':
                 if self.is_speaker:
                     return get_element_text(child).replace(':', '')
@@ -129,20 +268,23 @@ class Segment:
             return True
 
     def _get_spearker(self):
+        if self._speaker is not _NOT_COMPUTED:
+            return self._speaker
         # Replace title and colon with empty string
-        speaker = re.sub(r'domnul|doamna|(\(.+\)*)?:', '', self.full_text, 0,
-                         re.MULTILINE | re.IGNORECASE)
-        index = speaker.lower().index(Resources.President)
+        speaker = remove_speaker_titles(self.full_text)
+        index = speaker.lower().find(Resources.President)
         if index > -1:
             speaker = speaker[:index].strip()
         if speaker.endswith('-'):
             speaker = speaker.replace('-', '')
 
-        return speaker.strip()
+        self._speaker = speaker.strip()
+        return self._speaker
 
 
 class TableRowSegment:
     """Represents a segment of a  session extracted from a table row."""
+    __slots__ = ('table_row', )
 
     def __init__(self, table_row):
         """Create a new instance of TableRowSegment.
@@ -183,8 +325,7 @@ class TableRowSegment:
             The text of the segment.
         """
         text = get_element_text(self.table_row)
-        return re.sub(r'\s\([^)]+\)*', '', text, 0,
-                      re.MULTILINE | re.IGNORECASE)
+        return remove_stage_directions(text)
 
     def get_note_text(self):
         """Return the editorial note text.
@@ -205,16 +346,17 @@ class SessionParser:
 
         Parameters
         ----------
-        html_file: str or pathlib.Path
+        html_file: str, pathlib.Path or archives.ArchiveMember
             The HTML file containing session transcription.
         """
         self.formatter = StringFormatter()
-        self.file_name = str(html_file) if isinstance(html_file,
-                                                      Path) else html_file
+        self.file_name = str(html_file)
         self.html_root = self._parse_html(html_file)
         self.end_time_segment = None
-        logging.debug("In SessionParser. HTML root is:\n{}".format(
-            etree.tostring(self.html_root, method='html', pretty_print=True)))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("In SessionParser. HTML root is:\n{}".format(
+                etree.tostring(self.html_root, method='html',
+                               pretty_print=True)))
 
     def parse_session_date(self):
         """Parse the session date from the name of the session file.
@@ -330,8 +472,8 @@ class SessionParser:
 
         Returns
         -------
-        segments: iterable of Segment
-            The segments that form the body of the session.
+        segments: generator of Segment
+            The generator of the segments that form the body of the session, in document order.
         """
         p = None
         self.current_node = None
@@ -339,9 +481,8 @@ class SessionParser:
             s = Segment(p)
             if s.is_speaker:
                 break
-        segments = []
         self.current_node = p
-        segments.append(Segment(self.current_node))
+        yield Segment(self.current_node)
         self.parse_session_end_time()
         while self.current_node is not None:
             self.current_node = self.current_node.getnext()
@@ -349,10 +490,9 @@ class SessionParser:
                 self.current_node = None
             if (self.current_node is not None) and (self._contains_table(
                     self.current_node)):
-                segments.extend(self._parse_table_segments(self.current_node))
+                yield from self._parse_table_segments(self.current_node)
             if (self.current_node is not None):
-                segments.append(Segment(self.current_node))
-        return segments
+                yield Segment(self.current_node)
 
     def parse_session_end_time(self):
         """Parse the segment containing end time of the session.
@@ -367,16 +507,15 @@ class SessionParser:
                 get_element_text(self.end_time_segment))
             return text
 
-        # Take at most 5 elements from the end of the HTML tree
+        # Take at most END_TIME_WINDOW elements from the end of the HTML tree
         # and check if any of them match the end session mark.
-        segments = deque(self.html_root.iterdescendants(tag='p'), maxlen=5)
-        para = segments.pop()
-        while para is not None:
+        segments = deque(self.html_root.iterdescendants(tag='p'),
+                         maxlen=END_TIME_WINDOW)
+        for para in reversed(segments):
             text = self.formatter.normalize(get_element_text(para))
             if Resources.SessionEndMark in text.lower():
                 self.end_time_segment = para
                 return text
-            para = segments.pop()
 
         logging.error("Could not parse session end time for file [{}].".format(
             self.file_name))
@@ -444,5 +583,267 @@ class SessionParser:
 
     def _parse_html(self, html_file):
         parser = etree.HTMLParser()
-        tree_root = etree.parse(html_file, parser=parser)
+        if isinstance(html_file, (str, Path)):
+            tree_root = etree.parse(html_file, parser=parser)
+        else:
+            with open_html_file(html_file) as stream:
+                tree_root = etree.parse(stream, parser=parser)
         return tree_root.getroot()
+
+
+class StreamingSessionParser(SessionParser):
+    """Session parser which reads the HTML file incrementally.
+
+    When the parser is created the file is read only up to the first speaker paragraph,
+    which is enough to parse the date, summary, heading, start time and chairmen of the session.
+    The segments of the body are parsed from the rest of the file as they are requested and the
+    elements already consumed are removed from the tree, so the header must be parsed before the body.
+    """
+
+    def __init__(self, html_file, chunk_size=1 << 16):
+        """Create a new instance of the StreamingSessionParser class.
+
+        Parameters
+        ----------
+        html_file: str, pathlib.Path or archives.ArchiveMember
+            The HTML file containing session transcription.
+        chunk_size: int, optional
+            The number of bytes fed to the HTML parser at once. Default is 64 KiB.
+        """
+        self.chunk_size = chunk_size
+        self.first_speaker = None
+        self.events = None
+        self.end_time_candidate = None
+        self.num_following_paragraphs = 0
+        self.end_time_text = None
+        self.is_streamed = False
+        self.pending = None
+        self.last_consumed = None
+        super().__init__(html_file)
+
+    def parse_session_segments(self):
+        """Parse the segments that form the body of the session as the file is read.
+
+        Returns
+        -------
+        segments: generator of Segment
+            The generator of the segments that form the body of the session, in document order.
+        """
+        if (self.first_speaker is None) or (self.events is None):
+            # The whole file is already in memory.
+            yield from super().parse_session_segments()
+            return
+
+        self.current_node = self.first_speaker
+        yield Segment(self.first_speaker)
+        parent = self.first_speaker.getparent()
+        self.last_consumed = self.first_speaker
+        self.pending = None
+        for element in self._read_remaining_events():
+            is_paragraph = element.tag == 'p'
+            if is_paragraph and self._is_new_end_time_candidate(element):
+                yield from self._release_pending(element, parent)
+            if element.getparent() is not parent:
+                continue
+            self.current_node = element
+            segments = self._parse_table_segments(element) + [
+                Segment(element)
+            ]
+            if self.pending is not None:
+                self.pending.append((element, segments))
+                continue
+            yield from segments
+            self.last_consumed = self._discard_consumed(element)
+
+        # The segments held back after the end time segment are not part of the body.
+        self.current_node = None
+        self.is_streamed = True
+        if self.end_time_candidate is not None:
+            self.end_time_segment, self.end_time_text = self.end_time_candidate
+        if self.last_consumed is not None:
+            self.last_consumed.clear()
+
+    def parse_session_end_time(self):
+        """Parse the segment containing end time of the session.
+
+        If the body was not streamed yet, the rest of the file is read into memory.
+
+        Returns
+        -------
+        session_end_time: str
+            The segment containing end time of the session.
+        """
+        if not self.is_streamed:
+            for _ in self._read_remaining_events():
+                pass
+            return super().parse_session_end_time()
+        if self.end_time_text is None:
+            logging.error(
+                "Could not parse session end time for file [{}].".format(
+                    self.file_name))
+        return self.end_time_text
+
+    def _is_new_end_time_candidate(self, para):
+        """Tracks the end time segment and checks if the paragraph changed the candidate.
+
+        Parameters
+        ----------
+        para: etree.Element
+            The paragraph that was read.
+
+        Returns
+        -------
+        is_new_candidate: bool
+            True if the paragraph replaced or dropped the previous end time candidate; False otherwise.
+        """
+        candidate = self.end_time_candidate
+        self._track_end_time(para)
+        return self.end_time_candidate is not candidate
+
+    def _release_pending(self, para, parent):
+        """Returns the segments held back after the previous end time candidate and starts holding back the segments after the new one.
+
+        The previous candidate is not the end time segment so the segments held back after it are part of the body.
+
+        Parameters
+        ----------
+        para: etree.Element
+            The paragraph that changed the end time candidate.
+        parent: etree.Element
+            The element containing the paragraphs of the body.
+
+        Returns
+        -------
+        segments: generator of Segment
+            The segments that were held back.
+        """
+        if self.pending:
+            yield from self._flush(self.pending)
+            self.last_consumed = self._discard_consumed(self.pending[-1][0])
+        self.pending = None
+        is_body_paragraph = para.getparent() is parent
+        if (self.end_time_candidate is not None) and is_body_paragraph:
+            self.pending = []
+
+    def _flush(self, pending):
+        """Returns the segments that were held back.
+
+        Parameters
+        ----------
+        pending: list of (etree.Element, list of Segment)
+            The elements and their segments that were held back.
+
+        Returns
+        -------
+        segments: generator of Segment
+            The segments of the pending elements.
+        """
+        for element, segments in pending:
+            self.current_node = element
+            yield from segments
+
+    def _discard_consumed(self, element):
+        """Removes the element and its previous siblings from the tree to free memory.
+
+        Parameters
+        ----------
+        element: etree.Element
+            The last element whose segments were consumed.
+
+        Returns
+        -------
+        element: etree.Element
+            The element which was emptied; it is kept in the tree until the parser moves past it.
+        """
+        element.clear()
+        parent = element.getparent()
+        while element.getprevious() is not None:
+            del parent[0]
+        return element
+
+    def _track_end_time(self, para):
+        """Keeps the last paragraph matching the end session mark among the last paragraphs read.
+
+        Parameters
+        ----------
+        para: etree.Element
+            The paragraph that was read.
+        """
+        text = get_element_text(para)
+        if END_TIME_FILTER in text.lower():
+            text = self.formatter.normalize(text)
+            if Resources.SessionEndMark in text.lower():
+                self.end_time_candidate = (para, text)
+                self.num_following_paragraphs = 0
+                return
+        if self.end_time_candidate is not None:
+            self.num_following_paragraphs += 1
+            if self.num_following_paragraphs >= END_TIME_WINDOW:
+                self.end_time_candidate = None
+
+    def _read_remaining_events(self):
+        """Returns the elements which are not read yet from the file.
+
+        Returns
+        -------
+        elements: generator of etree.Element
+            The elements read from the file, in the order in which they end.
+        """
+        if self.events is None:
+            return
+        # Iterating instead of delegating keeps the events open when the caller stops early.
+        for element in self.events:
+            yield element
+        self.events = None
+
+    def _iter_events(self, html_file):
+        """Feeds the HTML file to the parser in chunks.
+
+        Parameters
+        ----------
+        html_file: str, pathlib.Path or archives.ArchiveMember
+            The HTML file containing session transcription.
+
+        Returns
+        -------
+        elements: generator of etree.Element
+            The elements read from the file, in the order in which they end.
+        """
+        parser = etree.HTMLPullParser(events=('end', ))
+        with open_html_file(html_file) as stream:
+            chunk = stream.read(self.chunk_size)
+            while chunk:
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    yield element
+                chunk = stream.read(self.chunk_size)
+        parser.close()
+        for _, element in parser.read_events():
+            yield element
+
+    def _parse_html(self, html_file):
+        """Reads the HTML file up to the first speaker paragraph.
+
+        Parameters
+        ----------
+        html_file: str, pathlib.Path or archives.ArchiveMember
+            The HTML file containing session transcription.
+
+        Returns
+        -------
+        html_root: etree.Element
+            The root of the partially read HTML tree.
+        """
+        self.events = self._iter_events(html_file)
+        element = None
+        for element in self._read_remaining_events():
+            if element.tag != 'p':
+                continue
+            self._track_end_time(element)
+            if Segment(element).is_speaker:
+                self.first_speaker = element
+                break
+        if element is None:
+            raise ValueError(
+                "File [{}] does not contain any element.".format(html_file))
+        return element.getroottree().getroot()
@@ -0,0 +1,282 @@
+"""Persistent registry of speakers backed by SQLite."""
+import logging
+import sqlite3
+from common import DeputyInfo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deputies (
+    deputy_id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    gender TEXT,
+    image_url TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_deputies_gender ON deputies(gender);
+CREATE TABLE IF NOT EXISTS name_variants (
+    name_key TEXT PRIMARY KEY,
+    deputy_id INTEGER NOT NULL REFERENCES deputies(deputy_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_name_variants_deputy ON name_variants(deputy_id);
+CREATE TABLE IF NOT EXISTS speakers (
+    speaker_key TEXT PRIMARY KEY,
+    speaker_id TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS id_replacements (
+    id_string TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_id_replacements_canonical ON id_replacements(canonical_id);
+"""
+
+
+def build_speaker_key(speaker_id):
+    """Builds the lookup key of a speaker id.
+
+    Parameters
+    ----------
+    speaker_id: str, required
+        The id of the speaker with or without the leading # symbol.
+
+    Returns
+    -------
+    key: str
+        The lowercase id prefixed by the # symbol.
+    """
+    return '#{}'.format(speaker_id.strip('#')).lower()
+
+
+class SpeakerRegistry:
+    """Stores the deputies, their name variants, the ids of the speakers and the id replacements in a SQLite database.
+
+    The database uses write-ahead logging which allows multiple processes
+    to read from the registry while another one is writing to it.
+    """
+
+    def __init__(self, db_file, timeout=30):
+        """Creates a new instance of SpeakerRegistry.
+
+        Parameters
+        ----------
+        db_file: str, required
+            The path of the database file. It will be created if it does not exist.
+        timeout: int, optional
+            The number of seconds to wait for a lock held by another process.
+            Default is 30.
+        """
+        self.db_file = str(db_file)
+        self.connection = sqlite3.connect(self.db_file, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self.name_map = RegistryNameMap(self)
+        self.speaker_ids = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the connection to the database."""
+        self.connection.close()
+
+    def has_deputies(self):
+        """Checks if the registry contains deputy records.
+
+        Returns
+        -------
+        has_deputies: bool
+            True if there is at least one deputy in the registry; False otherwise.
+        """
+        row = self.connection.execute(
+            "SELECT 1 FROM deputies LIMIT 1").fetchone()
+        return row is not None
+
+    def import_name_map(self, name_map):
+        """Replaces the deputies and their name variants with the ones from the provided map.
+
+        Parameters
+        ----------
+        name_map: dict of (str, DeputyInfo), required
+            The map of name keys to deputy info.
+        """
+        logging.info("Importing {} name variants into speaker registry.".format(
+            len(name_map)))
+        deputy_ids = {}
+        self.name_map.clear_cache()
+        with self.connection:
+            self.connection.execute("DELETE FROM name_variants")
+            self.connection.execute("DELETE FROM deputies")
+            for key, deputy_info in name_map.items():
+                if deputy_info not in deputy_ids:
+                    cursor = self.connection.execute(
+                        """INSERT INTO deputies
+                        (first_name, last_name, gender, image_url)
+                        VALUES (?, ?, ?, ?)""", tuple(deputy_info))
+                    deputy_ids[deputy_info] = cursor.lastrowid
+                self.connection.execute(
+                    "INSERT INTO name_variants (name_key, deputy_id) VALUES (?, ?)",
+                    (key, deputy_ids[deputy_info]))
+
+    def get_deputy(self, name_key):
+        """Looks up the deputy by the key of a name variant.
+
+        Parameters
+        ----------
+        name_key: str, required
+            The key of the name variant.
+
+        Returns
+        -------
+        deputy_info: DeputyInfo
+            The deputy info if found; None otherwise.
+        """
+        row = self.connection.execute(
+            """SELECT d.first_name, d.last_name, d.gender, d.image_url
+            FROM name_variants AS n
+            JOIN deputies AS d ON d.deputy_id = n.deputy_id
+            WHERE n.name_key = ?""", (name_key, )).fetchone()
+        return DeputyInfo(*row) if row is not None else None
+
+    def iter_name_variants(self):
+        """Iterates over name variants and their deputies.
+
+        Returns
+        -------
+        name_variants: generator of (str, DeputyInfo) tuples
+            The generator that returns the key of each name variant and the deputy info.
+        """
+        cursor = self.connection.execute(
+            """SELECT n.name_key, d.first_name, d.last_name, d.gender, d.image_url
+            FROM name_variants AS n
+            JOIN deputies AS d ON d.deputy_id = n.deputy_id""")
+        for row in cursor:
+            yield row[0], DeputyInfo(*row[1:])
+
+    def count_name_variants(self):
+        """Returns the number of name variants in the registry."""
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM name_variants").fetchone()
+        return row[0]
+
+    def register_speaker(self, speaker_id):
+        """Registers the speaker id for its key if the key is not registered already.
+
+        The id of a new key is claimed in the database when the speaker is first seen, so all the processes
+        sharing the registry use the id that was saved first. The resolved ids are kept in memory,
+        so the database is queried once for each speaker.
+
+        Parameters
+        ----------
+        speaker_id: str, required
+            The id of the speaker without the leading # symbol.
+
+        Returns
+        -------
+        registered_id: str
+            The id registered for the key of the speaker.
+        """
+        key = build_speaker_key(speaker_id)
+        registered_id = self.speaker_ids.get(key)
+        if registered_id is not None:
+            return registered_id
+        row = self.connection.execute(
+            "SELECT speaker_id FROM speakers WHERE speaker_key = ?",
+            (key, )).fetchone()
+        if row is None:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO speakers (speaker_key, speaker_id) VALUES (?, ?)",
+                    (key, speaker_id))
+                row = self.connection.execute(
+                    "SELECT speaker_id FROM speakers WHERE speaker_key = ?",
+                    (key, )).fetchone()
+            if row[0] != speaker_id:
+                logging.info(
+                    "Speaker {} was registered as {} by another process.".
+                    format(speaker_id, row[0]))
+        registered_id = row[0]
+        self.speaker_ids[key] = registered_id
+        return registered_id
+
+    def add_id_replacement(self, id_string, canonical_id):
+        """Records the canonical id that replaces the specified id.
+
+        Parameters
+        ----------
+        id_string: str, required
+            The id to be replaced.
+        canonical_id: str, required
+            The replacement id.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO id_replacements (id_string, canonical_id) VALUES (?, ?)",
+                (id_string, canonical_id))
+
+    def get_id_replacements(self):
+        """Returns the ids to be replaced and their canonical ids.
+
+        Returns
+        -------
+        id_replacements: dict of (str, str)
+            The canonical ids keyed by the ids they replace.
+        """
+        cursor = self.connection.execute(
+            "SELECT id_string, canonical_id FROM id_replacements")
+        return {id_string: canonical_id for id_string, canonical_id in cursor}
+
+
+class RegistryNameMap:
+    """Read-only mapping of name keys to deputy info which queries the registry on demand.
+
+    The deputy of each key is queried once and kept in memory; the cache is cleared when the name variants are imported.
+    """
+
+    def __init__(self, registry):
+        """Creates a new instance of RegistryNameMap.
+
+        Parameters
+        ----------
+        registry: SpeakerRegistry, required
+            The registry to query.
+        """
+        self.registry = registry
+        self.deputies = {}
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        deputy_info = self.get(key)
+        if deputy_info is None:
+            raise KeyError(key)
+        return deputy_info
+
+    def __len__(self):
+        return self.registry.count_name_variants()
+
+    def __iter__(self):
+        for key, _ in self.registry.iter_name_variants():
+            yield key
+
+    def get(self, key, default=None):
+        if key in self.deputies:
+            deputy_info = self.deputies[key]
+        else:
+            deputy_info = self.registry.get_deputy(key)
+            self.deputies[key] = deputy_info
+        return deputy_info if deputy_info is not None else default
+
+    def clear_cache(self):
+        """Forgets the deputies queried so far."""
+        self.deputies = {}
+
+    def items(self):
+        return self.registry.iter_name_variants()
+
+    def values(self):
+        for _, deputy_info in self.registry.iter_name_variants():
+            yield deputy_info
@@ -0,0 +1,192 @@
+"""Checks that updating the corpus root gives the same files as building it from scratch."""
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('babel')
+pytest.importorskip('dateutil')
+
+from lxml import etree  # noqa: E402
+from speakerregistry import SpeakerRegistry  # noqa: E402
+from xmlbuilder import RootXmlBuilder  # noqa: E402
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TEMPLATE_FILE = Path(REPO_DIR, 'data', 'templates', 'corpus-root-template.xml')
+
+XML_ID = '{http://www.w3.org/XML/1998/namespace}id'
+
+COMPONENT_TEMPLATE = """<?xml version='1.0' encoding='utf-8'?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader>
+    <encodingDesc>
+      <tagsDecl>
+        <namespace name="http://www.tei-c.org/ns/1.0">
+          <tagUsage gi="u" occurs="{num_utterances}"/>
+          <tagUsage gi="seg" occurs="{num_utterances}"/>
+        </namespace>
+      </tagsDecl>
+    </encodingDesc>
+    <sourceDesc>
+      <bibl>
+        <date when="{date}">{date}</date>
+      </bibl>
+    </sourceDesc>
+  </teiHeader>
+  <text>
+    <body>
+      <div>
+{utterances}
+      </div>
+    </body>
+  </text>
+</TEI>
+"""
+
+ID_CHAR_REPLACEMENTS = {'Ș': 'S', 'ș': 's', 'Ț': 'T', 'ț': 't'}
+
+DEPUTIES = [
+    ('Ion', 'Popescu', 'M', ''),
+    ('Ștefan', 'Ionescu', 'M', 'http://example.com/ionescu.jpg'),
+    ('Maria', 'Dumitrescu', 'F', ''),
+]
+
+# The sessions of the first batch are in the root file before the update; the second batch is added by it.
+SESSIONS = [
+    [('2016-11-02', ['Ion-Popescu', 'Ștefan-Ionescu']),
+     ('2017-03-01', ['Ion-Popescu', 'Vasile-Necunoscut'])],
+    [('2017-03-08', ['Popescu-Ion', 'Maria-Dumitrescu']),
+     ('2021-02-01', ['Ștefan-Ionescu', 'Vasile-Necunoscut',
+                     'Ionescu-Ștefan'])],
+]
+
+
+def write_session(corpus_dir, session_date, speakers):
+    file_stem = 'ParlaMint-RO_{}-CD'.format(session_date)
+    year_dir = corpus_dir / session_date[:4]
+    year_dir.mkdir(parents=True, exist_ok=True)
+    utterances = '\n'.join(
+        '        <u who="#{}"><seg>Text.</seg></u>'.format(speaker)
+        for speaker in speakers)
+    contents = COMPONENT_TEMPLATE.format(num_utterances=len(speakers),
+                                         date=session_date,
+                                         utterances=utterances)
+    for suffix in ['.xml', '.ana.xml']:
+        Path(year_dir, file_stem + suffix).write_text(contents,
+                                                      encoding='utf-8')
+
+
+def build_root(corpus_dir,
+               update=False,
+               deduplicate_persons=True,
+               registry=None,
+               name_resolution_threshold=None):
+    deputy_info = pd.DataFrame(
+        DEPUTIES, columns=['first_name', 'last_name', 'gender', 'image_url'])
+    builder = RootXmlBuilder(
+        str(TEMPLATE_FILE),
+        deputy_info, [],
+        id_char_replacements=ID_CHAR_REPLACEMENTS,
+        registry=registry,
+        name_resolution_threshold=name_resolution_threshold)
+    if update:
+        builder.update_corpus_root(corpus_dir,
+                                   deduplicate_persons=deduplicate_persons)
+    else:
+        builder.build_corpus_root(corpus_dir,
+                                  deduplicate_persons=deduplicate_persons)
+    return builder
+
+
+def read_corpus(corpus_dir):
+    return {
+        file_path.relative_to(corpus_dir).as_posix():
+        file_path.read_text(encoding='utf-8')
+        for file_path in sorted(corpus_dir.glob('**/*.xml'))
+    }
+
+
+def read_speaker_ids(corpus_dir):
+    root = etree.parse(str(corpus_dir / 'ParlaMint-RO.xml')).getroot()
+    person_ids = [person.get(XML_ID) for person in root.iter('{*}person')]
+    session = etree.parse(
+        str(corpus_dir / '2017' / 'ParlaMint-RO_2017-03-08-CD.xml')).getroot()
+    return person_ids, [u.get('who') for u in session.iter('{*}u')]
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+@pytest.mark.parametrize('deduplicate_persons', [True, False])
+def test_update_matches_full_build(tmp_path, deduplicate_persons):
+    full_dir = tmp_path / 'full'
+    for batch in SESSIONS:
+        for session_date, speakers in batch:
+            write_session(full_dir, session_date, speakers)
+    full_builder = build_root(full_dir,
+                              deduplicate_persons=deduplicate_persons)
+
+    update_dir = tmp_path / 'update'
+    for session_date, speakers in SESSIONS[0]:
+        write_session(update_dir, session_date, speakers)
+    build_root(update_dir, deduplicate_persons=deduplicate_persons)
+    for session_date, speakers in SESSIONS[1]:
+        write_session(update_dir, session_date, speakers)
+    update_builder = build_root(update_dir,
+                                update=True,
+                                deduplicate_persons=deduplicate_persons)
+
+    assert read_corpus(update_dir) == read_corpus(full_dir)
+    assert update_builder.ids_to_replace == full_builder.ids_to_replace
+
+
+def test_update_without_new_files_keeps_corpus(tmp_path):
+    corpus_dir = tmp_path / 'corpus'
+    for batch in SESSIONS:
+        for session_date, speakers in batch:
+            write_session(corpus_dir, session_date, speakers)
+    build_root(corpus_dir)
+    expected = read_corpus(corpus_dir)
+    build_root(corpus_dir, update=True)
+    assert read_corpus(corpus_dir) == expected
+
+
+def test_build_with_registry_matches_build_without(tmp_path):
+    for corpus_dir in [tmp_path / 'plain', tmp_path / 'registry']:
+        for batch in SESSIONS:
+            for session_date, speakers in batch:
+                write_session(corpus_dir, session_date, speakers)
+    build_root(tmp_path / 'plain')
+    with SpeakerRegistry(tmp_path / 'registry.db') as registry:
+        build_root(tmp_path / 'registry', registry=registry)
+    expected = read_corpus(tmp_path / 'plain')
+    assert read_corpus(tmp_path / 'registry') == expected
+    with SpeakerRegistry(tmp_path / 'registry.db') as registry:
+        row = registry.connection.execute(
+            "SELECT speaker_id FROM speakers WHERE speaker_key = ?",
+            ('#ion-popescu', )).fetchone()
+        assert row == ('Ion-Popescu', )
+
+
+def test_speakers_of_same_deputy_are_merged_only_when_resolving(tmp_path):
+    for corpus_dir in [tmp_path / 'default', tmp_path / 'resolve']:
+        for batch in SESSIONS:
+            for session_date, speakers in batch:
+                write_session(corpus_dir, session_date, speakers)
+    build_root(tmp_path / 'default', deduplicate_persons=False)
+    person_ids, speakers = read_speaker_ids(tmp_path / 'default')
+    assert 'Popescu-Ion' in person_ids
+    assert speakers == ['#Popescu-Ion', '#Maria-Dumitrescu']
+
+    builder = build_root(tmp_path / 'resolve',
+                         deduplicate_persons=False,
+                         name_resolution_threshold=0.85)
+    person_ids, speakers = read_speaker_ids(tmp_path / 'resolve')
+    assert 'Popescu-Ion' not in person_ids
+    assert speakers == ['#Ion-Popescu', '#Maria-Dumitrescu']
+    merges = [(resolution.speaker_id, resolution.person_id, resolution.method)
+              for resolution in builder.name_resolution_report
+              if resolution.method == 'deputy']
+    assert ('Popescu-Ion', 'Ion-Popescu', 'deputy') in merges
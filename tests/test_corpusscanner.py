@@ -0,0 +1,52 @@
+"""Checks which directories of the corpus are listed by the corpus scanner."""
+import os
+import pytest
+
+from corpusscanner import CorpusScanner
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+
+
+def scan(corpus_dir, tmp_path):
+    scanner = CorpusScanner(corpus_dir, cache_file=tmp_path / 'cache.json')
+    listing = scanner.scan()
+    return sorted(
+        os.path.relpath(path, corpus_dir) for path in listing.component_files)
+
+
+def test_lists_the_corpus_directory_and_the_year_directories(tmp_path):
+    corpus_dir = tmp_path / 'corpus'
+    touch(corpus_dir / 'ParlaMint-RO.xml')
+    touch(corpus_dir / '2020' / 'ParlaMint-RO_2020-02-03-CD.xml')
+    touch(corpus_dir / '2021' / 'ParlaMint-RO_2021-02-03-CD.xml.gz')
+    assert scan(corpus_dir, tmp_path) == [
+        '2020/ParlaMint-RO_2020-02-03-CD.xml',
+        '2021/ParlaMint-RO_2021-02-03-CD.xml.gz', 'ParlaMint-RO.xml'
+    ]
+
+
+def test_skips_other_and_nested_directories(tmp_path):
+    corpus_dir = tmp_path / 'corpus'
+    touch(corpus_dir / '2020' / 'ParlaMint-RO_2020-02-03-CD.xml')
+    touch(corpus_dir / '2020' / '2019' / 'ParlaMint-RO_2019-02-03-CD.xml')
+    touch(corpus_dir / 'backup' / 'ParlaMint-RO_2018-02-03-CD.xml')
+    touch(corpus_dir / '.git' / '2017' / 'ParlaMint-RO_2017-02-03-CD.xml')
+    touch(corpus_dir / '20201' / 'ParlaMint-RO_2016-02-03-CD.xml')
+    assert scan(corpus_dir,
+                tmp_path) == ['2020/ParlaMint-RO_2020-02-03-CD.xml']
+
+
+def test_does_not_follow_symbolic_links_to_directories(tmp_path):
+    corpus_dir = tmp_path / 'corpus'
+    touch(corpus_dir / '2020' / 'ParlaMint-RO_2020-02-03-CD.xml')
+    try:
+        # A link back to the corpus directory would be scanned forever.
+        os.symlink(corpus_dir, corpus_dir / '2021')
+        os.symlink(corpus_dir / '2020', corpus_dir / '2020' / '2022')
+    except (OSError, NotImplementedError):
+        pytest.skip("Symbolic links are not supported.")
+    assert scan(corpus_dir,
+                tmp_path) == ['2020/ParlaMint-RO_2020-02-03-CD.xml']
@@ -0,0 +1,165 @@
+"""Checks that the requests and the retries of the HTTP fetcher are rate limited."""
+import threading
+import pytest
+
+requests = pytest.importorskip('requests')
+pytest.importorskip('lxml')
+
+from crawling import HttpFetcher, TokenBucket, iter_concurrently  # noqa: E402
+
+URL = 'http://www.cdep.ro/pls/parlam/structura2015.mp?idm=1'
+
+
+class CountingBucket:
+    def __init__(self):
+        self.num_tokens = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            self.num_tokens += 1
+
+
+class FakeClock:
+    """Keeps the time which only advances when sleeping."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedSession:
+    """Returns the scripted status codes or raises the scripted exceptions in order."""
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.num_requests = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self.lock:
+            self.num_requests += 1
+            outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.url = url
+        response._content = url.encode('utf-8')
+        return response
+
+
+def build_fetcher(outcomes, max_retries=3):
+    fetcher = HttpFetcher(max_retries=max_retries, backoff_factor=0)
+    fetcher.session = ScriptedSession(outcomes)
+    bucket = CountingBucket()
+    fetcher.buckets['www.cdep.ro'] = bucket
+    return fetcher, bucket
+
+
+def test_each_retry_takes_a_token():
+    fetcher, bucket = build_fetcher(
+        [503, requests.ConnectionError('reset'), 429, 200])
+    assert fetcher.get(URL) == URL.encode('utf-8')
+    assert fetcher.session.num_requests == 4
+    assert bucket.num_tokens == 4
+
+
+def test_error_status_is_raised_after_last_retry():
+    fetcher, bucket = build_fetcher([500, 500, 500], max_retries=2)
+    with pytest.raises(requests.HTTPError):
+        fetcher.get(URL)
+    assert bucket.num_tokens == 3
+
+
+def test_connection_error_is_raised_after_last_retry():
+    fetcher, bucket = build_fetcher([requests.Timeout('slow')] * 2,
+                                    max_retries=1)
+    with pytest.raises(requests.Timeout):
+        fetcher.get(URL)
+    assert bucket.num_tokens == 2
+
+
+def test_client_error_is_not_retried():
+    fetcher, bucket = build_fetcher([404])
+    with pytest.raises(requests.HTTPError):
+        fetcher.get(URL)
+    assert bucket.num_tokens == 1
+
+
+def test_concurrent_requests_each_take_a_token():
+    urls = ['{}&idm={}'.format(URL, idm) for idm in range(20)]
+    fetcher, bucket = build_fetcher([200] * len(urls))
+    pages = list(iter_concurrently(fetcher.get, urls, max_workers=4))
+    assert pages == [url.encode('utf-8') for url in urls]
+    assert bucket.num_tokens == len(urls)
+
+
+def test_retry_after_is_clamped_to_max_backoff():
+    fetcher = HttpFetcher(backoff_factor=1, max_backoff=5)
+    response = requests.Response()
+    response.status_code = 503
+    response.headers['Retry-After'] = '3600'
+    assert fetcher._get_retry_delay(1, response) == 5
+    response.headers['Retry-After'] = '2'
+    assert fetcher._get_retry_delay(1, response) == 2
+    assert fetcher._get_retry_delay(1, None) == 1
+    assert fetcher._get_retry_delay(10, None) == 5
+
+
+def test_bucket_allows_burst_of_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(2, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [0.5]
+
+
+def test_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(4, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now == pytest.approx(1.0)
+    assert clock.sleeps == pytest.approx([0.25] * 4)
+
+
+def test_bucket_refill_is_limited_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(1, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    clock.now += 100
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_bucket_limits_rate_of_concurrent_threads():
+    # The waits are multiples of 0.25 seconds, so the fake time is exact.
+    clock = FakeClock()
+    lock = threading.Lock()
+
+    def sleep(seconds):
+        with lock:
+            clock.sleep(seconds)
+
+    bucket = TokenBucket(4, clock=clock, sleep=sleep)
+    threads = [
+        threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The first token is in the bucket; the other 19 are added at 4 tokens per second.
+    assert clock.now >= 4.75
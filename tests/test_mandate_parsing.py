@@ -0,0 +1,77 @@
+"""Checks that the single pass over a mandate page finds the elements matched by the XPath expressions of the page."""
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('lxml')
+
+from common import Resources  # noqa: E402
+from crawling import MandateInfoParser, MandatePageElements, XPathStrings  # noqa: E402
+
+URL = 'http://www.cdep.ro/pls/parlam/structura2015.mp?idm=7&cam=2&leg=2016'
+
+MANDATE_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<div class="boxTitleOld"><h1>Decoy NAME</h1></div>
+<div class="boxTitle"><h1>Ion <b>POPESCU</b></h1></div>
+<div class="boxTitle"><h1>Second NAME</h1></div>
+<p class="profile-pic-dep"><a href="/decoy.jpg">decoy</a></p>
+<div class="profile-pic-dep"><a href="/img/popescu.jpg"><img src="/img/popescu-small.jpg"/></a></div>
+<div class="boxDep clearfix"><h3>Activitatea parlamentară</h3><table><tr><td>Luări de cuvânt: 10</td></tr></table></div>
+<div class="boxDep clearfix">
+  <div class="boxInfo"><h3>Formațiunea politică:</h3></div>
+  <table><tr><td>PSD - din feb. 2017</td></tr></table>
+</div>
+<div class="boxDep clearfix"><h3>Grupul parlamentar:</h3><table><tr><td>Grupul parlamentar al PSD</td></tr></table></div>
+</body></html>
+"""
+
+EMPTY_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<div class="boxTitle"><h2>No name</h2></div>
+<div class="boxDep"><h3>Formațiunea politică:</h3></div></body></html>
+"""
+
+
+class MemoryFetcher:
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url):
+        return self.content.encode('utf-8')
+
+
+def find_elements_by_xpath(html_root, formatter):
+    name = html_root.xpath(XPathStrings.DeputyName)
+    anchor = html_root.xpath(XPathStrings.ProfilePic)
+    section = None
+    for heading in html_root.xpath(XPathStrings.InfoSectionHeadings):
+        text = formatter.normalize(heading.text_content())
+        if (Resources.PoliticalParty in text) or (Resources.PoliticalGroup
+                                                  in text):
+            section = heading.xpath(XPathStrings.InfoSectionOfHeading)[0]
+            break
+    return MandatePageElements(name[0] if name else None,
+                               anchor[0] if anchor else None, section)
+
+
+@pytest.mark.parametrize('page', [MANDATE_PAGE, EMPTY_PAGE])
+def test_single_pass_finds_the_elements_matched_by_xpath(page):
+    parser = MandateInfoParser(URL, 2016, fetcher=MemoryFetcher(page))
+    expected = find_elements_by_xpath(parser.html_root, parser.formatter)
+    assert parser._get_page_elements() == expected
+
+
+def test_parse_page_reads_the_first_elements_of_each_kind():
+    parser = MandateInfoParser(URL, 2016, fetcher=MemoryFetcher(MANDATE_PAGE))
+    info = parser.parse_page()
+    assert (info.deputy_id, info.first_name, info.last_name) == (7, 'Ion',
+                                                                 'POPESCU')
+    assert info.profile_picture == 'http://www.cdep.ro/img/popescu.jpg'
+    assert [affiliation.organization
+            for affiliation in info.affiliations] == ['PSD']
+
+
+def test_missing_elements_are_none():
+    parser = MandateInfoParser(URL, 2016, fetcher=MemoryFetcher(EMPTY_PAGE))
+    info = parser.parse_page()
+    assert (info.first_name, info.last_name) == (None, None)
+    assert info.profile_picture is None
+    assert info.affiliations == []
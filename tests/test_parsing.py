@@ -0,0 +1,108 @@
+"""Checks that the speaker headers and the stage directions are parsed as by the regexes they replace, in linear time."""
+import random
+import re
+import time
+import pytest
+
+etree = pytest.importorskip('lxml.etree')
+
+from parsing import remove_speaker_titles, remove_stage_directions  # noqa: E402
+from parsing import Segment  # noqa: E402
+
+# The regexes used before the scanners; they backtrack on long lines with many parentheses.
+OLD_SPEAKER_TITLE_REGEX = re.compile(r'domnul|doamna|(\(.+\)*)?:',
+                                     re.MULTILINE | re.IGNORECASE)
+OLD_PARENTHESES_REGEX = re.compile(r'\s\([^)]+\)*',
+                                   re.MULTILINE | re.IGNORECASE)
+
+TRANSCRIPT_LINES = [
+    "Domnul Ion Popescu:",
+    "Doamna Maria Ionescu:",
+    "Domnul Florin Iordache - președinte:",
+    "Domnul Ludovic Orban (din loja Guvernului):",
+    "Doamna Raluca Turcan (de la tribuna Camerei):",
+    "Domnul Marcel Ciolacu (din sală): Domnule președinte, vă rog!",
+    "Domnul Ion Popescu:\nStimați colegi, (aplauze) declar deschisă ședința.",
+    "DOMNUL Vasile Ionescu (PSD):",
+    "Domnul Nicolae-Ionel Ciucă, prim-ministru al României:",
+    "Vă mulțumesc. (Aplauze.) (Rumoare în sală.)",
+    "Proiectul a fost adoptat (cu 150 de voturi pentru) și se trimite la Senat.",
+    "Articolul 2 (alineatul (1) și (2)) rămâne nemodificat.",
+    "Ședința s-a încheiat la ora 13.45.",
+    "Lucrările ședinței au fost conduse de domnul Ion Popescu (vicepreședinte).",
+    "Punctul 3 de pe ordinea de zi: ( ) nu există text.",
+    "(Se votează.)",
+    "Domnul Ion Popescu:\n(Domnul Vasile Ionescu dorește să intervină.):",
+]
+
+FRAGMENTS = [
+    '(', ')', ':', ' ', '\n', '\t', '\u00a0', '\u2028', 'a', 'Ion', '-',
+    'domnul', 'Doamna', 'DOMNUL', 'doamn', 'președinte', '(PSD)', '):'
+]
+
+
+def fuzzed_strings(count, seed=2021):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(
+            rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 20)))
+
+
+@pytest.mark.parametrize('text', TRANSCRIPT_LINES)
+def test_remove_speaker_titles_matches_regex_on_transcript_lines(text):
+    assert remove_speaker_titles(text) == OLD_SPEAKER_TITLE_REGEX.sub('', text)
+
+
+@pytest.mark.parametrize('text', TRANSCRIPT_LINES)
+def test_remove_stage_directions_matches_regex_on_transcript_lines(text):
+    assert remove_stage_directions(text) == OLD_PARENTHESES_REGEX.sub('', text)
+
+
+def test_remove_speaker_titles_matches_regex_on_fuzzed_strings():
+    for text in fuzzed_strings(20000):
+        assert remove_speaker_titles(text) == OLD_SPEAKER_TITLE_REGEX.sub(
+            '', text), repr(text)
+
+
+def test_remove_stage_directions_matches_regex_on_fuzzed_strings():
+    for text in fuzzed_strings(20000, seed=2022):
+        assert remove_stage_directions(text) == OLD_PARENTHESES_REGEX.sub(
+            '', text), repr(text)
+
+
+@pytest.mark.parametrize('html, speaker', [
+    ('<p>Domnul Florin Iordache - președinte:</p>', 'Florin Iordache'),
+    ('<p>Doamna Raluca Turcan (din sală):</p>', 'Raluca Turcan'),
+    ('<p>Domnul Ion Popescu:</p>', 'Ion Popescu'),
+])
+def test_segment_parses_speaker(html, speaker):
+    segment = Segment(etree.fromstring(html))
+    assert segment.is_speaker
+    assert segment.get_speaker() == speaker
+
+
+def test_segment_text_has_no_stage_directions():
+    paragraph = etree.fromstring('<p>Vă mulțumesc. (Aplauze.) Continuăm.</p>')
+    assert Segment(paragraph).get_text() == 'Vă mulțumesc. Continuăm.'
+
+
+def measure(func, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        seconds = time.perf_counter() - start
+        if (best is None) or (seconds < best):
+            best = seconds
+    return best
+
+
+@pytest.mark.parametrize('func', [remove_speaker_titles, remove_stage_directions])
+@pytest.mark.parametrize('pattern', ['(a', '( )', ' (a)))', '(a:', ' ('])
+def test_running_time_is_linear_on_backtracking_inputs(func, pattern):
+    # The regexes take tens of seconds on 40k characters of these patterns.
+    small, large = 10000, 80000
+    small_seconds = measure(func, pattern * small)
+    large_seconds = measure(func, pattern * large)
+    # A linear scan takes about 8 times longer; a quadratic one would take 64 times longer.
+    assert large_seconds < 20 * max(small_seconds, 1e-4)
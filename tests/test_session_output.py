@@ -0,0 +1,97 @@
+"""Checks that the streamed and the in-memory session files have the same utterance ids and statistics."""
+from pathlib import Path
+import pytest
+
+etree = pytest.importorskip('lxml.etree')
+pytest.importorskip('dateutil')
+pytest.importorskip('babel')
+
+import parsing  # noqa: E402
+import xmlbuilder  # noqa: E402
+
+TEMPLATE_FILE = Path(__file__).resolve().parent.parent / 'data' / 'templates' / 'session-template.xml'
+
+XML_ID = '{http://www.w3.org/XML/1998/namespace}id'
+
+SESSION_HTML = """<html><head><meta charset="utf-8"></head><body>
+<p>S T E N O G R A M A ședinței din 28 ianuarie 2020 [1]</p>
+<table><tr><td>1.</td><td>Dezbateri.</td></tr></table>
+<p>Ședința a început la ora 10.00.</p>
+<p>Lucrările ședinței au fost conduse de domnul Ion Popescu.</p>
+<p>Domnul Ion Popescu:</p>
+<p>Bună ziua, stimați colegi.</p>
+<p>Doamna Maria Georgescu:</p>
+<p>Domnul Vasile Ionescu:</p>
+<p>Vă mulțumesc (Aplauze.) frumos.</p>
+<p>Domnul Ion Popescu:</p>
+<p>Continuăm.</p>
+<p>Ședința s-a încheiat la ora 12.00.</p>
+</body></html>
+"""
+
+
+@pytest.fixture
+def session_file(tmp_path, monkeypatch):
+    # Splitting on whitespace is enough to check that both paths count the same text.
+    monkeypatch.setattr(xmlbuilder, 'count_words', lambda text: len(text.split()))
+    directory = tmp_path / 'input' / '2020'
+    directory.mkdir(parents=True)
+    html_file = directory / 'ro28_01.htm'
+    html_file.write_text(SESSION_HTML, encoding='utf-8')
+    return html_file
+
+
+def build_session(session_file, output_dir, stream):
+    output_dir.mkdir()
+    builder = xmlbuilder.SessionXmlBuilder(session_file,
+                                           str(TEMPLATE_FILE),
+                                           str(output_dir),
+                                           stream_input=stream)
+    if stream:
+        builder.stream_to_file()
+    else:
+        builder.build_session_xml()
+        builder.write_to_file()
+
+
+def read_session(output_dir):
+    output_file, = Path(output_dir).glob('*.xml')
+    root = etree.parse(str(output_file)).getroot()
+    ids = [u.get(XML_ID) for u in root.iter('{*}u')]
+    quantities = [m.get('quantity') for m in root.iter('{*}measure')]
+    return ids, quantities
+
+
+def test_empty_utterances_use_up_an_id(session_file, tmp_path):
+    build_session(session_file, tmp_path / 'memory', stream=False)
+    ids, _ = read_session(tmp_path / 'memory')
+    assert [utterance_id.split('.')[-1] for utterance_id in ids] == ['u1', 'u3', 'u4']
+
+
+def test_streamed_session_matches_in_memory_session(session_file, tmp_path):
+    build_session(session_file, tmp_path / 'memory', stream=False)
+    build_session(session_file, tmp_path / 'stream', stream=True)
+    assert read_session(tmp_path / 'stream') == read_session(tmp_path / 'memory')
+
+
+@pytest.mark.parametrize('file_name', ['session.xml', 'session.xml.gz'])
+def test_failed_stream_leaves_no_output_file(session_file, tmp_path,
+                                             monkeypatch, file_name):
+    get_text = parsing.Segment.get_text
+
+    def failing_get_text(segment):
+        text = get_text(segment)
+        if text.startswith('Continuăm'):
+            raise ValueError("Could not parse segment.")
+        return text
+
+    monkeypatch.setattr(parsing.Segment, 'get_text', failing_get_text)
+    output_dir = tmp_path / 'stream'
+    output_dir.mkdir()
+    builder = xmlbuilder.SessionXmlBuilder(session_file,
+                                           str(TEMPLATE_FILE),
+                                           str(output_dir),
+                                           stream_input=True)
+    with pytest.raises(ValueError):
+        builder.stream_to_file(file_name)
+    assert list(output_dir.iterdir()) == []
@@ -0,0 +1,50 @@
+"""Checks the assignment of speaker ids by the speaker registry."""
+from common import DeputyInfo
+from speakerregistry import SpeakerRegistry
+
+
+def count_speakers(db_file):
+    with SpeakerRegistry(db_file) as registry:
+        return registry.connection.execute(
+            "SELECT COUNT(*) FROM speakers").fetchone()[0]
+
+
+def test_register_speaker_reuses_id_of_key(tmp_path):
+    with SpeakerRegistry(tmp_path / 'registry.db') as registry:
+        assert registry.register_speaker('Ion-Popescu') == 'Ion-Popescu'
+        assert registry.register_speaker('ION-POPESCU') == 'Ion-Popescu'
+
+
+def test_new_speaker_is_saved_when_registered(tmp_path):
+    db_file = tmp_path / 'registry.db'
+    with SpeakerRegistry(db_file) as registry:
+        registry.register_speaker('Ion-Popescu')
+        registry.register_speaker('Maria-Ionescu')
+        assert count_speakers(db_file) == 2
+    with SpeakerRegistry(db_file) as registry:
+        assert registry.register_speaker('ion-popescu') == 'Ion-Popescu'
+
+
+def test_processes_sharing_the_registry_use_the_first_id(tmp_path):
+    db_file = tmp_path / 'registry.db'
+    with SpeakerRegistry(db_file) as first, SpeakerRegistry(db_file) as second:
+        assert second.register_speaker('ION-POPESCU') == 'ION-POPESCU'
+        assert first.register_speaker('Ion-Popescu') == 'ION-POPESCU'
+        assert second.register_speaker('Ion-Popescu') == 'ION-POPESCU'
+
+
+def test_name_map_queries_each_key_once(tmp_path):
+    deputy = DeputyInfo('Ion', 'Popescu', 'M', None)
+    with SpeakerRegistry(tmp_path / 'registry.db') as registry:
+        registry.import_name_map({'ion-popescu': deputy})
+        queries = []
+        registry.connection.set_trace_callback(queries.append)
+        for _ in range(3):
+            assert 'ion-popescu' in registry.name_map
+            assert registry.name_map['ion-popescu'] == deputy
+            assert registry.name_map.get('maria-ionescu') is None
+        assert len(queries) == 2
+        registry.connection.set_trace_callback(None)
+        registry.import_name_map({'maria-ionescu': deputy})
+        assert 'ion-popescu' not in registry.name_map
+        assert registry.name_map['maria-ionescu'] == deputy
@@ -1,16 +1,117 @@
 """Utility classes and functions for building XML."""
 import logging
-from babel.dates import format_date
 from lxml import etree
 from common import Resources
 from parsing import parse_organization_name, SessionParser
-from nltk.tokenize import word_tokenize
+from parsing import StreamingSessionParser
 from pathlib import Path
 from common import StringFormatter
-from common import build_speaker_id, Gender, OrganizationType
+from common import build_speaker_id, get_element_text, DeputyInfo, Gender, OrganizationType
+from common import add_compression_suffix, get_compression, open_compressed
+from common import strip_compression_suffix
+from corpusscanner import CorpusScanner
+from nameresolution import NameResolution, NameResolutionIndex, fold_name, sort_tokens
 import subprocess
-from collections import namedtuple
-from dateutil import parser
+import threading
+import hashlib
+import os
+import shutil
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def format_date(date, format='medium', locale=None):
+    """Formats the date using the pattern and the locale.
+
+    The `babel` package is imported on the first call because importing it slows down the startup of the scripts.
+    The results are cached because the same dates, e.g. the start and end dates of the terms,
+    are formatted many times and Babel parses the pattern and looks up the locale on each call.
+
+    Parameters
+    ----------
+    date: datetime.date, required
+        The date to format.
+    format: str, optional
+        The date pattern, e.g. `yyyy-MM-dd`. Default is `medium`.
+    locale: str, optional
+        The locale of the month names. Default is None which means the locale of the environment.
+
+    Returns
+    -------
+    date_string: str
+        The formatted date.
+    """
+    from babel.dates import format_date as babel_format_date
+    if locale is None:
+        return babel_format_date(date, format)
+    return babel_format_date(date, format, locale=locale)
+
+
+SessionDates = namedtuple(
+    "SessionDates",
+    ['iso', 'dotted', 'compact', 'heading', 'title_ro', 'title_en'])
+
+
+def build_session_dates(session_date):
+    """Formats the session date in all the forms used by the session file.
+
+    Parameters
+    ----------
+    session_date: datetime.date, required
+        The date of the session.
+
+    Returns
+    -------
+    session_dates: SessionDates
+        The session date formatted as `yyyy-MM-dd`, `dd.MM.yyyy`, `yyyyMMdd`,
+        and as the dates of the session heading and of the Romanian and English titles.
+    """
+    return SessionDates(
+        iso=format_date(session_date, "yyyy-MM-dd"),
+        dotted=format_date(session_date, "dd.MM.yyyy"),
+        compact=format_date(session_date, "yyyyMMdd"),
+        heading=format_date(session_date, "d MMMM yyyy"),
+        title_ro=format_date(session_date, "d MMMM yyyy", locale="ro"),
+        title_en=format_date(session_date, "MMMM d yyyy", locale="en"))
+
+
+def parse_date(date_string):
+    """Parses the date from the string.
+
+    The `dateutil` package is imported on the first call because importing it slows down the startup of the scripts.
+
+    Parameters
+    ----------
+    date_string: str, required
+        The date to parse, e.g. `2020-02-03`.
+
+    Returns
+    -------
+    date: datetime.datetime
+        The parsed date.
+    """
+    from dateutil import parser
+    return parser.parse(date_string)
+
+
+def count_words(text):
+    """Counts the words of the text using the `nltk` tokenizer.
+
+    The `nltk` package is imported on the first call because importing it takes longer than the rest of the module.
+
+    Parameters
+    ----------
+    text: str, required
+        The text to count the words of.
+
+    Returns
+    -------
+    num_words: int
+        The number of tokens in the text.
+    """
+    from nltk.tokenize import word_tokenize
+    return len(word_tokenize(text))
 
 
 class XmlElements:
@@ -55,6 +156,7 @@ class XmlElements:
     pc = '{http://www.tei-c.org/ns/1.0}pc'
     linkGrp = '{http://www.tei-c.org/ns/1.0}linkGrp'
     link = '{http://www.tei-c.org/ns/1.0}link'
+    include = '{http://www.w3.org/2001/XInclude}include'
 
 
 class XmlAttributes:
@@ -86,6 +188,24 @@ class XmlAttributes:
     type_ = 'type'
     target = 'target'
     corresp = 'corresp'
+    href = 'href'
+
+
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+# The elements counted in the tagUsage of a session keyed by their name.
+SESSION_TAG_USAGE = {
+    "text": XmlElements.text,
+    "body": XmlElements.body,
+    "div": XmlElements.div,
+    "head": XmlElements.head,
+    "note": XmlElements.note,
+    "u": XmlElements.u,
+    "seg": XmlElements.seg,
+    "kinesic": XmlElements.kinesic,
+    "desc": XmlElements.desc,
+    "gap": XmlElements.gap
+}
 
 
 class SessionXmlBuilder:
@@ -95,24 +215,39 @@ class SessionXmlBuilder:
                  input_file,
                  template_file,
                  output_directory,
-                 output_file_prefix='ParlaMint-RO'):
+                 output_file_prefix='ParlaMint-RO',
+                 speaker_registry=None,
+                 stream_input=False,
+                 compression=None):
         """Create a new instance of SessionXmlBuilder class.
 
         Parameters
         ----------
-        input_file: str, required
-            The path to the HTML file containing the session transcription.
+        input_file: str, pathlib.Path or archives.ArchiveMember, required
+            The path to the HTML file containing the session transcription or the member of an archive.
         template_file: str, required
             The path to the file containing the XML template of the output.
         output_directory: str, required
             The path to the output directory.
         output_file_prefix: str, optional
             The prefix of the output file name. Default is `ParlaMint-RO`.
+        speaker_registry: speakerregistry.SpeakerRegistry, optional
+            The registry used to assign the ids of the speakers. Default is None.
+        stream_input: bool, optional
+            Specifies whether to read the body of the transcription as it is parsed
+            instead of loading the whole HTML file in memory. Default is False.
+        compression: str, optional
+            The codec used to compress the output file. Default is None which means no compression.
         """
-        self.parser = SessionParser(input_file)
+        if stream_input:
+            self.parser = StreamingSessionParser(input_file)
+        else:
+            self.parser = SessionParser(input_file)
         self.formatter = StringFormatter()
         self.output_directory = output_directory
         self.output_file_prefix = output_file_prefix
+        self.speaker_registry = speaker_registry
+        self.compression = compression
         self.element_tree = parse_xml_file(template_file)
         self.xml = self.element_tree.getroot()
         for div in self.xml.iterdescendants(XmlElements.div):
@@ -136,58 +271,238 @@ class SessionXmlBuilder:
             Specifies whether to use `xmllint` program for formatting the output xml.
             Default is `False`.
         """
-        if not file_name:
-            file_name = "{}.xml".format(self.id_builder.session_id)
-        if group_by_year:
-            year = str(self.session_date.year)
-            directory = Path(self.output_directory, year)
-            if not directory.exists():
-                directory.mkdir(parents=True, exist_ok=True)
-            file_name = Path(directory, file_name)
-        else:
-            file_name = Path(self.output_directory, file_name)
-
-        file_name = str(file_name)
+        file_name = self._get_output_file_name(file_name, group_by_year)
         save_xml(self.element_tree, file_name, use_xmllint=use_xmllint)
 
+    def stream_to_file(self,
+                       file_name=None,
+                       group_by_year=False,
+                       use_xmllint=False):
+        """Builds the session XML and writes the utterances to file as they are parsed.
+
+        Only the header, the utterance being built and the text of the body are kept in memory.
+        The counts from the header are updated after the body is written.
+        The session is written to a temporary file which replaces the output file only when it is complete.
+
+        Parameters
+        ----------
+        file_name: str, optional
+            The name of the output file. Default is the session id.
+        group_by_year: boolean, optional
+            Specifies whether to group output files into directories by year.
+            Default is `False`.
+        use_xmllint: boolean, optional
+            Specifies whether to use `xmllint` program for formatting the output xml.
+            Default is `False`.
+        """
+        self._build_session_header()
+        self._build_session_heading()
+        file_name = self._get_output_file_name(file_name, group_by_year)
+        self.tag_counts = Counter()
+        self.num_speeches = 0
+        # The words are counted on the whole text of the debate section, as in `_get_num_words`.
+        self.debate_text = [self.debate_section.text or '']
+        nsmap = dict(self.xml.nsmap)
+        # Declaring the xml prefix keeps lxml from binding the namespace of xml:id to a generated prefix.
+        nsmap['xml'] = XML_NAMESPACE
+        # The temporary file keeps the compression suffix from which the codec is inferred.
+        temp_file = add_compression_suffix(
+            strip_compression_suffix(file_name) + '.tmp',
+            get_compression(file_name))
+        try:
+            with open_compressed(temp_file, 'wb') as output_file:
+                with etree.xmlfile(output_file, encoding='UTF-8') as xf:
+                    xf.write_declaration()
+                    self._stream_element(xf, self.xml, 0, nsmap)
+                output_file.write(b'\n')
+            patch_xml_header(temp_file, self._patch_streamed_header)
+            if use_xmllint:
+                apply_xmllint(temp_file)
+            os.replace(temp_file, file_name)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
     def build_session_xml(self):
         """Builds the session XML from its transcription.
         """
+        self._build_session_header()
+        self._build_session_heading()
+        self._build_session_body()
+        self._build_session_footer()
+        self._cleanup_xml()
+        self._set_session_stats()
+        self._set_tag_usage()
+
+    def _build_session_header(self):
+        """Parses the date and type of the session and fills in the header.
+        """
         self.session_date = self.parser.parse_session_date()
+        self.session_dates = build_session_dates(self.session_date)
         self.session_type = self.parser.parse_session_type()
         self.id_builder = XmlIdBuilder(self.output_file_prefix,
-                                       self.session_date)
+                                       self.session_date,
+                                       self.speaker_registry)
         self._set_session_id()
         self._set_session_title()
         self._set_meeting_info()
         self._set_session_idno()
         self._set_session_date()
 
-        self._build_session_heading()
-        self._build_session_body()
-        self._build_session_footer()
-        self._cleanup_xml()
-        self._set_session_stats()
-        self._set_tag_usage()
+    def _get_output_file_name(self, file_name, group_by_year):
+        """Builds the path of the output file and creates its directory if needed.
+
+        Parameters
+        ----------
+        file_name: str, required
+            The name of the output file; may be None in which case the session id is used.
+        group_by_year: boolean, required
+            Specifies whether to group output files into directories by year.
+
+        Returns
+        -------
+        file_name: str
+            The path of the output file.
+        """
+        if not file_name:
+            file_name = add_compression_suffix(
+                "{}.xml".format(self.id_builder.session_id), self.compression)
+        if group_by_year:
+            year = str(self.session_date.year)
+            directory = Path(self.output_directory, year)
+            if not directory.exists():
+                directory.mkdir(parents=True, exist_ok=True)
+            file_name = Path(directory, file_name)
+        else:
+            file_name = Path(self.output_directory, file_name)
+
+        return str(file_name)
+
+    def _stream_element(self, xf, element, depth, nsmap=None):
+        """Writes the element to the XML file and streams the session body into the debate section.
+
+        Parameters
+        ----------
+        xf: etree.xmlfile, required
+            The file being written.
+        element: etree.Element, required
+            The element of the template to write.
+        depth: int, required
+            The depth of the element used for indentation.
+        nsmap: dict, optional
+            The namespaces to declare on the element. Default is None.
+        """
+        is_ancestor = element in self.debate_section.iterancestors()
+        if (element is not self.debate_section) and not is_ancestor:
+            write_element(xf, element, depth, self.tag_counts)
+            return
+        self.tag_counts[element.tag] += 1
+        indent = '\n' + '  ' * (depth + 1)
+        with xf.element(element.tag, dict(element.attrib), nsmap=nsmap):
+            for child in element:
+                xf.write(indent)
+                if is_ancestor:
+                    self._stream_element(xf, child, depth + 1)
+                else:
+                    self._write_debate_element(xf, child, depth + 1)
+            if element is self.debate_section:
+                for child in self._iter_session_body():
+                    if child.tag == XmlElements.u:
+                        # Empty utterances use up an id as in `_cleanup_xml`.
+                        utterance_id = self.id_builder.build_utterance_id()
+                        if len(child) == 0:
+                            continue
+                        child.set(XmlAttributes.xml_id, utterance_id)
+                        self.num_speeches += 1
+                    xf.write(indent)
+                    self._write_debate_element(xf, child, depth + 1)
+                footer = self._build_end_time_note()
+                if footer is not None:
+                    xf.write(indent)
+                    self._write_debate_element(xf, footer, depth + 1)
+            xf.write(indent[:-2])
+
+    def _write_debate_element(self, xf, element, depth):
+        """Writes a child of the debate section and collects its text for counting the words.
+
+        Parameters
+        ----------
+        xf: etree.xmlfile, required
+            The file being written.
+        element: etree.Element, required
+            The child of the debate section.
+        depth: int, required
+            The depth of the element used for indentation.
+        """
+        self.debate_text.extend(element.itertext())
+        if element.tail is not None:
+            self.debate_text.append(element.tail)
+        write_element(xf, element, depth, self.tag_counts)
+
+    def _patch_streamed_header(self, root):
+        """Updates the tag usage and statistics in the header of the streamed file.
+
+        Parameters
+        ----------
+        root: etree.Element, required
+            The root element containing only the header.
+        """
+        counts = {
+            name: self.tag_counts[tag]
+            for name, tag in SESSION_TAG_USAGE.items()
+        }
+        self._write_tag_usage(root, counts)
+        num_words = count_words("".join(self.debate_text))
+        self._write_session_stats(root, self.num_speeches, num_words)
 
     def _cleanup_xml(self):
-        for u in self.debate_section.iterdescendants(tag=XmlElements.u):
+        utterances = list(
+            self.debate_section.iterdescendants(tag=XmlElements.u))
+        for u in utterances:
+            # Empty utterances use up an id so that the ids of the existing files do not change.
+            utterance_id = self.id_builder.build_utterance_id()
             if len(u) == 0:
                 self.debate_section.remove(u)
-            u.set(XmlAttributes.xml_id, self.id_builder.build_utterance_id())
+                continue
+            u.set(XmlAttributes.xml_id, utterance_id)
 
     def _build_session_footer(self):
         """Adds the end time segment(s) to the session description.
         """
+        note = self._build_end_time_note()
+        if note is not None:
+            self.debate_section.append(note)
+
+    def _build_end_time_note(self):
+        """Builds the note containing the end time of the session.
+
+        Returns
+        -------
+        note: etree.Element
+            The note element or None if the end time was not found.
+        """
         end_time = self.parser.parse_session_end_time()
-        if end_time is not None:
-            note = etree.SubElement(self.debate_section, XmlElements.note)
-            note.set(XmlAttributes.element_type, "time")
-            note.text = self.formatter.to_single_line(end_time)
+        if end_time is None:
+            return None
+        note = etree.Element(XmlElements.note)
+        note.set(XmlAttributes.element_type, "time")
+        note.text = self.formatter.to_single_line(end_time)
+        return note
 
     def _build_session_body(self):
         """Adds the session segments to the session description.
         """
+        for element in self._iter_session_body():
+            self.debate_section.append(element)
+
+    def _iter_session_body(self):
+        """Builds the notes and utterances of the session body.
+
+        Returns
+        -------
+        elements: generator of etree.Element
+            The notes and the utterances in document order; each utterance is returned after its last segment.
+        """
         is_first = True
         utterance = None
         for segment in self.parser.parse_session_segments():
@@ -195,19 +510,21 @@ class SessionXmlBuilder:
             if len(text) == 0:
                 continue
             if segment.is_speaker:
-                note = etree.SubElement(self.debate_section, XmlElements.note)
+                if utterance is not None:
+                    yield utterance
+                note = etree.Element(XmlElements.note)
                 note.set(XmlAttributes.element_type, "speaker")
                 note.text = self.formatter.to_single_line(text)
+                yield note
 
                 if segment.has_note:
-                    note = etree.SubElement(self.debate_section,
-                                            XmlElements.note)
+                    note = etree.Element(XmlElements.note)
                     note.set(XmlAttributes.element_type, "editorial")
                     note.text = self.formatter.to_single_line(
                         segment.get_note_text())
+                    yield note
 
-                utterance = etree.SubElement(self.debate_section,
-                                             XmlElements.u)
+                utterance = etree.Element(XmlElements.u)
                 if is_first:
                     chairman = self.formatter.to_single_line(
                         segment.get_speaker())
@@ -222,6 +539,8 @@ class SessionXmlBuilder:
                 seg.set(XmlAttributes.xml_id,
                         self.id_builder.build_segment_id())
                 seg.text = self.formatter.to_single_line(text)
+        if utterance is not None:
+            yield utterance
 
     def _build_session_heading(self):
         """Adds the head elements to session description.
@@ -232,17 +551,17 @@ class SessionXmlBuilder:
         session_head = etree.SubElement(self.debate_section, XmlElements.head)
         session_head.set(XmlAttributes.element_type, "session")
         session_head.text = Resources.SessionHeading.format(
-            format_date(self.session_date, "d MMMM yyyy"))
+            self.session_dates.heading)
 
         summary = self.parser.parse_session_summary()
         if len(summary) > 0:
             note = etree.SubElement(self.debate_section, XmlElements.note)
             note.set(XmlAttributes.element_type, "editorial")
             note.text = Resources.ToC
-        for summary_line in self.parser.parse_session_summary():
+        for summary_line in self.formatter.normalize_many(summary):
             note = etree.SubElement(self.debate_section, XmlElements.note)
             note.set(XmlAttributes.element_type, "summary")
-            note.text = self.formatter.normalize(summary_line)
+            note.text = summary_line
         heading = self.parser.parse_session_heading()
         if heading is not None:
             note = etree.SubElement(self.debate_section, XmlElements.note)
@@ -262,21 +581,24 @@ class SessionXmlBuilder:
     def _set_tag_usage(self):
         """Updates the values for tagUsage elements.
         """
-        name_map = {
-            "text": XmlElements.text,
-            "body": XmlElements.body,
-            "div": XmlElements.div,
-            "head": XmlElements.head,
-            "note": XmlElements.note,
-            "u": XmlElements.u,
-            "seg": XmlElements.seg,
-            "kinesic": XmlElements.kinesic,
-            "desc": XmlElements.desc,
-            "gap": XmlElements.gap
+        counts = {
+            name: self._get_num_occurences(tag)
+            for name, tag in SESSION_TAG_USAGE.items()
         }
-        for tag_usage in self.xml.iterdescendants(tag=XmlElements.tagUsage):
-            tag_name = name_map[tag_usage.get(XmlAttributes.gi)]
-            num_occurences = self._get_num_occurences(tag_name)
+        self._write_tag_usage(self.xml, counts)
+
+    def _write_tag_usage(self, root, counts):
+        """Sets the number of occurences of each tag in the tagUsage elements.
+
+        Parameters
+        ----------
+        root: etree.Element, required
+            The root element of the session.
+        counts: dict of (str, int), required
+            The number of occurences keyed by the name of the tag.
+        """
+        for tag_usage in root.iterdescendants(tag=XmlElements.tagUsage):
+            num_occurences = counts[tag_usage.get(XmlAttributes.gi)]
             tag_usage.set(XmlAttributes.occurs, str(num_occurences))
 
     def _get_num_occurences(self, tag):
@@ -302,26 +624,37 @@ class SessionXmlBuilder:
         for date in self.xml.iterdescendants(tag=XmlElements.date):
             parent_tag = date.getparent().tag
             if parent_tag == XmlElements.setting or parent_tag == XmlElements.bibl:
-                date.set(XmlAttributes.when,
-                         format_date(self.session_date, "yyyy-MM-dd"))
-                date.text = format_date(self.session_date, "dd.MM.yyyy")
+                date.set(XmlAttributes.when, self.session_dates.iso)
+                date.text = self.session_dates.dotted
 
     def _set_session_idno(self):
         """Updates the vale of `idno` element.
         """
         for idno in self.xml.iterdescendants(tag=XmlElements.idno):
             if idno.get(XmlAttributes.element_type) == 'URI':
-                date = format_date(self.session_date, "yyyyMMdd")
                 idno.text = "http://www.cdep.ro/pls/steno/steno2015.data?cam=2&dat={}".format(
-                    date)
+                    self.session_dates.compact)
 
     def _set_session_stats(self):
         """Updates the session statistics of the extent element.
 
         """
-        num_speeches = self._get_num_speeches()
-        num_words = self._get_num_words()
-        for m in self.xml.iterdescendants(tag=XmlElements.measure):
+        self._write_session_stats(self.xml, self._get_num_speeches(),
+                                  self._get_num_words())
+
+    def _write_session_stats(self, root, num_speeches, num_words):
+        """Sets the number of speeches and words in the extent element.
+
+        Parameters
+        ----------
+        root: etree.Element, required
+            The root element of the session.
+        num_speeches: int, required
+            The number of speeches.
+        num_words: int, required
+            The number of words.
+        """
+        for m in root.iterdescendants(tag=XmlElements.measure):
             if m.getparent().tag != XmlElements.extent:
                 continue
             lang = m.get(XmlAttributes.lang)
@@ -344,8 +677,7 @@ class SessionXmlBuilder:
             The number of words in the transcription.
         """
         text = "".join(self.debate_section.itertext())
-        num_words = len(word_tokenize(text))
-        return num_words
+        return count_words(text)
 
     def _get_num_speeches(self):
         """Computes the number of speeches (a.k.a. utterances).
@@ -363,15 +695,14 @@ class SessionXmlBuilder:
         """Sets the contents of the meeting element.
 
         """
-        meeting_n = format_date(self.session_date, "yyyyMMdd")
         for meeting in self.xml.iterdescendants(tag=XmlElements.meeting):
-            meeting.set(XmlAttributes.meeting_n, meeting_n)
+            meeting.set(XmlAttributes.meeting_n, self.session_dates.compact)
 
     def _set_session_title(self):
         """Sets the contents of th title elements.
         """
-        ro_date = format_date(self.session_date, "d MMMM yyyy", locale="ro")
-        en_date = format_date(self.session_date, "MMMM d yyyy", locale="en")
+        ro_date = self.session_dates.title_ro
+        en_date = self.session_dates.title_en
 
         for elem in self.xml.iterdescendants(tag=XmlElements.title):
             if elem.getparent().tag != XmlElements.titleStmt:
@@ -400,17 +731,57 @@ class SessionXmlBuilder:
 def apply_xmllint(file_name):
     """Formats the specified file using xmllint.
 
+    Compressed files are decompressed into the standard input of xmllint and its output is compressed back.
+
     Parameters
     ----------
     file_name: str, required
         The full name of the file to be formatted.
     """
     logging.info("Formatting file [{}] using xmllint.".format(file_name))
-    proc = subprocess.Popen(
-        ['xmllint', '--format', '--output', file_name, file_name],
-        stderr=subprocess.PIPE,
-        stdout=subprocess.PIPE)
-    proc.wait()
+    compression = get_compression(file_name)
+    if compression is None:
+        proc = subprocess.Popen(
+            ['xmllint', '--format', '--output', file_name, file_name],
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE)
+        proc.wait()
+        return
+
+    temp_file = "{}.tmp".format(file_name)
+    proc = subprocess.Popen(['xmllint', '--format', '-'],
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL)
+    with open_compressed(file_name, 'rb') as source:
+        # The input is written from another thread so that xmllint never blocks on a full output pipe.
+        writer = threading.Thread(target=_copy_and_close,
+                                  args=(source, proc.stdin))
+        writer.start()
+        with open_compressed(temp_file, 'wb', compression) as target:
+            shutil.copyfileobj(proc.stdout, target, 1 << 16)
+        writer.join()
+    if proc.wait() != 0:
+        logging.error("Could not format file [{}] using xmllint.".format(
+            file_name))
+        os.remove(temp_file)
+        return
+    os.replace(temp_file, file_name)
+
+
+def _copy_and_close(source, target):
+    """Copies the source file object into the target and closes the target.
+    """
+    try:
+        shutil.copyfileobj(source, target, 1 << 16)
+    except BrokenPipeError:
+        # The reader exited early; its exit status reports the error.
+        pass
+    finally:
+        try:
+            target.close()
+        except BrokenPipeError:
+            pass
 
 
 def parse_xml_file(file_name):
@@ -427,12 +798,58 @@ def parse_xml_file(file_name):
         The XML tree from the file.
     """
     parser = etree.XMLParser(remove_blank_text=True)
-    xml_tree = etree.parse(file_name, parser)
+    if get_compression(file_name) is None:
+        xml_tree = etree.parse(file_name, parser)
+    else:
+        with open_compressed(file_name) as xml_file:
+            xml_tree = etree.parse(xml_file, parser)
     for element in xml_tree.iter():
         element.tail = None
     return xml_tree
 
 
+ComponentSummary = namedtuple("ComponentSummary",
+                              ['tag_usage', 'session_date', 'speaker_ids'])
+
+
+def read_component_summary(file_name):
+    """Reads the data needed for building the corpus root from a component file without loading the whole tree.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The name of the component file.
+
+    Returns
+    -------
+    summary: ComponentSummary
+        The named tuple containing the values of `tagUsage` elements as a dict,
+        the value of `when` attribute of the session date and the ids of the speakers in order of appearance.
+    """
+    tag_usage, session_date, speaker_ids = {}, None, {}
+    tags = (XmlElements.tagUsage, XmlElements.date, XmlElements.u)
+    with open_compressed(file_name) as xml_file:
+        for _, element in etree.iterparse(xml_file,
+                                          events=('end', ),
+                                          tag=tags):
+            if element.tag == XmlElements.tagUsage:
+                tag_usage[element.get(XmlAttributes.gi)] = int(
+                    element.get(XmlAttributes.occurs))
+            elif element.tag == XmlElements.date:
+                if element.getparent().tag == XmlElements.bibl:
+                    session_date = element.get(XmlAttributes.when)
+            else:
+                speaker_ids[element.get(XmlAttributes.who)] = None
+            # Discard the processed element and the siblings before it
+            # to keep the memory bounded by the size of one utterance.
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    return ComponentSummary(tag_usage=tag_usage,
+                            session_date=session_date,
+                            speaker_ids=list(speaker_ids))
+
+
 def save_xml(xml, file_name, use_xmllint=True):
     """Saves the provided XML tree to the specified file and optionally applies xmllint.
 
@@ -446,15 +863,165 @@ def save_xml(xml, file_name, use_xmllint=True):
         Specifies whether to apply xmllint or not.
         Default is `True`.
     """
-    xml.write(file_name,
-              pretty_print=True,
-              encoding='utf-8',
-              xml_declaration=True)
+    with open_compressed(file_name, 'wb') as xml_file:
+        xml.write(xml_file,
+                  pretty_print=True,
+                  encoding='utf-8',
+                  xml_declaration=True)
     if use_xmllint:
         apply_xmllint(file_name)
 
 
-def add_component_file_to_corpus_root(component_file, corpus_root):
+def write_element(xf, element, depth=0, tag_counts=None):
+    """Writes the element and its descendants to an incremental XML file, indenting the element-only content.
+
+    The elements are written through `xf.element` so that they reuse the namespace declarations of their ancestors.
+
+    Parameters
+    ----------
+    xf: etree.xmlfile, required
+        The file being written.
+    element: etree.Element, required
+        The element to write.
+    depth: int, optional
+        The depth of the element used for indentation. Default is 0.
+    tag_counts: collections.Counter, optional
+        The counter to which to add the tags of the written elements. Default is None.
+    """
+    if not isinstance(element.tag, str):
+        # Comments and processing instructions
+        xf.write(element, with_tail=False)
+        return
+    if tag_counts is not None:
+        tag_counts[element.tag] += 1
+    is_indented = (len(element) > 0) and (element.text is None) and all(
+        child.tail is None for child in element)
+    indent = '\n' + '  ' * (depth + 1)
+    with xf.element(element.tag, dict(element.attrib)):
+        if element.text is not None:
+            xf.write(element.text)
+        for child in element:
+            if is_indented:
+                xf.write(indent)
+            write_element(xf, child, depth + 1, tag_counts)
+            if child.tail is not None:
+                xf.write(child.tail)
+        if is_indented:
+            xf.write(indent[:-2])
+
+
+def patch_xml_header(file_name,
+                     patch,
+                     header_tag=b'teiHeader',
+                     chunk_size=1 << 16):
+    """Applies the patch to the header of the XML file and copies the rest of the file as raw bytes.
+
+    Only the root element and the header are parsed, therefore the patch
+    must not access or modify anything that follows the header.
+
+    Parameters
+    ----------
+    file_name: str, required
+        The path of the file to patch.
+    patch: callable, required
+        The function that receives the root element containing only the header and changes it in place.
+        If the function returns False the file is left untouched.
+    header_tag: bytes, optional
+        The name of the header element. Default is `teiHeader`.
+    chunk_size: int, optional
+        The size of the chunks in which the file is read. Default is 64 KiB.
+
+    Returns
+    -------
+    is_changed: bool
+        True if the file was rewritten; False otherwise.
+    """
+    end_mark = b'</' + header_tag + b'>'
+    temp_file = "{}.tmp".format(file_name)
+    compression = get_compression(file_name)
+    with open_compressed(file_name, 'rb', compression) as source:
+        buffer = b''
+        end = -1
+        while end < 0:
+            chunk = source.read(chunk_size)
+            if len(chunk) == 0:
+                raise ValueError("Could not find the end of {} in file {}.".format(
+                    header_tag.decode(), file_name))
+            search_start = max(0, len(buffer) - len(end_mark))
+            buffer = buffer + chunk
+            end = buffer.find(end_mark, search_start)
+        end = end + len(end_mark)
+        prolog, root = _parse_partial_root(buffer[:end])
+        if patch(root) is False:
+            return False
+        header = etree.tostring(root, encoding='utf-8', xml_declaration=False)
+        # Drop the closing tag of the root element; it is part of the copied remainder.
+        header = header[:header.rfind(b'</')]
+        with open_compressed(temp_file, 'wb', compression) as target:
+            target.write(prolog)
+            target.write(header)
+            target.write(buffer[end:])
+            shutil.copyfileobj(source, target, chunk_size)
+    os.replace(temp_file, file_name)
+    return True
+
+
+def _parse_partial_root(head):
+    """Parses the beginning of an XML document into a root element by closing the root element after the provided bytes.
+
+    Parameters
+    ----------
+    head: bytes, required
+        The beginning of the document, up to and including the end of an element which is a direct child of the root.
+
+    Returns
+    -------
+    (prolog, root): tuple of (bytes, etree.Element)
+        The bytes preceding the root element (XML declaration, comments etc.) and the parsed root element.
+    """
+    position = 0
+    while True:
+        position = head.index(b'<', position)
+        if head.startswith(b'<?', position):
+            position = head.index(b'?>', position) + 2
+        elif head.startswith(b'<!--', position):
+            position = head.index(b'-->', position) + 3
+        elif head.startswith(b'<!', position):
+            position = head.index(b'>', position) + 1
+        else:
+            break
+    name_end = position + 1
+    while head[name_end:name_end + 1] not in b' \t\r\n/>':
+        name_end = name_end + 1
+    root_name = head[position + 1:name_end]
+    fragment = head[position:] + b'</' + root_name + b'>'
+    root = etree.fromstring(fragment, etree.XMLParser())
+    return head[:position], root
+
+
+def get_component_href(component_file, corpus_dir=None):
+    """Builds the value of the `href` attribute which includes the component file in the corpus root.
+
+    Parameters
+    ----------
+    component_file: pathlib.Path, required
+        The path of the component file.
+    corpus_dir: pathlib.Path, optional
+        The path of the corpus directory. Default is None which means the component file is in the corpus directory.
+
+    Returns
+    -------
+    href: str
+        The path of the component file relative to the corpus directory, e.g. `2020/ParlaMint-RO_2020-01-01.xml`.
+    """
+    if corpus_dir is None:
+        return component_file.name
+    return component_file.relative_to(corpus_dir).as_posix()
+
+
+def add_component_file_to_corpus_root(component_file,
+                                      corpus_root,
+                                      corpus_dir=None):
     """Adds the `component_file` to the list of included files in the corpus.
 
     Parameters
@@ -463,8 +1030,10 @@ def add_component_file_to_corpus_root(component_file, corpus_root):
         The path of the component file.
     corpus_root: etree.Element, required
         The corpus root element.
+    corpus_dir: pathlib.Path, optional
+        The path of the corpus directory. Default is None which means the component file is in the corpus directory.
     """
-    file_name = component_file.name
+    file_name = get_component_href(component_file, corpus_dir)
     logging.info("Addind file {} to included files.".format(file_name))
     # I don't have time to investigate how to do this properly so I'm applying this hack.
     include_element = etree.fromstring(
@@ -473,10 +1042,6 @@ def add_component_file_to_corpus_root(component_file, corpus_root):
     corpus_root.append(include_element)
 
 
-DeputyInfo = namedtuple("DeputyInfo",
-                        ['first_name', 'last_name', 'gender', 'image_url'])
-
-
 class RootXmlBuilder:
     """Builds the corpus root XML file.
     """
@@ -486,7 +1051,9 @@ class RootXmlBuilder:
                  deputy_info,
                  organizations,
                  parliament_id="RoParl",
-                 id_char_replacements=None):
+                 id_char_replacements=None,
+                 registry=None,
+                 name_resolution_threshold=None):
         """Creates a new instance of RootXmlBuilder.
 
         Parameters
@@ -495,26 +1062,62 @@ class RootXmlBuilder:
             The path to the template file for corpus root.
         deputy_info: pandas.DataFrame, required
             The data frame containing deputy names, gender, and link to profile picture.
+            May be None when `registry` already contains the deputies.
         organizations: iterable of str, required
             The collection of organization names.
         parliament_id: str, optional
             The id of the organization with role='parliament'.
         id_char_replacements: dict of (str, str), optional
             A dict containing the uppercase and lowercase characters that are not valid for id strings and their replacements.
+        registry: speakerregistry.SpeakerRegistry, optional
+            The persistent registry of speakers to query and update. Default is None.
+        name_resolution_threshold: float, optional
+            The minimum similarity score for resolving unknown speakers to known deputies.
+            Default is None which means that unknown speakers are not resolved.
         """
         self.xml_root = parse_xml_file(template_file)
         self.corpus_root = self.xml_root.getroot()
+        self.parliament_id = parliament_id
         self.deputy_info = deputy_info
         self.organizations = organizations
         self.id_char_replacements = id_char_replacements if id_char_replacements is not None else {}
-        self.name_map = self._build_name_map(self.deputy_info)
+        self.registry = registry
+        if self.registry is None:
+            self.name_map = self._build_name_map(self.deputy_info)
+        else:
+            if self.deputy_info is not None:
+                self.registry.import_name_map(
+                    self._build_name_map(self.deputy_info))
+            self.name_map = self.registry.name_map
         self.male_names = set()
         self.female_names = set()
         self._split_names_by_gender()
         self.parliament_terms = self._parse_terms_list(parliament_id)
         self.existing_persons = {}
+        self.persons_by_deputy = {}
+        self.deputies_by_person = {}
         self.person_affiliations = {}
         self.ids_to_replace = {}
+        self.ids_by_canonical_id = {}
+        if self.registry is not None:
+            self.ids_to_replace = self.registry.get_id_replacements()
+        for id_string, canonical_id in self.ids_to_replace.items():
+            self.ids_by_canonical_id.setdefault(canonical_id,
+                                                set()).add(id_string)
+        self.name_resolver = None
+        self.name_resolutions = {}
+        self.deputy_merges = {}
+        self.person_merge_log = []
+        if name_resolution_threshold is not None:
+            self.name_resolver = NameResolutionIndex(
+                self.name_map, name_resolution_threshold)
+
+    @property
+    def name_resolution_report(self):
+        """Returns the list of unknown speaker ids that were resolved to known deputies and of the speakers merged into the person of their deputy.
+        """
+        return list(self.name_resolutions.values()) + list(
+            self.deputy_merges.values())
 
     @property
     def id_replacement_list(self):
@@ -526,7 +1129,8 @@ class RootXmlBuilder:
     def build_corpus_root(self,
                           corpus_dir,
                           file_name="ParlaMint-RO.xml",
-                          apply_postprocessing=True):
+                          apply_postprocessing=True,
+                          deduplicate_persons=True):
         """Builds the corpus root file by aggregating corpus files in corpus_dir.
 
         Parameters
@@ -538,23 +1142,346 @@ class RootXmlBuilder:
         apply_postprocessing: bool, optional
             Specifies whether to apply any postprocessing actions like replacing invalid characters in ids.
             Default is True.
+        deduplicate_persons: bool, optional
+            Specifies whether to merge the duplicate entries of the persons list.
+            Default is True.
         """
         self.corpus_dir = Path(corpus_dir)
         self._build_organizations_list()
         for component_file in self._iter_files(self.corpus_dir, file_name):
-            logging.info("Adding file {} to corpus root.".format(
-                str(component_file)))
-            corpus_component = parse_xml_file(str(component_file)).getroot()
-            self._update_tag_usage(corpus_component)
-            self._add_or_update_speakers(corpus_component)
-            self._add_component_file(component_file)
+            self._add_component(component_file)
+        if deduplicate_persons:
+            self._deduplicate_persons(apply_postprocessing)
         self._write_file(file_name)
         logging.info("Finished building root file of the corpus.")
         if apply_postprocessing:
             logging.info("Post-processing is enabled.")
             self._apply_id_correction(self.corpus_dir, file_name)
 
-    def _apply_id_correction(self, corpus_dir, root_file_name):
+    def update_corpus_root(self,
+                           corpus_dir,
+                           file_name="ParlaMint-RO.xml",
+                           apply_postprocessing=True,
+                           deduplicate_persons=True):
+        """Adds the corpus files from corpus_dir that are not yet included in an existing corpus root file.
+
+        Parameters
+        ----------
+        corpus_dir: str, required
+            The path to the directory containing corpus files.
+        file_name: str, optional
+            The name of the existing root file. Default is `ParlaMint-RO.xml`.
+        apply_postprocessing: bool, optional
+            Specifies whether to apply any postprocessing actions like replacing invalid characters in ids.
+            Default is True.
+        deduplicate_persons: bool, optional
+            Specifies whether to merge the duplicate entries of the persons list.
+            Default is True.
+        """
+        self.corpus_dir = Path(corpus_dir)
+        root_file = Path(self.corpus_dir, file_name)
+        if not root_file.exists():
+            logging.warning(
+                "Root file {} does not exist. Building it from scratch.".
+                format(str(root_file)))
+            self.build_corpus_root(corpus_dir,
+                                   file_name=file_name,
+                                   apply_postprocessing=apply_postprocessing,
+                                   deduplicate_persons=deduplicate_persons)
+            return
+        self._load_corpus_root(root_file)
+        included_files = self._get_included_files()
+        new_files = [
+            component_file for component_file in self._iter_files(
+                self.corpus_dir, file_name)
+            if get_component_href(component_file, self.corpus_dir) not in
+            included_files
+        ]
+        logging.info("Found {} new files to add to corpus root.".format(
+            len(new_files)))
+        for component_file in new_files:
+            self._add_component(component_file)
+        if deduplicate_persons:
+            self._deduplicate_persons(apply_postprocessing)
+        self._write_file(file_name)
+        logging.info("Finished updating root file of the corpus.")
+        if apply_postprocessing:
+            logging.info("Post-processing is enabled.")
+            # Merged persons may be referenced by the files that were already included.
+            component_files = None
+            if not self.person_merge_log:
+                component_files = new_files + list(
+                    self._iter_annotated_files(new_files))
+            self._apply_id_correction(self.corpus_dir, file_name,
+                                      component_files)
+
+    def _deduplicate_persons(self, apply_postprocessing=True):
+        """Merges the `person` elements having the same signature into the first of them.
+
+        Parameters
+        ----------
+        apply_postprocessing: bool, optional
+            Specifies whether the ids of the merged persons will be replaced in corpus files.
+            Default is True.
+        """
+        logging.info("Removing duplicate entries from the list of persons.")
+        person_list = next(
+            self.corpus_root.iterdescendants(tag=XmlElements.listPerson))
+        persons_by_signature = {}
+        merges = {}
+        for person in list(person_list.iterchildren(tag=XmlElements.person)):
+            signature = self._build_person_signature(person)
+            if signature not in persons_by_signature:
+                persons_by_signature[signature] = person
+                continue
+            kept_person = persons_by_signature[signature]
+            self._merge_person(kept_person, person)
+            if signature not in merges:
+                merges[signature] = {
+                    'signature': signature,
+                    'person_id': kept_person.get(XmlAttributes.xml_id),
+                    'merged_ids': []
+                }
+            merges[signature]['merged_ids'].append(
+                person.get(XmlAttributes.xml_id))
+        self.person_merge_log = list(merges.values())
+        logging.info("Merged {} duplicate persons.".format(
+            sum(len(m['merged_ids']) for m in self.person_merge_log)))
+        if self.person_merge_log and not apply_postprocessing:
+            logging.warning(
+                "Post-processing is disabled; references to merged persons will not be updated."
+            )
+
+    def _build_person_signature(self, person):
+        """Builds the hash of the normalized names, sex and canonical id of a person.
+
+        Parameters
+        ----------
+        person: etree.Element, required
+            The `person` element.
+
+        Returns
+        -------
+        signature: str
+            The hexadecimal digest of the person signature.
+        """
+        names = [
+            get_element_text(name) for name in person.iterdescendants(
+                XmlElements.forename, XmlElements.surname)
+        ]
+        sex = None
+        for sex_element in person.iterchildren(tag=XmlElements.sex):
+            sex = sex_element.get(XmlAttributes.value)
+        canonical_id = self._build_canonical_id(
+            person.get(XmlAttributes.xml_id))
+        parts = [
+            sort_tokens(fold_name(' '.join(names))),
+            str(sex),
+            sort_tokens(fold_name(canonical_id))
+        ]
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _merge_person(self, kept_person, duplicate):
+        """Moves the affiliations and picture of the duplicate person to the kept one and removes the duplicate.
+
+        Parameters
+        ----------
+        kept_person: etree.Element, required
+            The person into which to merge.
+        duplicate: etree.Element, required
+            The duplicate person to remove.
+        """
+        kept_id = kept_person.get(XmlAttributes.xml_id)
+        duplicate_id = duplicate.get(XmlAttributes.xml_id)
+        logging.info("Merging person {} into {}.".format(
+            duplicate_id, kept_id))
+        self._move_person_details(kept_person, duplicate)
+        duplicate.getparent().remove(duplicate)
+
+        canonical_kept_id = self._build_canonical_id(kept_id)
+        merged_ids = self.ids_by_canonical_id.pop(
+            self._build_canonical_id(duplicate_id), set())
+        for id_string in merged_ids:
+            self._set_id_replacement(id_string, canonical_kept_id)
+        self._add_id_to_merge(duplicate_id, kept_id)
+        self.existing_persons[duplicate_id] = kept_person
+        for deputy_info in list(self.deputies_by_person.get(duplicate_id, [])):
+            self._index_person_by_deputy(deputy_info, kept_person)
+
+    def _move_person_details(self, kept_person, duplicate):
+        """Moves the affiliations to the terms missing from the kept person and the missing picture from the duplicate person.
+
+        Parameters
+        ----------
+        kept_person: etree.Element, required
+            The person into which to merge.
+        duplicate: etree.Element, required
+            The duplicate person.
+        """
+        kept_id = kept_person.get(XmlAttributes.xml_id)
+        kept_terms = self.person_affiliations.setdefault(kept_id, set())
+        for affiliation in list(
+                duplicate.iterchildren(tag=XmlElements.affiliation)):
+            term_id = affiliation.get(XmlAttributes.ana).strip('#')
+            if term_id not in kept_terms:
+                kept_person.append(affiliation)
+                kept_terms.add(term_id)
+        has_figure = any(
+            True for _ in kept_person.iterchildren(tag=XmlElements.figure))
+        if not has_figure:
+            for figure in duplicate.iterchildren(tag=XmlElements.figure):
+                kept_person.append(figure)
+                break
+
+    def _index_person_by_deputy(self, deputy_info, person):
+        """Records the person added for the deputy, keeping the reverse index of the deputies of each person.
+
+        Parameters
+        ----------
+        deputy_info: DeputyInfo, required
+            The deputy info from the name map.
+        person: etree.Element, required
+            The person added for the deputy.
+        """
+        previous_person = self.persons_by_deputy.get(deputy_info)
+        if previous_person is not None:
+            self.deputies_by_person[previous_person.get(
+                XmlAttributes.xml_id)].discard(deputy_info)
+        self.persons_by_deputy[deputy_info] = person
+        self.deputies_by_person.setdefault(person.get(XmlAttributes.xml_id),
+                                           set()).add(deputy_info)
+
+    def _set_id_replacement(self, id_string, canonical_id):
+        """Schedules the id to be replaced, keeping the reverse index of the ids replaced by each canonical id.
+
+        Parameters
+        ----------
+        id_string: str, required
+            The id to be replaced.
+        canonical_id: str, required
+            The replacement id.
+        """
+        previous_id = self.ids_to_replace.get(id_string)
+        if previous_id in self.ids_by_canonical_id:
+            self.ids_by_canonical_id[previous_id].discard(id_string)
+        self.ids_to_replace[id_string] = canonical_id
+        self.ids_by_canonical_id.setdefault(canonical_id, set()).add(id_string)
+        if self.registry is not None:
+            self.registry.add_id_replacement(id_string, canonical_id)
+
+    def _add_component(self, component_file):
+        """Aggregates the tag usage and speakers of the component file and adds it to the included files.
+
+        Parameters
+        ----------
+        component_file: pathlib.Path, required
+            The path of the component file.
+        """
+        logging.info("Adding file {} to corpus root.".format(
+            str(component_file)))
+        summary = read_component_summary(str(component_file))
+        self._update_tag_usage(summary.tag_usage)
+        self._add_or_update_speakers(summary.session_date,
+                                     summary.speaker_ids)
+        self._add_component_file(component_file)
+
+    def _load_corpus_root(self, root_file):
+        """Loads an existing corpus root file and indexes its persons and their affiliations.
+
+        Parameters
+        ----------
+        root_file: pathlib.Path, required
+            The path of the corpus root file.
+        """
+        logging.info("Loading existing corpus root from {}.".format(
+            str(root_file)))
+        self.xml_root = parse_xml_file(str(root_file))
+        self.corpus_root = self.xml_root.getroot()
+        self.parliament_terms = self._parse_terms_list(self.parliament_id)
+        parliament_ref = '#{}'.format(self.parliament_id)
+        for person in self.corpus_root.iterdescendants(tag=XmlElements.person):
+            person_id = person.get(XmlAttributes.xml_id)
+            self.existing_persons[person_id] = person
+            deputy_info = self._find_deputy_of_person(person)
+            if (deputy_info is not None) and (deputy_info
+                                              not in self.persons_by_deputy):
+                self._index_person_by_deputy(deputy_info, person)
+            for affiliation in person.iterchildren(
+                    tag=XmlElements.affiliation):
+                if affiliation.get(XmlAttributes.ref) != parliament_ref:
+                    continue
+                term_id = affiliation.get(XmlAttributes.ana).strip('#')
+                if person_id not in self.person_affiliations:
+                    self.person_affiliations[person_id] = set()
+                self.person_affiliations[person_id].add(term_id)
+        logging.info("Loaded {} persons from corpus root.".format(
+            len(self.existing_persons)))
+
+    def _find_deputy_of_person(self, person):
+        """Looks up the deputy info of a person loaded from an existing corpus root.
+
+        The persons of known deputies have the names of the deputy, while their ids may have been made canonical.
+
+        Parameters
+        ----------
+        person: etree.Element, required
+            The `person` element.
+
+        Returns
+        -------
+        deputy_info: DeputyInfo
+            The deputy info from the name map if found; None otherwise.
+        """
+        key = self._build_name_map_key(person.get(XmlAttributes.xml_id))
+        if key in self.name_map:
+            return self.name_map[key]
+        names = [
+            get_element_text(name) for name in person.iterdescendants(
+                XmlElements.forename, XmlElements.surname)
+        ]
+        key = self._build_name_map_key(build_speaker_id(' '.join(names)))
+        return self.name_map.get(key)
+
+    def _iter_annotated_files(self, component_files):
+        """Iterates over the annotated files of the specified component files.
+
+        Parameters
+        ----------
+        component_files: iterable of pathlib.Path, required
+            The paths of the component files.
+
+        Returns
+        -------
+        annotated_file: generator of pathlib.Path
+            The generator that returns the path of each existing annotated file.
+        """
+        stems = set(
+            strip_compression_suffix(str(component_file))[:-len('.xml')]
+            for component_file in component_files)
+        listing = CorpusScanner(self.corpus_dir).scan()
+        for annotated_file in listing.annotated_files:
+            stem = strip_compression_suffix(
+                str(annotated_file))[:-len('.ana.xml')]
+            if stem in stems:
+                yield annotated_file
+
+    def _get_included_files(self):
+        """Returns the names of the files included in the corpus root.
+
+        Returns
+        -------
+        included_files: set of str
+            The values of `href` attribute of `xi:include` elements.
+        """
+        return set(
+            include.get(XmlAttributes.href)
+            for include in self.corpus_root.iterchildren(
+                tag=XmlElements.include))
+
+    def _apply_id_correction(self,
+                             corpus_dir,
+                             root_file_name,
+                             component_files=None):
         """Iterates over the files in corpus directory and replaces the ids containing invalid characters with the normalized ones.
 
         Parameters
@@ -563,9 +1490,15 @@ class RootXmlBuilder:
             The path of the corpus directory.
         root_file_name: str, required
             The name of the root file of the corpus within `corpus_dir`.
+        component_files: iterable of pathlib.Path, optional
+            The component files to correct. Default is None which means all the files from `corpus_dir`.
         """
         logging.info("Applying id correction to corpus files.")
-        for component_file in self._iter_files(corpus_dir, root_file_name):
+        if component_files is None:
+            component_files = self._iter_files(corpus_dir,
+                                               root_file_name,
+                                               include_annotated=True)
+        for component_file in component_files:
             self._correct_ids_in_file(component_file)
         logging.info("Applying id correction to root file.")
         for person in self.corpus_root.iterdescendants(tag=XmlElements.person):
@@ -612,50 +1545,116 @@ class RootXmlBuilder:
             The path of the component file.
         """
         file_name = Path(component_file)
-        add_component_file_to_corpus_root(file_name, self.corpus_root)
+        add_component_file_to_corpus_root(file_name, self.corpus_root,
+                                          self.corpus_dir)
 
-    def _add_or_update_speakers(self, corpus_component):
-        """Iterates over the speakers from the `corpus_component` and adds them to the list of speakers or updates their affiliation.
+    def _add_or_update_speakers(self, session_date, speaker_ids):
+        """Iterates over the speakers of a component file and adds them to the list of speakers or updates their affiliation.
 
         Parameters
         ----------
-        corpus_component: etree.ElementTree, required
-            The contents of the component file as an XML tree.
+        session_date: str, required
+            The value of `when` attribute of the session date; may be None.
+        speaker_ids: iterable of str, required
+            The values of `who` attribute of the utterances from the component file.
         """
         logging.info("Updating speakers.")
-        session_date = None
-        for date_elem in corpus_component.iterdescendants(
-                tag=XmlElements.date):
-            if date_elem.getparent().tag == XmlElements.bibl:
-                session_date = parser.parse(date_elem.get(XmlAttributes.when))
-        if session_date is None:
+        if session_date is not None:
+            session_date = parse_date(session_date)
+        else:
             logging.error("Could not parse session date.")
         person_list = next(
             self.corpus_root.iterdescendants(tag=XmlElements.listPerson))
-        for utterance in corpus_component.iterdescendants(tag=XmlElements.u):
-            speaker_id = utterance.get(XmlAttributes.who)
+        for speaker_id in speaker_ids:
             key = self._build_name_map_key(speaker_id)
             speaker_id = speaker_id.strip('#')
             existing_person = self._find_person_by_id(person_list, speaker_id)
+            if (key not in self.name_map) and (existing_person is None):
+                key = self._resolve_unknown_speaker(speaker_id, key)
             if key not in self.name_map:
                 # This is an unknown person.
                 # If a person with the same id does not exist - add it. Otherwise do nothing.
                 if existing_person is None:
                     self._add_unknown_speaker(person_list, speaker_id)
             else:
+                dep_info = self.name_map[key]
+                # This is a known person which may have been added under a different id.
+                if (existing_person is None) and (self.name_resolver
+                                                  is not None):
+                    existing_person = self._find_person_by_deputy(
+                        dep_info, speaker_id, key)
                 # This is a known person but it may not have been added to the persons list.
                 # If it is not added, add new element.
                 if existing_person is None:
-                    dep_info = self.name_map[key]
                     existing_person = self._add_person(
                         person_list, speaker_id,
                         dep_info.first_name.split(' '),
                         dep_info.last_name.split(' '), Gender.Male
                         if dep_info.gender == "M" else Gender.Female,
                         dep_info.image_url)
+                    self._index_person_by_deputy(dep_info, existing_person)
                 # This is a known person that has already been added to the person list.
                 self._update_speaker_affiliation(existing_person, session_date)
 
+    def _resolve_unknown_speaker(self, speaker_id, key):
+        """Tries to resolve the id of an unknown speaker to the key of a known deputy.
+
+        Parameters
+        ----------
+        speaker_id: str, required
+            The id of the unknown speaker without the leading # symbol.
+        key: str, required
+            The name map key built from the speaker id.
+
+        Returns
+        -------
+        key: str
+            The name map key of the deputy if the speaker was resolved; otherwise the provided key.
+        """
+        if self.name_resolver is None:
+            return key
+        resolution = self.name_resolver.resolve(speaker_id)
+        if resolution is None:
+            return key
+        if speaker_id not in self.name_resolutions:
+            logging.info(
+                "Resolved unknown speaker {} to {} with score {} using {} match."
+                .format(speaker_id, resolution.name_key, resolution.score,
+                        resolution.method))
+            self.name_resolutions[speaker_id] = resolution
+        return resolution.name_key
+
+    def _find_person_by_deputy(self, deputy_info, speaker_id, key):
+        """Looks up the person added for the specified deputy and schedules the speaker id to be merged into it.
+
+        The merge is recorded in the name resolution report.
+
+        Parameters
+        ----------
+        deputy_info: DeputyInfo, required
+            The deputy info from the name map.
+        speaker_id: str, required
+            The id of the speaker without the leading # symbol.
+        key: str, required
+            The name map key of the deputy.
+
+        Returns
+        -------
+        person: etree.Element
+            The person added for the deputy if found; None otherwise.
+        """
+        person = self.persons_by_deputy.get(deputy_info)
+        if person is None:
+            return None
+        person_id = person.get(XmlAttributes.xml_id)
+        logging.info("Speaker {} is merged into person {}.".format(
+            speaker_id, person_id))
+        self._add_id_to_merge(speaker_id, person_id)
+        if speaker_id not in self.deputy_merges:
+            self.deputy_merges[speaker_id] = NameResolution(
+                speaker_id, key, None, 'deputy', person_id)
+        return person
+
     def _update_speaker_affiliation(self,
                                     speaker,
                                     session_date,
@@ -767,6 +1766,14 @@ class RootXmlBuilder:
             logging.info(
                 "Person with id #{} already exists.".format(person_id))
             return self.existing_persons[person_id]
+        # Persons loaded from an already corrected root file are indexed by their canonical id.
+        if self._contains_invalid_characters(person_id):
+            canonical_id = self._build_canonical_id(person_id)
+            if canonical_id in self.existing_persons:
+                logging.info("Person with id #{} exists as #{}.".format(
+                    person_id, canonical_id))
+                self._add_id_to_post_processing(person_id)
+                return self.existing_persons[canonical_id]
         return None
 
     def _add_person(self,
@@ -821,6 +1828,8 @@ class RootXmlBuilder:
             graphic = etree.SubElement(figure, XmlElements.graphic)
             graphic.set(XmlAttributes.url, image_url)
         self.existing_persons[person_id] = person
+        if self.registry is not None:
+            self.registry.register_speaker(person_id)
         return person
 
     def _add_id_to_post_processing(self, id_string):
@@ -841,7 +1850,25 @@ class RootXmlBuilder:
         canonical_id = self._build_canonical_id(id_string)
         logging.info("Scheduling id {} to be replaced with {}.".format(
             id_string, canonical_id))
-        self.ids_to_replace[id_string] = canonical_id
+        self._set_id_replacement(id_string, canonical_id)
+
+    def _add_id_to_merge(self, id_string, person_id):
+        """Schedules the specified id_string to be replaced with the canonical id of another person.
+
+        Parameters
+        ----------
+        id_string: str, required
+            The id to be replaced.
+        person_id: str, required
+            The id of the person into which to merge.
+        """
+        canonical_id = self._build_canonical_id(person_id)
+        if (id_string == canonical_id) or (self.ids_to_replace.get(id_string)
+                                           == canonical_id):
+            return
+        logging.info("Scheduling id {} to be replaced with {}.".format(
+            id_string, canonical_id))
+        self._set_id_replacement(id_string, canonical_id)
 
     def _build_canonical_id(self, id_string):
         """Builds a canonical form of the `id_string` by replacing invalid characters.
@@ -941,21 +1968,15 @@ class RootXmlBuilder:
                 else:
                     self.female_names.add(first_name)
 
-    def _update_tag_usage(self, corpus_component):
-        """Updates the `tagUsage` element with the values from `corpus_component.
+    def _update_tag_usage(self, tag_usage_component):
+        """Updates the `tagUsage` element with the values from a component file.
 
         Parameters
         ----------
-        corpus_component: etree.ElementTree, required
-            The contents of the component file as an XML tree.
+        tag_usage_component: dict of (str, int), required
+            The number of occurences of each tag from the component file.
         """
         logging.info("Updating tagUsage.")
-        tag_usage_component = {
-            tu.get(XmlAttributes.gi): int(tu.get(XmlAttributes.occurs))
-            for tu in corpus_component.iterdescendants(
-                tag=XmlElements.tagUsage)
-        }
-
         tag_usage_root = {
             tu.get(XmlAttributes.gi): tu
             for tu in self.corpus_root.iterdescendants(
@@ -970,8 +1991,8 @@ class RootXmlBuilder:
                 tag_type, num_occurences))
             elem.set(XmlAttributes.occurs, str(num_occurences))
 
-    def _iter_files(self, corpus_dir, root_file):
-        """Iterates over the files in the `corpus_dir` and skips `root_file`.
+    def _iter_files(self, corpus_dir, root_file, include_annotated=False):
+        """Iterates over the files in the `corpus_dir` and its subdirectories and skips the root files.
 
         Parameters
         ----------
@@ -979,14 +2000,25 @@ class RootXmlBuilder:
             The path of the corpus directory.
         root_file: str, required
             The name of the corpus root file to be skipped.
+        include_annotated: bool, optional
+            Specifies whether to iterate over the annotated files too. Default is False.
 
         Returns
         -------
         file_path: generator of pathlib.Path
             The generator that returns path of each component file.
         """
-        for file_path in corpus_dir.glob('*.xml'):
-            if not root_file in str(file_path):
+        root_path = Path(corpus_dir, root_file)
+        root_files = set([
+            root_path,
+            Path(corpus_dir, "{}.ana.xml".format(root_path.stem))
+        ])
+        listing = CorpusScanner(corpus_dir).scan()
+        component_files = listing.component_files
+        if include_annotated:
+            component_files = component_files + listing.annotated_files
+        for file_path in component_files:
+            if file_path not in root_files:
                 yield file_path
 
     def _parse_terms_list(self, parliament_id):
@@ -1010,10 +2042,10 @@ class RootXmlBuilder:
         terms = []
         for event in parliament.iterdescendants(XmlElements.event):
             id = event.get(XmlAttributes.xml_id)
-            start_date = parser.parse(event.get(XmlAttributes.event_start))
+            start_date = parse_date(event.get(XmlAttributes.event_start))
             end_date_str = event.get(XmlAttributes.event_end)
-            end_date = parser.parse(event.get(
-                XmlAttributes.event_end)) if end_date_str is not None else None
+            end_date = parse_date(
+                end_date_str) if end_date_str is not None else None
             terms.append((start_date, end_date, id))
         return terms
 
@@ -1216,11 +2248,21 @@ class XmlIdBuilder:
     """Builds the values for id attributes of XML elements.
     """
 
-    def __init__(self, prefix, session_date):
+    def __init__(self, prefix, session_date, speaker_registry=None):
         """Creates a new instance of XmlIdBuilder.
+
+        Parameters
+        ----------
+        prefix: str, required
+            The prefix of the session id.
+        session_date: date, required
+            The date of the session.
+        speaker_registry: speakerregistry.SpeakerRegistry, optional
+            The registry used to look up the ids of known speakers. Default is None.
         """
         self.prefix = prefix
         self.session_date = session_date
+        self.speaker_registry = speaker_registry
         self.root_id = None
         self.utterance_index = 0
         self.segment_index = 0
@@ -1246,7 +2288,12 @@ class XmlIdBuilder:
         speaker_id: str
             The id of the speaker.
         """
-        return build_speaker_id(speaker)
+        speaker_id = build_speaker_id(speaker)
+        if self.speaker_registry is None:
+            return speaker_id
+        registered_id = self.speaker_registry.register_speaker(
+            speaker_id.strip('#'))
+        return '#{}'.format(registered_id)
 
     def build_utterance_id(self):
         """Builds the id of the current utterance.